@@ -0,0 +1,74 @@
+"""
+Macro-benchmark of complete games against the offline LLM stand-in
+
+Plays a batch of headless MafiaGameController games one after another and
+reports games per minute, LLM calls per game and the peak RSS of the process.
+Expects the local backend with no injected latency (run.py sets this up before
+importing the game).
+
+Games run serially, each seeded from `seed`, because concurrent games would
+share the stand-in's RNG in whatever order their calls land. Played this way
+the batch is deterministic: LLM calls per game is the same on every run and
+every machine, so it can be compared exactly.
+"""
+
+import asyncio
+import random
+import resource
+import sys
+import time
+from typing import Dict
+
+from config import LLM_CONFIG, LOCAL_LLM_CONFIG, RATE_LIMIT_CONFIG
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process, in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+async def play_games(games: int, pacing: str, max_days: int, seed: int):
+    from game.game_controller import MafiaGameController
+
+    calls = []
+    for game in range(games):
+        controller = MafiaGameController(
+            pacing=pacing, max_days=max_days, seed=seed + game
+        )
+        try:
+            await controller.start_game()
+        finally:
+            controller.game_running = False
+        calls.append(controller.llm.get_stats()["calls"])
+    return calls
+
+
+def run(
+    games: int = 20,
+    pacing: str = "turbo",
+    max_days: int = 20,
+    seed: int = 0,
+) -> Dict:
+    """Play `games` games and summarize throughput and footprint"""
+    # Every game must reach the stand-in, not replay a cached reply, and the
+    # API rate limit would cap throughput at its own budget (0 = unlimited)
+    LLM_CONFIG["cache_enabled"] = False
+    RATE_LIMIT_CONFIG["requests_per_second"] = 0
+    RATE_LIMIT_CONFIG["tokens_per_minute"] = 0
+    LOCAL_LLM_CONFIG["seed"] = seed
+    random.seed(seed)
+
+    started = time.perf_counter()
+    calls = asyncio.run(play_games(games, pacing, max_days, seed))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "games": games,
+        "seed": seed,
+        "elapsed_seconds": round(elapsed, 2),
+        "games_per_minute": round(games / elapsed * 60, 1),
+        "llm_calls_per_game": round(sum(calls) / len(calls), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
@@ -0,0 +1,91 @@
+"""
+Micro-benchmarks of GameState hot operations
+
+Each operation is timed on a game of 13, 50 and 200 players that already has
+a day of chat and votes behind it, so reads see realistic state. Results are
+microseconds per call, the best of several repeats.
+"""
+
+import random
+import timeit
+from typing import Callable, Dict, List
+
+from game.game_state import GamePhase, GameState
+
+PLAYER_COUNTS = (13, 50, 200)
+
+MESSAGE_TEMPLATES = (
+    "I think {name} is acting suspicious today.",
+    "Has anyone else noticed how quiet {name} has been?",
+    "I trust {name}, they have been consistent.",
+    "{name} is definitely mafia, look at their votes!",
+    "Let's not rush this, we need more information.",
+)
+
+
+def build_state(players: int, messages: int = 200, seed: int = 0) -> GameState:
+    """A day-one game with `players` players, chat and a round of votes"""
+    rng = random.Random(seed)
+    state = GameState()
+
+    mafia = max(1, players // 4)
+    roles = ["mafia"] * mafia + ["detective", "doctor"]
+    roles += ["civilian"] * (players - len(roles))
+    rng.shuffle(roles)
+    for index, role in enumerate(roles):
+        state.add_player(f"Player{index + 1}", role, None)
+
+    state.day_count = 1
+    state.phase = GamePhase.DAY
+    names = state.player_names
+    for _ in range(messages):
+        template = rng.choice(MESSAGE_TEMPLATES)
+        state.add_chat_message(
+            rng.choice(names), template.format(name=rng.choice(names))
+        )
+    for voter in names:
+        state.add_vote(voter, rng.choice(names))
+    return state
+
+
+def operations(state: GameState, seed: int = 0) -> Dict[str, Callable[[], object]]:
+    """The operations to time, as zero-argument callables"""
+    rng = random.Random(seed)
+    names = state.player_names
+    messages = [
+        template.format(name=name) for template in MESSAGE_TEMPLATES for name in names
+    ]
+    votes = [(rng.choice(names), rng.choice(names)) for _ in range(1000)]
+    counter = iter(range(1 << 62))
+
+    def add_chat_message():
+        i = next(counter)
+        state.add_chat_message(names[i % len(names)], messages[i % len(messages)])
+
+    def add_vote():
+        state.add_vote(*votes[next(counter) % len(votes)])
+
+    return {
+        "add_chat_message": add_chat_message,
+        "add_vote": add_vote,
+        "get_game_stats": state.get_game_stats,
+        "to_dict": state.to_dict,
+        "check_win_condition": state.check_win_condition,
+    }
+
+
+def run(player_counts=PLAYER_COUNTS, number: int = 2000, repeat: int = 5) -> List[Dict]:
+    """Time every operation at every player count"""
+    results = []
+    for players in player_counts:
+        state = build_state(players)
+        for name, operation in operations(state).items():
+            best = min(timeit.repeat(operation, number=number, repeat=repeat))
+            results.append(
+                {
+                    "name": f"game_state.{name}[{players}]",
+                    "us_per_op": round(best / number * 1e6, 3),
+                }
+            )
+        state.chat_history.close()
+    return results
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Mafia game
+
+Runs offline against the local LLM stand-in: micro-benchmarks of GameState
+operations at 13, 50 and 200 players, then a batch of complete games. Results
+are compared with benchmarks/baseline.json.
+
+The games are seeded, so LLM calls per game is deterministic and any change
+from the baseline fails the run. Timings and memory depend on the machine and
+its load, so they are only printed next to the baseline unless --check-timings
+is given, which fails on anything worse than --tolerance. That needs a baseline
+recorded on the same machine (same CPU, platform and Python), so record one
+there first:
+
+    python benchmarks/run.py                    # check LLM calls per game
+    python benchmarks/run.py --save-baseline    # record a baseline here
+    python benchmarks/run.py --check-timings    # ...then compare timings too
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Offline and as fast as the game allows; set before config is imported
+os.environ["MAFIA_LLM_BACKEND"] = "local"
+os.environ.setdefault("MAFIA_LOCAL_LATENCY", "none")
+
+# Add the repository root to Python path
+root_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root_dir))
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Direction of each timed macro metric; micro metrics are all lower-is-better
+HIGHER_IS_BETTER = {"games_per_minute"}
+TIMED_MACRO = ("games_per_minute", "peak_rss_mb")
+
+# Micro timings that moved by less than this are timer noise, however large
+# the change is in percent (check_win_condition takes well under 1us)
+MIN_MICRO_DELTA_US = 0.5
+
+
+def machine_info() -> Dict:
+    """What timings depend on, recorded with every baseline"""
+    cpu = platform.processor()
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return {
+        "cpu": cpu,
+        "cpus": os.cpu_count(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+    }
+
+
+def run_benchmarks(games: int, number: int) -> Dict:
+    """Run the macro benchmark, then the micro-benchmarks"""
+    from benchmarks import game_bench, game_state_bench
+
+    # Games first, so the peak RSS is theirs rather than the micro-benchmarks'
+    devnull = open(os.devnull, "w")
+    stdout, sys.stdout = sys.stdout, devnull  # games narrate every step
+    try:
+        macro = game_bench.run(games=games)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+    micro = {
+        result["name"]: result["us_per_op"]
+        for result in game_state_bench.run(number=number)
+    }
+    return {"machine": machine_info(), "macro": macro, "micro": micro}
+
+
+def compare(
+    results: Dict, baseline: Dict, tolerance: float, timings: bool
+) -> List[str]:
+    """List the metrics that regressed from baseline
+
+    LLM calls per game must match exactly when the baseline played the same
+    games (count and seed). With `timings`, metrics worse than the baseline by
+    more than `tolerance` are listed too.
+    """
+    regressions = []
+    macro, old_macro = results["macro"], baseline.get("macro", {})
+    same_games = all(macro[key] == old_macro.get(key) for key in ("games", "seed"))
+    if same_games and macro["llm_calls_per_game"] != old_macro["llm_calls_per_game"]:
+        regressions.append(
+            f"llm_calls_per_game: {old_macro['llm_calls_per_game']} -> "
+            f"{macro['llm_calls_per_game']} (deterministic, expected no change)"
+        )
+    if not timings:
+        return regressions
+
+    checks = [("macro", name, name in HIGHER_IS_BETTER) for name in TIMED_MACRO] + [
+        ("micro", name, False) for name in results["micro"]
+    ]
+    for section, name, higher_is_better in checks:
+        old = baseline.get(section, {}).get(name)
+        new = results[section].get(name)
+        if not old or new is None:
+            continue
+        if section == "micro" and abs(new - old) < MIN_MICRO_DELTA_US:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{name}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def print_results(results: Dict, baseline: Dict):
+    """Print each result next to its baseline"""
+    macro = results["macro"]
+    print("=" * 60)
+    print(
+        f"🎲 {macro['games']} games in {macro['elapsed_seconds']}s: "
+        f"{macro['games_per_minute']} games/min, "
+        f"{macro['llm_calls_per_game']} LLM calls/game, "
+        f"peak RSS {macro['peak_rss_mb']} MiB"
+    )
+    print("-" * 60)
+    print(f"{'operation':<40}{'us/op':>10}{'baseline':>10}")
+    for name, value in results["micro"].items():
+        old = baseline.get("micro", {}).get(name, "-")
+        print(f"{name:<40}{value:>10}{old:>10}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Mafia benchmark suite")
+    parser.add_argument("--games", type=int, default=20, help="games to play")
+    parser.add_argument(
+        "--number", type=int, default=2000, help="calls per micro-benchmark timing"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="fractional slowdown reported as a regression",
+    )
+    parser.add_argument(
+        "--check-timings",
+        action="store_true",
+        help="also fail on timings worse than the tolerance (same-machine baseline)",
+    )
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="write these results as the new baseline",
+    )
+    args = parser.parse_args()
+
+    print("🏁 Running benchmarks (offline, local LLM stand-in)")
+    results = run_benchmarks(args.games, args.number)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"💾 Saved baseline to {args.baseline}")
+        return
+
+    if not baseline:
+        print("⚠️ No baseline found; run with --save-baseline to record one")
+        return
+
+    if args.check_timings and baseline.get("machine") != results["machine"]:
+        print(
+            "❌ Baseline was recorded on another machine, so its timings don't "
+            "apply here; run with --save-baseline on this machine first"
+        )
+        sys.exit(1)
+
+    if any(
+        results["macro"][key] != baseline.get("macro", {}).get(key)
+        for key in ("games", "seed")
+    ):
+        print("⚠️ Baseline played other games; LLM calls per game not compared")
+
+    regressions = compare(results, baseline, args.tolerance, args.check_timings)
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"   {regression}")
+        sys.exit(1)
+    if args.check_timings:
+        print(f"✅ No regressions beyond {args.tolerance:.0%} of baseline")
+    else:
+        print("✅ No regressions (timings not checked, see --check-timings)")
+
+
+if __name__ == "__main__":
+    main()
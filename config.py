@@ -3,16 +3,60 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# LLM backend: "deepseek" calls DEEPSEEK_BASE_URL, "local" uses the offline
+# stand-in in game/local_llm.py (no API key or network needed)
+LLM_BACKEND = os.getenv("MAFIA_LLM_BACKEND", "deepseek")
+
 # DeepSeek API Configuration
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-if not DEEPSEEK_API_KEY:
+if not DEEPSEEK_API_KEY and LLM_BACKEND == "deepseek":
     raise ValueError(
         "DEEPSEEK_API_KEY environment variable is required. "
-        "Please set it in your .env file or environment variables."
+        "Please set it in your .env file or environment variables, "
+        "or set MAFIA_LLM_BACKEND=local to play against the offline stand-in."
     )
-DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
 DEEPSEEK_MODEL = "deepseek-chat"
 
+# LLM Client Configuration (shared by every game in the process)
+LLM_CONFIG = {
+    "pool_size": 64,  # maximum open connections to the LLM endpoint
+    "keepalive_connections": 32,  # idle connections kept warm for reuse
+    "keepalive_expiry": 30,  # seconds an idle connection is kept alive
+    "max_inflight_per_game": 12,  # concurrent LLM calls a single game may hold
+    "temperature": 0.7,
+    "max_tokens": 150,
+    "request_timeout": 10,  # seconds
+    # Reuse replies for identical prompts. Off for live games: at a temperature
+    # above 0 it would make agents repeat themselves; simulate.py turns it on
+    "cache_enabled": False,
+    "cache_size": 2048,  # replies kept in the in-memory LRU
+    "cache_path": os.getenv("MAFIA_LLM_CACHE_PATH"),  # optional SQLite tier
+}
+
+# Rate limiting shared by every game in the process (0 disables a limit)
+RATE_LIMIT_CONFIG = {
+    "requests_per_second": 20,
+    "tokens_per_minute": 1_000_000,
+    "max_retries": 4,  # retries per call after 429s, 5xx and connection errors
+    "backoff_base": 0.5,  # seconds, doubled per retry when no Retry-After is given
+    "backoff_max": 20,  # seconds
+}
+
+# Offline LLM stand-in (used when MAFIA_LLM_BACKEND=local)
+LOCAL_LLM_CONFIG = {
+    # Latency distribution: none, fixed, uniform, exponential or lognormal
+    "latency": os.getenv("MAFIA_LOCAL_LATENCY", "lognormal"),
+    "latency_median": float(os.getenv("MAFIA_LOCAL_LATENCY_MEDIAN", "0.8")),  # s
+    "latency_sigma": 0.5,  # spread of the lognormal distribution
+    "latency_max": 10.0,  # seconds, cap on any single response
+    "error_rate": float(os.getenv("MAFIA_LOCAL_ERROR_RATE", "0")),  # injected 500s
+    "rate_limit_rate": float(os.getenv("MAFIA_LOCAL_429_RATE", "0")),  # injected 429s
+    "retry_after": 1.0,  # seconds advertised on injected 429s
+    "seed": None,
+    "prefix_cache_blocks": 8192,  # 64-token prompt prefix blocks kept for hits
+}
+
 # Game Configuration
 GAME_CONFIG = {
     "total_players": 13,
@@ -20,10 +64,47 @@ GAME_CONFIG = {
     "detective_count": 1,
     "doctor_count": 1,
     "civilian_count": 7,
-    "discussion_time": 60,  # seconds (reduced from 120)
-    "voting_time": 30,  # seconds (reduced from 60)
+    "pacing": os.getenv("MAFIA_PACING", "live"),  # profile from PACING_PROFILES
     "max_discussion_rounds": 6,  # maximum discussion rounds per phase
     "response_timeout": 15,  # seconds timeout for agent responses
+    "mafia_team_decision": True,  # one LLM call picks the mafia's night target
+    "speculative_speakers": 3,  # discussion lines drafted ahead in parallel (0 = off)
+    "chat_ring_size": 1000,  # messages kept in memory; older ones spill to disk
+    "chat_spill_dir": os.getenv("MAFIA_CHAT_SPILL_DIR"),  # None = system temp dir
+    "trace_dir": os.getenv("MAFIA_TRACE_DIR"),  # per-game span traces; None = off
+    "transcript_dir": os.getenv("MAFIA_TRANSCRIPT_DIR"),  # LLM replies for replay
+}
+
+# Pacing profiles: cosmetic pauses (seconds) and phase lengths per game.
+# A discussion_time of None bounds discussions by max_discussion_rounds only.
+PACING_PROFILES = {
+    # Watchable in the browser
+    "live": {
+        "discussion_time": 60,  # seconds (reduced from 120)
+        "voting_time": 30,  # seconds (reduced from 60)
+        "first_night_pause": 2,
+        "speaker_pause": 1,
+        "round_pause": 3,
+        "vote_reveal_delay": 1.5,  # skipped when no frontend is attached
+    },
+    # Same flow with shorter pauses, for demos and debugging
+    "fast": {
+        "discussion_time": 30,
+        "voting_time": 15,
+        "first_night_pause": 0.5,
+        "speaker_pause": 0.25,
+        "round_pause": 0.5,
+        "vote_reveal_delay": 0.3,
+    },
+    # Headless batch runs: no pauses, phase length is LLM latency only
+    "turbo": {
+        "discussion_time": None,
+        "voting_time": None,
+        "first_night_pause": 0,
+        "speaker_pause": 0,
+        "round_pause": 0,
+        "vote_reveal_delay": 0,
+    },
 }
 
 # Agent Colors for Frontend
@@ -36,7 +117,16 @@ AGENT_COLORS = {
 }
 
 # Flask Configuration
-FLASK_CONFIG = {"host": "0.0.0.0", "port": 5001, "debug": True}
+FLASK_CONFIG = {
+    "host": "0.0.0.0",
+    "port": 5001,
+    "debug": True,
+    "emit_coalesce_window": 0.05,  # seconds to batch frontend updates (0 = off)
+    "max_games": 50,  # unfinished games one server process accepts
+    "finished_games_kept": 20,  # finished games kept around for spectators
+    "shared_game_loop": True,  # play all games on one event loop thread
+    "max_concurrent_games": 20,  # games played at once; later ones wait
+}
 
 # Chat Configuration
 MAFIA_CHAT_COLOR = "#FF4444"  # Bright Red for mafia-only communications
@@ -1,36 +1,58 @@
-from flask import Flask, render_template, request
-from flask_socketio import SocketIO, emit
-import asyncio
-import threading
+from flask import Flask, Response, render_template, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import sys
 import os
 
 # Add parent directory to path to import game modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from game.game_controller import MafiaGameController
+from frontend.game_registry import GameRegistry
+from game import metrics
+from game.game_host import GameHost
 from config import FLASK_CONFIG, AGENT_COLORS
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'mafia_game_secret_key_2024'
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
-# Global game controller
-game_controller = None
-game_thread = None
+# All games hosted by this process; each one streams to its own room
+registry = GameRegistry(FLASK_CONFIG['max_games'], FLASK_CONFIG['finished_games_kept'])
 
-def frontend_callback(event_type: str, data):
-    """Callback function to send updates to frontend"""
-    socketio.emit('game_update', {
-        'type': event_type,
-        'data': data
-    })
+# Shared event loop that plays every game as a task (None: a thread per game)
+game_host = GameHost(FLASK_CONFIG['max_concurrent_games']) if FLASK_CONFIG['shared_game_loop'] else None
+
+# Game each client is following (sid -> game ID) and games they started
+client_games = {}
+started_games = {}
+
+def report_game_error(game_id: str, error: Exception):
+    """Tell a game's room that it crashed"""
+    socketio.emit('error', {'message': f'Game error: {str(error)}', 'game_id': game_id}, to=game_id)
+
+def get_client_session(data=None):
+    """Game named in the request, or the one the client is following"""
+    game_id = (data or {}).get('game_id') or client_games.get(request.sid)
+    return registry.get(game_id)
+
+def follow_game(session):
+    """Move the client into a game's room and send it the full state"""
+    previous = client_games.get(request.sid)
+    if previous and previous != session.game_id:
+        leave_room(previous)
+    join_room(session.game_id)
+    client_games[request.sid] = session.game_id
+    emit('game_state', session.snapshot())
 
 @app.route('/')
 def index():
     """Main game interface"""
     return render_template('index.html', agent_colors=AGENT_COLORS)
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """LLM, phase and game metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
@@ -41,68 +63,87 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection"""
     print('Client disconnected')
+    client_games.pop(request.sid, None)
+    started_games.pop(request.sid, None)
 
 @socketio.on('start_game')
-def handle_start_game():
+def handle_start_game(data=None):
     """Handle game start request"""
-    global game_controller, game_thread
-    
     print("Starting new game...")
     
-    # Stop existing game if running
-    if game_controller and game_controller.game_running:
-        game_controller.game_running = False
-        if game_thread:
-            game_thread.join(timeout=5)
-    
-    # Create new game controller
-    game_controller = MafiaGameController(frontend_callback)
+    # Stop the game this client started before, if it is still running
+    previous = registry.get(started_games.get(request.sid))
+    if previous and previous.running:
+        previous.stop()
     
-    # Start game in separate thread
-    def run_game():
-        try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Run the game
-            loop.run_until_complete(game_controller.start_game())
-            loop.close()
-            
-        except Exception as e:
-            print(f"Error in game thread: {e}")
-            socketio.emit('error', {'message': f'Game error: {str(e)}'})
+    # Create new game (optionally with a pacing profile)
+    pacing = (data or {}).get('pacing')
+    try:
+        session = registry.create(socketio.emit, FLASK_CONFIG['emit_coalesce_window'], pacing)
+    except ValueError as e:
+        emit('error', {'message': str(e)})
+        return
     
-    game_thread = threading.Thread(target=run_game)
-    game_thread.daemon = True
-    game_thread.start()
+    started_games[request.sid] = session.game_id
+    emit('game_started', {'message': 'Game starting...', 'game_id': session.game_id})
+    follow_game(session)
     
-    emit('game_started', {'message': 'Game starting...'})
+    # Start game on the shared loop (or in a separate thread)
+    session.start(report_game_error, game_host)
 
 @socketio.on('stop_game')
-def handle_stop_game():
+def handle_stop_game(data=None):
     """Handle game stop request"""
-    global game_controller, game_thread
+    session = get_client_session(data)
     
-    if game_controller:
-        game_controller.game_running = False
-        print("Game stopped by user")
-        emit('game_stopped', {'message': 'Game stopped'})
+    if session:
+        session.stop()
+        print(f"Game {session.game_id} stopped by user")
+        emit('game_stopped', {'message': 'Game stopped', 'game_id': session.game_id}, to=session.game_id)
+
+@socketio.on('join_game')
+def handle_join_game(data=None):
+    """Spectate a game: join its room and get its current state"""
+    session = get_client_session(data)
+    
+    if session:
+        follow_game(session)
+        emit('game_joined', session.summary())
+    else:
+        emit('error', {'message': 'Game not found'})
+
+@socketio.on('leave_game')
+def handle_leave_game(data=None):
+    """Stop receiving a game's updates"""
+    session = get_client_session(data)
+    
+    if session:
+        leave_room(session.game_id)
+        if client_games.get(request.sid) == session.game_id:
+            client_games.pop(request.sid)
+        emit('game_left', {'game_id': session.game_id})
+
+@socketio.on('list_games')
+def handle_list_games():
+    """Handle request for the games hosted by this server"""
+    emit('game_list', {'games': registry.list()})
 
 @socketio.on('get_game_state')
-def handle_get_game_state():
+def handle_get_game_state(data=None):
     """Handle request for current game state"""
-    if game_controller and game_controller.game_state:
-        emit('game_state', game_controller.game_state.to_dict())
+    session = get_client_session(data)
+    if session:
+        emit('game_state', session.snapshot())
     else:
         emit('game_state', {'message': 'No active game'})
 
 @socketio.on('request_stats')
-def handle_request_stats():
+def handle_request_stats(data=None):
     """Handle request for game statistics"""
-    if game_controller and game_controller.game_state:
-        stats = game_controller.game_state.get_game_stats()
-        emit('game_stats', stats)
+    session = get_client_session(data)
+    if session:
+        stats = session.controller.game_state.get_game_stats()
+        emit('game_stats', dict(stats, game_id=session.game_id))
 
 if __name__ == '__main__':
     print(f"Starting Mafia Game Server on {FLASK_CONFIG['host']}:{FLASK_CONFIG['port']}")
@@ -0,0 +1,132 @@
+"""
+Batching of game updates sent to the browser
+
+Agents and the controller push updates one at a time, often several within a
+few milliseconds (a chat message, a vote, then a state push). EmitCoalescer
+collects the updates that arrive within a short window and sends them as one
+`game_batch` frame. Consecutive state patches are merged and a full snapshot
+drops every state update queued before it, so superseded states are never
+encoded or sent.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional
+
+from game.game_state import merge_patches
+
+# Updates that describe the whole game state and may be merged or dropped
+STATE_EVENTS = ("game_state", "state_patch")
+
+# Updates that may be reordered around state updates; anything else is a
+# barrier that keeps its position relative to the state
+ORDER_FREE_EVENTS = ("new_message",)
+
+
+class EmitCoalescer:
+    """Merge bursts of frontend updates into batched frames"""
+
+    def __init__(self, emit: Callable[..., None], window: float = 0.05):
+        self.emit = emit  # socketio.emit(event, payload)
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._timer = None  # pending threading.Timer or loop TimerHandle
+
+        # Counters
+        self.updates = 0
+        self.frames = 0
+        self.collapsed = 0
+
+    def push(self, event_type: str, data):
+        """Queue an update; it is sent when the window closes"""
+        update = {"type": event_type, "data": data}
+        if self.window <= 0:
+            with self._lock:
+                self.updates += 1
+                self.frames += 1
+            self.emit("game_update", update)
+            return
+
+        with self._lock:
+            self.updates += 1
+            self._pending.append(update)
+            if self._timer is None:
+                self._timer = self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Call flush after the window, on the caller's event loop if it has one"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            timer = threading.Timer(self.window, self.flush)
+            timer.daemon = True
+            timer.start()
+            return timer
+        return loop.call_later(self.window, self.flush)
+
+    def flush(self):
+        """Send everything queued so far"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._timer = None
+            if not pending:
+                return
+            updates = coalesce(pending)
+            self.collapsed += len(pending) - len(updates)
+            self.frames += 1
+
+        if len(updates) == 1:
+            self.emit("game_update", updates[0])
+        else:
+            self.emit("game_batch", {"updates": updates})
+
+    def get_stats(self) -> Dict:
+        """Get update and frame counters"""
+        with self._lock:
+            return {
+                "updates": self.updates,
+                "frames": self.frames,
+                "collapsed": self.collapsed,
+                "pending": len(self._pending),
+            }
+
+
+def coalesce(updates: List[Dict]) -> List[Dict]:
+    """Drop superseded state updates and merge consecutive patches"""
+    result: List[Dict] = []
+    state_index: Optional[int] = None  # latest state update still mergeable
+
+    for update in updates:
+        event_type = update["type"]
+
+        if event_type not in STATE_EVENTS:
+            if event_type not in ORDER_FREE_EVENTS:
+                state_index = None
+            result.append(update)
+            continue
+
+        if state_index is None:
+            state_index = len(result)
+            result.append(update)
+            continue
+
+        latest = result[state_index]
+        if event_type == "game_state":
+            # A full snapshot supersedes anything queued before it
+            result[state_index] = update
+        elif latest["type"] == "state_patch":
+            merged = merge_patches(latest["data"], update["data"])
+            if merged is not None:
+                result[state_index] = {"type": "state_patch", "data": merged}
+            else:
+                state_index = len(result)
+                result.append(update)
+        elif update["data"]["version"] <= latest["data"]["version"]:
+            pass  # Already covered by the queued snapshot
+        else:
+            state_index = len(result)
+            result.append(update)
+
+    return result
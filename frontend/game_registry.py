@@ -0,0 +1,163 @@
+"""
+Registry of the games hosted by one server process
+
+Each game gets a GameSession holding its controller, where it runs (a task on
+the shared GameHost loop, or a thread of its own) and an EmitCoalescer whose
+frames are sent only to the game's Socket.IO room (named after the game ID),
+so clients receive only the games they joined.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from frontend.emit_coalescer import EmitCoalescer
+from game.game_controller import MafiaGameController
+from game.game_host import GameHost
+from game.llm_client import get_llm_pool
+
+
+class GameSession:
+    """One hosted game and the room that follows it"""
+
+    def __init__(
+        self,
+        controller: MafiaGameController,
+        emit: Callable[..., None],
+        coalesce_window: float,
+    ):
+        self.controller = controller
+        self.game_id = controller.game_id
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.thread: Optional[threading.Thread] = None
+        self.host: Optional[GameHost] = None
+
+        # Updates go to this game's room only
+        self.emitter = EmitCoalescer(self.emit_to_room, coalesce_window)
+        self._emit = emit
+        controller.frontend_callback = self.emitter.push
+
+    def emit_to_room(self, event: str, payload: Dict):
+        """Send an event to everyone in this game's room"""
+        self._emit(event, dict(payload, game_id=self.game_id), to=self.game_id)
+
+    def start(
+        self,
+        on_error: Callable[[str, Exception], None],
+        host: Optional[GameHost] = None,
+    ):
+        """Run the game as a task on the shared host, or on its own thread"""
+        if host is not None:
+            self.host = host
+
+            def on_done(game_id: str, error: Optional[BaseException]):
+                self.finished = time.time()
+                if isinstance(error, Exception):
+                    on_error(game_id, error)
+
+            host.submit(self.controller, on_done)
+            return
+
+        def run_game():
+            # Create new event loop for this thread
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                # Run the game
+                loop.run_until_complete(self.controller.start_game())
+                self.emitter.flush()  # its timer dies with the loop
+
+            except Exception as e:
+                print(f"Error in game {self.game_id}: {e}")
+                on_error(self.game_id, e)
+            finally:
+                # The loop's HTTP client would otherwise leak its connections
+                loop.run_until_complete(get_llm_pool().aclose())
+                loop.close()
+                self.finished = time.time()
+
+        self.thread = threading.Thread(target=run_game, name=f"game-{self.game_id}")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Ask the game to stop after its current phase"""
+        self.controller.game_running = False
+        if self.host is not None:
+            self.host.stop(self.game_id)
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    def snapshot(self) -> Dict:
+        """Full game state for a client joining the room"""
+        return dict(self.controller.snapshot(), game_id=self.game_id)
+
+    def summary(self) -> Dict:
+        """Short description for game listings"""
+        state = self.controller.game_state
+        return {
+            "game_id": self.game_id,
+            "pacing": self.controller.pacing,
+            "phase": state.phase.value,
+            "day_count": state.day_count,
+            "alive": len(state.alive_players),
+            "running": self.running,
+            "created": self.created,
+        }
+
+
+class GameRegistry:
+    """Thread-safe map of game ID to GameSession"""
+
+    def __init__(self, max_games: int = 50, finished_games_kept: int = 20):
+        self.max_games = max_games  # unfinished games (playing or waiting)
+        self.finished_games_kept = finished_games_kept  # kept for late spectators
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, GameSession] = {}
+
+    def create(
+        self,
+        emit: Callable[..., None],
+        coalesce_window: float,
+        pacing: Optional[str] = None,
+    ) -> GameSession:
+        """Register a new game; raises ValueError when the server is full"""
+        with self._lock:
+            self._prune()
+            running = sum(1 for s in self._sessions.values() if s.running)
+            if running >= self.max_games:
+                raise ValueError(
+                    f"Server is hosting the maximum of {self.max_games} games"
+                )
+
+            controller = MafiaGameController(pacing=pacing)
+            session = GameSession(controller, emit, coalesce_window)
+            self._sessions[session.game_id] = session
+            return session
+
+    def get(self, game_id: Optional[str]) -> Optional[GameSession]:
+        """Look up a game by ID"""
+        with self._lock:
+            return self._sessions.get(game_id)
+
+    def list(self) -> List[Dict]:
+        """Summaries of every registered game, newest first"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return [
+            s.summary() for s in sorted(sessions, key=lambda s: s.created, reverse=True)
+        ]
+
+    def _prune(self):
+        """Forget the oldest finished games beyond the retention limit"""
+        finished = sorted(
+            (s for s in self._sessions.values() if not s.running),
+            key=lambda s: s.finished,
+        )
+        for session in finished[: max(0, len(finished) - self.finished_games_kept)]:
+            del self._sessions[session.game_id]
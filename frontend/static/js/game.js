@@ -4,7 +4,11 @@ class MafiaGameInterface {
     this.socket = io();
     this.voteChart = null;
     this.currentFilter = "all";
+    this.gameId = null; // Game whose room this client follows
     this.gameState = null;
+    this.awaitingSnapshot = false; // Full state requested after a version gap
+    this.historyPending = false; // Render the next snapshot's chat on join
+    this.historyShown = new Set(); // Snapshot messages that may arrive again
     this.messageCount = 0;
     this.previousVotes = new Set(); // Track previous votes for highlighting
 
@@ -43,6 +47,12 @@ class MafiaGameInterface {
     this.socket.on("connect", () => {
       this.updateConnectionStatus(true);
       console.log("Connected to game server");
+
+      // Rejoin our game after a reconnect, or spectate one given as ?game=<id>
+      const requested = new URLSearchParams(window.location.search).get("game");
+      if (this.gameId || requested) {
+        this.joinGame(this.gameId || requested);
+      }
     });
 
     this.socket.on("disconnect", () => {
@@ -51,19 +61,30 @@ class MafiaGameInterface {
     });
 
     this.socket.on("game_update", (data) => {
+      if (!this.isCurrentGame(data)) return;
       this.handleGameUpdate(data);
     });
 
+    // Several updates coalesced by the server into one frame
+    this.socket.on("game_batch", (batch) => {
+      if (!this.isCurrentGame(batch)) return;
+      batch.updates.forEach((update) => this.handleGameUpdate(update));
+    });
+
     this.socket.on("game_started", (data) => {
-      this.showMessage("Game starting...", "success");
+      this.gameId = data.game_id;
+      this.gameState = null;
+      this.showMessage(`Game ${data.game_id} starting...`, "success");
       this.clearChat();
     });
 
     this.socket.on("game_stopped", (data) => {
+      if (!this.isCurrentGame(data)) return;
       this.showMessage("Game stopped", "info");
     });
 
     this.socket.on("game_state", (state) => {
+      if (!this.isCurrentGame(state)) return;
       this.updateGameState(state);
     });
 
@@ -137,7 +158,22 @@ class MafiaGameInterface {
   }
 
   stopGame() {
-    this.socket.emit("stop_game");
+    this.socket.emit("stop_game", { game_id: this.gameId });
+  }
+
+  joinGame(gameId) {
+    if (gameId !== this.gameId) {
+      this.gameState = null;
+      this.clearChat();
+      this.historyPending = true;
+    }
+    this.gameId = gameId;
+    this.socket.emit("join_game", { game_id: gameId });
+  }
+
+  isCurrentGame(payload) {
+    // Updates are tagged with the game they belong to
+    return !payload.game_id || payload.game_id === this.gameId;
   }
 
   updateConnectionStatus(connected) {
@@ -156,11 +192,16 @@ class MafiaGameInterface {
 
     switch (type) {
       case "new_message":
-        this.addChatMessage(data);
+        if (!this.historyShown.delete(this.messageKey(data))) {
+          this.addChatMessage(data);
+        }
         break;
       case "game_state":
         this.updateGameState(data);
         break;
+      case "state_patch":
+        this.applyStatePatch(data);
+        break;
       case "player_action":
         this.handlePlayerAction(data);
         break;
@@ -224,6 +265,18 @@ class MafiaGameInterface {
     this.messageCount++;
   }
 
+  showChatHistory(messages) {
+    // Messages still queued on the server when we joined are already in the
+    // snapshot; remember them so their live copies are not shown twice
+    this.clearChat();
+    messages.forEach((message) => this.addChatMessage(message));
+    this.historyShown = new Set(messages.map((m) => this.messageKey(m)));
+  }
+
+  messageKey(message) {
+    return `${message.timestamp}|${message.sender}|${message.message}`;
+  }
+
   formatMessageContent(content) {
     // Add basic formatting for game messages
     content = content.replace(/\*\*(.*?)\*\*/g, "<strong>$1</strong>");
@@ -246,8 +299,98 @@ class MafiaGameInterface {
     return player ? player.role : null;
   }
 
+  applyStatePatch(patch) {
+    const state = this.gameState;
+
+    // Already covered by a newer snapshot
+    if (state && patch.version <= state.version) return;
+
+    // Missed an update: ask for the full state once and drop patches until then
+    if (!state || state.version !== patch.from_version) {
+      if (!this.awaitingSnapshot) {
+        this.awaitingSnapshot = true;
+        this.socket.emit("get_game_state", { game_id: this.gameId });
+      }
+      return;
+    }
+
+    if (patch.phase !== undefined) state.phase = patch.phase;
+    if (patch.day_count !== undefined) state.day_count = patch.day_count;
+
+    if (patch.votes_cleared) {
+      state.votes = {};
+      Object.values(state.players).forEach((info) => {
+        info.votes_received = 0;
+      });
+    }
+
+    Object.entries(patch.players || {}).forEach(([name, fields]) => {
+      state.players[name] = Object.assign(state.players[name] || {}, fields);
+    });
+    Object.assign(state.votes, patch.votes || {});
+
+    state.chat_history = state.chat_history
+      .concat(patch.messages || [])
+      .slice(-50);
+    state.recent_events = state.recent_events
+      .concat(patch.events || [])
+      .slice(-10);
+
+    state.version = patch.version;
+    this.deriveStats(state);
+    this.updateGameState(state);
+  }
+
+  deriveStats(state) {
+    // Rebuild the summary fields a full snapshot carries (see get_game_stats)
+    const players = Object.entries(state.players).filter(
+      ([name]) => name !== "Narrator"
+    );
+    const alive = players.filter(([, info]) => info.status !== "eliminated");
+    const aliveMafia = alive.filter(([, info]) => info.role === "mafia").length;
+    const aliveCivilians = alive.length - aliveMafia;
+
+    state.alive_players = alive.map(([name]) => name);
+    state.eliminated_players = players
+      .filter(([, info]) => info.status === "eliminated")
+      .map(([name]) => name);
+    state.mafia_members = players
+      .filter(([, info]) => info.role === "mafia")
+      .map(([name]) => name);
+
+    const voteCounts = {};
+    Object.values(state.votes).forEach((target) => {
+      voteCounts[target] = (voteCounts[target] || 0) + 1;
+    });
+
+    let winner = null;
+    if (aliveMafia === 0) winner = "civilians";
+    else if (aliveMafia >= aliveCivilians) winner = "mafia";
+
+    state.stats = Object.assign(state.stats || {}, {
+      phase: state.phase,
+      day_count: state.day_count,
+      total_alive: alive.length,
+      alive_mafia: aliveMafia,
+      alive_civilians: aliveCivilians,
+      eliminated_count: state.eliminated_players.length,
+      mafia_members: state.mafia_members,
+      alive_players: state.alive_players,
+      eliminated_players: state.eliminated_players,
+      vote_counts: voteCounts,
+      winner: winner,
+    });
+  }
+
   updateGameState(state) {
+    if (state.version === undefined) return; // No active game
     this.gameState = state;
+    this.awaitingSnapshot = false;
+
+    if (this.historyPending) {
+      this.historyPending = false;
+      this.showChatHistory(state.chat_history || []);
+    }
 
     if (!state.stats) return;
 
@@ -506,6 +649,7 @@ class MafiaGameInterface {
     chatMessages.innerHTML =
       '<div class="welcome-message"><h3>Game Starting...</h3><p>AI agents are being initialized...</p></div>';
     this.messageCount = 0;
+    this.historyShown = new Set();
   }
 
   showGameEnd(data) {
@@ -514,7 +658,10 @@ class MafiaGameInterface {
     const finalStats = document.getElementById("final-stats");
 
     // Set winner announcement
-    if (data.winner === "mafia") {
+    if (data.winner === null) {
+      announcement.textContent = "⏱️ NO WINNER ⏱️";
+      announcement.style.color = "#7f8c8d";
+    } else if (data.winner === "mafia") {
       announcement.textContent = "🔴 MAFIA VICTORY! 🔴";
       announcement.style.color = "#e74c3c";
     } else {
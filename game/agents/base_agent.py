@@ -1,18 +1,17 @@
-import requests
-import json
+import contextvars
+import time
 from typing import Dict, List, Optional
-from config import DEEPSEEK_API_KEY, DEEPSEEK_BASE_URL, DEEPSEEK_MODEL
+from .. import metrics
+from ..llm_client import get_llm_pool
 
+# Set while an agent coroutine is being driven by run_blocking
+_blocking_call = contextvars.ContextVar("blocking_call", default=False)
 
-class MafiaBaseAgent:
-    """Base agent class for all Mafia game participants"""
-
-    def __init__(
-        self, name: str, role: str, personality: str, game_state, frontend_callback=None
-    ):
-        system_message = f"""You are {name}, playing the Mafia game as a {role}.
-
-PERSONALITY: {personality}
+# Rules shared word for word by every agent's system prompt. Prompts are laid
+# out from the most to the least shared part (rules, roster, role, name, then
+# the task and the changing game state) so the provider can reuse the cached
+# prefix across agents and calls.
+GAME_RULES = """This is a game of Mafia.
 
 IMPORTANT RULES:
 1. Stay in character at all times
@@ -34,18 +33,53 @@ COMMUNICATION STYLE:
 - Reference previous events and player behavior
 - Make logical deductions based on available information
 
-Current game phase will be provided in each message context."""
+The current game state is provided in each message."""
+
+
+def run_blocking(coro):
+    """Drive an agent coroutine to completion on the calling thread
+
+    Inside run_blocking every amake_decision falls back to the blocking client,
+    so the coroutine never suspends and no event loop is needed. This keeps the
+    sync agent API a thin wrapper around the async one.
+    """
+    token = _blocking_call.set(True)
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    finally:
+        _blocking_call.reset(token)
+
+    coro.close()
+    raise RuntimeError("Agent coroutine suspended while running in blocking mode")
+
+
+class MafiaBaseAgent:
+    """Base agent class for all Mafia game participants"""
+
+    DISCUSSION_FALLBACK = "I think we should be careful about who we trust."
 
-        # Don't use AutoGen's conversation features - we'll handle communication manually
+    def __init__(
+        self,
+        name: str,
+        role: str,
+        personality: str,
+        game_state,
+        frontend_callback=None,
+        llm=None,
+    ):
         self.name = name
-        self.system_message = system_message
+        self._system_message = (-1, "")  # (roster size, text)
 
         self.role = role
         self.personality = personality
         self.game_state = game_state
         self.frontend_callback = frontend_callback
         self.memory = []  # Store important game events and observations
-        self.last_response_time = 0  # Rate limiting
+
+        # Shared, pooled LLM client (leased per game by the controller)
+        self.llm = llm if llm is not None else get_llm_pool().lease("default")
 
     def add_memory(self, event: str):
         """Add important information to agent's memory"""
@@ -54,26 +88,11 @@ Current game phase will be provided in each message context."""
         if len(self.memory) > 20:
             self.memory = self.memory[-20:]
 
-    def get_context_message(self) -> str:
-        """Generate context message with current game state"""
-        stats = self.game_state.get_game_stats()
-        context = f"""
-CURRENT GAME STATE:
-- Phase: {stats['phase']}
-- Day: {stats['day_count']}
-- Players alive: {stats['total_alive']}
-- Players eliminated: {stats['eliminated_count']}
-
-ALIVE PLAYERS: {', '.join(stats['alive_players'])}
-ELIMINATED PLAYERS: {', '.join(stats['eliminated_players'])}
-
-RECENT EVENTS:
-{chr(10).join([f"- {event.get('type', 'event')}: {event}" for event in self.game_state.game_log[-3:]])}
-
-YOUR MEMORIES:
+    def get_memory_context(self) -> str:
+        """Render this agent's recent memories"""
+        return f"""YOUR MEMORIES:
 {chr(10).join([f"- {memory}" for memory in self.memory[-5:]])}
 """
-        return context
 
     def send_message_to_game(
         self, message: str, chat_type: str = "public", targets: List[str] = None
@@ -85,53 +104,124 @@ YOUR MEMORIES:
 
         # Send to frontend if callback is available
         if self.frontend_callback:
-            self.frontend_callback("new_message", chat_entry)
+            self.frontend_callback("new_message", chat_entry.to_dict())
+
+    @property
+    def system_message(self) -> str:
+        """Stable system prompt: shared rules, roster, role, then this agent"""
+        roster = self.game_state.player_names
+        size, message = self._system_message
+        if size != len(roster):
+            message = f"""{GAME_RULES}
+
+PLAYERS IN THIS GAME: {', '.join(roster)}
+
+ROLE: {self.role}
+PERSONALITY: {self.personality}
+
+You are {self.name}, playing the Mafia game as a {self.role}."""
+            self._system_message = (len(roster), message)
+        return message
+
+    def build_messages(self, prompt: str, options: List[str] = None) -> List[Dict]:
+        """Build the chat messages for a decision prompt
+
+        Parts are ordered by how often they change, so the provider can serve
+        the longest possible prefix from its prompt cache: the system prompt
+        never changes, the public state changes once per phase, the task
+        changes per call and the agent's memories go last.
+        """
+        full_prompt = f"{self.game_state.get_public_context()}\n{prompt.strip()}"
+        if options:
+            full_prompt += f"\n\nAVAILABLE OPTIONS: {', '.join(options)}"
+        full_prompt += f"\n\n{self.get_memory_context()}"
 
-    def make_decision(self, prompt: str, options: List[str] = None) -> str:
-        """Make a decision using the LLM"""
-        import time
+        return [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": full_prompt},
+        ]
 
-        # Simple rate limiting - minimum 1 second between responses
-        current_time = time.time()
-        if current_time - self.last_response_time < 1:
-            time.sleep(1)
-        self.last_response_time = current_time
+    def make_decision(
+        self, prompt: str, options: List[str] = None, call_type: str = "decision"
+    ) -> str:
+        """Make a decision using the LLM
 
-        context = self.get_context_message()
-        full_prompt = f"{context}\n\n{prompt}"
+        call_type labels the call in the usage stats and metrics.
+        """
+        messages = self.build_messages(prompt, options)
+        started = time.perf_counter()
 
-        if options:
-            full_prompt += f"\n\nAVAILABLE OPTIONS: {', '.join(options)}"
+        try:
+            # Use the shared client instead of AutoGen's conversation mechanism
+            reply = self.llm.complete(messages, call_type=call_type, role=self.role)
+            self.record_call(call_type, "ok", started)
+            return reply
+
+        except Exception as e:
+            print(f"Error generating response for {self.name}: {e}")
+            self.record_call(call_type, "fallback", started)
+            return "I need more time to think about this."
+
+    async def amake_decision(
+        self, prompt: str, options: List[str] = None, call_type: str = "decision"
+    ) -> str:
+        """Make a decision using the LLM without blocking the event loop"""
+        if _blocking_call.get():
+            return self.make_decision(prompt, options, call_type)
+
+        messages = self.build_messages(prompt, options)
+        started = time.perf_counter()
 
         try:
-            # Use direct API call instead of AutoGen's conversation mechanism
-            import openai
-
-            client = openai.OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_BASE_URL)
-
-            response = client.chat.completions.create(
-                model=DEEPSEEK_MODEL,
-                messages=[
-                    {"role": "system", "content": self.system_message},
-                    {"role": "user", "content": full_prompt},
-                ],
-                temperature=0.7,
-                max_tokens=150,
-                timeout=10,
+            reply = await self.llm.acomplete(
+                messages, call_type=call_type, role=self.role
             )
-
-            return response.choices[0].message.content.strip()
+            self.record_call(call_type, "ok", started)
+            return reply
 
         except Exception as e:
             print(f"Error generating response for {self.name}: {e}")
+            self.record_call(call_type, "fallback", started)
             return "I need more time to think about this."
 
+    def record_call(self, call_type: str, outcome: str, started: float):
+        """Count an LLM decision and its latency in the process metrics"""
+        metrics.LLM_CALLS.inc(
+            agent=self.name, role=self.role, call_type=call_type, outcome=outcome
+        )
+        metrics.LLM_CALL_SECONDS.observe(
+            time.perf_counter() - started, role=self.role, call_type=call_type
+        )
+
     def participate_in_discussion(
         self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
     ) -> str:
         """Participate in group discussion"""
-        context = self.get_context_message()
+        return run_blocking(
+            self.aparticipate_in_discussion(
+                topic, previous_messages, discussion_context
+            )
+        )
+
+    async def aparticipate_in_discussion(
+        self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
+    ) -> str:
+        """Async variant of participate_in_discussion"""
+        try:
+            response = await self.adraft_discussion(
+                topic, previous_messages, discussion_context
+            )
+        except Exception as e:
+            print(f"Error in discussion for {self.name}: {e}")
+            # Fall back to a simple response
+            response = self.DISCUSSION_FALLBACK
+
+        return self.publish_discussion(response)
 
+    async def adraft_discussion(
+        self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
+    ) -> str:
+        """Write this agent's next discussion line without sending it"""
         # Format previous messages (limit to last 3 to avoid context overflow)
         msg_history = "\n".join(
             [
@@ -142,33 +232,28 @@ YOUR MEMORIES:
 
         prompt = f"""You are {self.name}, a {self.role} in a Mafia game.
 
-{discussion_context}
+Respond to the discussion as your character. Keep it short (1 sentence). Be strategic and in character.
 
 DISCUSSION TOPIC: {topic}
-
+{discussion_context}
 RECENT MESSAGES:
-{msg_history}
+{msg_history}"""
 
-Respond to the discussion as your character. Keep it short (1 sentence). Be strategic and in character."""
+        return await self.amake_decision(prompt, call_type="discussion")
 
-        try:
-            response = self.make_decision(prompt)
-            if response and len(response.strip()) > 5:  # Only send meaningful responses
-                self.send_message_to_game(response)
-                return response
-            else:
-                return "I'm thinking about this."
-        except Exception as e:
-            print(f"Error in discussion for {self.name}: {e}")
-            # Return a simple fallback response
-            fallback = f"I think we should be careful about who we trust."
-            self.send_message_to_game(fallback)
-            return fallback
+    def publish_discussion(self, response: str) -> str:
+        """Send a drafted discussion line to the game"""
+        if response and len(response.strip()) > 5:  # Only send meaningful responses
+            self.send_message_to_game(response)
+            return response
+        return "I'm thinking about this."
 
     def cast_vote(self, eligible_players: List[str]) -> str:
         """Cast a vote for elimination"""
-        context = self.get_context_message()
+        return run_blocking(self.acast_vote(eligible_players))
 
+    async def acast_vote(self, eligible_players: List[str]) -> str:
+        """Async variant of cast_vote"""
         prompt = f"""
 You must vote to eliminate one player. Consider:
 - Who has been acting suspiciously?
@@ -181,7 +266,7 @@ ELIGIBLE PLAYERS: {', '.join(eligible_players)}
 Return ONLY the name of the player you want to vote for, nothing else.
 """
 
-        vote = self.make_decision(prompt, eligible_players)
+        vote = await self.amake_decision(prompt, eligible_players, call_type="vote")
 
         # Clean the response to get just the name
         vote = vote.strip().strip('"').strip("'")
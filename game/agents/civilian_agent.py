@@ -1,11 +1,12 @@
 from .base_agent import MafiaBaseAgent
 from typing import List, Dict
+import zlib
 
 
 class CivilianAgent(MafiaBaseAgent):
     """Civilian agent with deduction and voting abilities"""
 
-    def __init__(self, name: str, game_state, frontend_callback=None):
+    def __init__(self, name: str, game_state, frontend_callback=None, llm=None):
         personalities = [
             "You're naturally suspicious and question everything. You like to dig deep into inconsistencies and press people for details.",
             "You're analytical and methodical. You prefer to observe patterns and make logical deductions based on voting behavior and speech patterns.",
@@ -15,7 +16,9 @@ class CivilianAgent(MafiaBaseAgent):
             "You're cautious and defensive. You're worried about being eliminated and focus on proving your own innocence while finding real threats.",
         ]
 
-        personality = personalities[hash(name) % len(personalities)]
+        # crc32 rather than hash(), which is salted per process, so a name gets
+        # the same personality in every run (and in replays)
+        personality = personalities[zlib.crc32(name.encode()) % len(personalities)]
 
         super().__init__(
             name=name,
@@ -23,6 +26,7 @@ class CivilianAgent(MafiaBaseAgent):
             personality=personality,
             game_state=game_state,
             frontend_callback=frontend_callback,
+            llm=llm,
         )
 
         self.suspicion_levels = {}  # player -> suspicion score (1-10)
@@ -59,7 +63,7 @@ INNOCENT INDICATORS (low score):
 Rate 1-10 (10 = very suspicious). Return ONLY the number.
 """
 
-        score = self.make_decision(prompt)
+        score = self.make_decision(prompt, call_type="analysis")
         try:
             suspicion_score = int(score.strip())
             suspicion_score = max(1, min(10, suspicion_score))  # Clamp to 1-10
@@ -108,10 +112,8 @@ Rate 1-10 (10 = very suspicious). Return ONLY the number.
         self.trust_levels[player] = max(1, self.trust_levels.get(player, 5) - 3)
         self.add_memory(f"Broke alliance with {player}: {reason}")
 
-    def cast_vote(self, eligible_players: List[str]) -> str:
+    async def acast_vote(self, eligible_players: List[str]) -> str:
         """Cast vote based on suspicion analysis"""
-        context = self.get_context_message()
-
         # Get most suspicious eligible players
         eligible_suspicions = {
             p: self.suspicion_levels.get(p, 5)
@@ -131,7 +133,7 @@ SUSPICION LEVELS:
 
 MOST SUSPICIOUS: {most_suspicious[0]} (score: {most_suspicious[1]})
 
-TRUSTED ALLIES: {', '.join(self.alliances)}
+TRUSTED ALLIES: {', '.join(sorted(self.alliances))}
 
 Your goal is to eliminate mafia members. Consider:
 1. Your suspicion analysis
@@ -142,7 +144,7 @@ Your goal is to eliminate mafia members. Consider:
 Who should you vote for? Return ONLY the name.
 """
 
-        vote = self.make_decision(prompt, eligible_players)
+        vote = await self.amake_decision(prompt, eligible_players, call_type="vote")
         vote = vote.strip().strip('"').strip("'")
 
         if vote not in eligible_players:
@@ -154,12 +156,10 @@ Who should you vote for? Return ONLY the name.
         )
         return vote
 
-    def participate_in_discussion(
+    async def adraft_discussion(
         self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
     ) -> str:
-        """Participate in discussion with civilian perspective"""
-        context = self.get_context_message()
-
+        """Draft a discussion line with civilian perspective"""
         msg_history = "\n".join(
             [f"{msg['sender']}: {msg['message']}" for msg in previous_messages[-8:]]
         )
@@ -168,18 +168,6 @@ Who should you vote for? Return ONLY the name.
         trusted_players = self.identify_trusted_players()
 
         prompt = f"""
-{discussion_context}
-
-DISCUSSION: {topic}
-
-RECENT CONVERSATION:
-{msg_history}
-
-YOUR ANALYSIS:
-- Most suspicious: {', '.join(suspicious_players[:3])}
-- Most trusted: {', '.join(trusted_players[:3])}
-- Current alliances: {', '.join(self.alliances)}
-
 As a civilian, contribute to finding mafia:
 1. Share your observations about suspicious behavior
 2. Ask probing questions to reveal inconsistencies
@@ -188,11 +176,19 @@ As a civilian, contribute to finding mafia:
 5. Organize civilian strategy
 
 Be true to your personality. Keep under 100 words.
+
+DISCUSSION: {topic}
+{discussion_context}
+RECENT CONVERSATION:
+{msg_history}
+
+YOUR ANALYSIS:
+- Most suspicious: {', '.join(suspicious_players[:3])}
+- Most trusted: {', '.join(trusted_players[:3])}
+- Current alliances: {', '.join(sorted(self.alliances))}
 """
 
-        response = self.make_decision(prompt)
-        self.send_message_to_game(response)
-        return response
+        return await self.amake_decision(prompt, call_type="discussion")
 
     def make_accusation(self, target: str) -> str:
         """Make a formal accusation against a suspected mafia"""
@@ -222,7 +218,7 @@ Make a compelling accusation that:
 Be passionate but logical. Keep under 150 words.
 """
 
-        accusation = self.make_decision(prompt)
+        accusation = self.make_decision(prompt, call_type="statement")
         self.send_message_to_game(accusation)
         self.add_memory(f"Formally accused {target} of being mafia")
         return accusation
@@ -243,7 +239,7 @@ Be genuine and defensive as a real innocent person would be.
 Keep under 100 words.
 """
 
-        defense = self.make_decision(prompt)
+        defense = self.make_decision(prompt, call_type="statement")
         self.send_message_to_game(defense)
         self.add_memory(f"Defended against accusation from {accuser}")
         return defense
@@ -270,7 +266,7 @@ Rally the civilians with a strategic plan:
 Be a natural leader organizing the town. Keep under 120 words.
 """
 
-        strategy = self.make_decision(prompt)
+        strategy = self.make_decision(prompt, call_type="strategy")
         self.send_message_to_game(strategy)
         self.add_memory("Attempted to organize civilian strategy")
         return strategy
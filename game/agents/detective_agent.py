@@ -1,11 +1,11 @@
-from .base_agent import MafiaBaseAgent
+from .base_agent import MafiaBaseAgent, run_blocking
 from typing import List, Dict, Optional
 
 
 class DetectiveAgent(MafiaBaseAgent):
     """Detective agent with investigation abilities"""
 
-    def __init__(self, name: str, game_state, frontend_callback=None):
+    def __init__(self, name: str, game_state, frontend_callback=None, llm=None):
         personality = """You are highly analytical and observant. You take mental notes of everyone's behavior, 
         voting patterns, and suspicious activities. You're cautious about revealing your role but determined 
         to find the mafia. You ask probing questions and look for inconsistencies in people's stories."""
@@ -16,6 +16,7 @@ class DetectiveAgent(MafiaBaseAgent):
             personality=personality,
             game_state=game_state,
             frontend_callback=frontend_callback,
+            llm=llm,
         )
 
         self.investigations = {}  # player -> result (mafia/civilian)
@@ -26,8 +27,10 @@ class DetectiveAgent(MafiaBaseAgent):
 
     def choose_investigation_target(self, eligible_targets: List[str]) -> str:
         """Choose who to investigate tonight"""
-        context = self.get_context_message()
+        return run_blocking(self.achoose_investigation_target(eligible_targets))
 
+    async def achoose_investigation_target(self, eligible_targets: List[str]) -> str:
+        """Async variant of choose_investigation_target"""
         # Remove already investigated players
         uninvestigated = [
             t
@@ -50,13 +53,15 @@ PAST INVESTIGATIONS:
 {chr(10).join([f"- {player}: {result}" for player, result in self.investigations.items()])}
 
 CURRENT SUSPICIONS:
-- Most suspicious: {', '.join(list(self.suspected_mafia)[:3])}
-- Likely civilians: {', '.join(list(self.trusted_civilians)[:3])}
+- Most suspicious: {', '.join(sorted(self.suspected_mafia)[:3])}
+- Likely civilians: {', '.join(sorted(self.trusted_civilians)[:3])}
 
 Who should you investigate? Return ONLY the name.
 """
 
-        target = self.make_decision(prompt, uninvestigated)
+        target = await self.amake_decision(
+            prompt, uninvestigated, call_type="night_action"
+        )
         target = target.strip().strip('"').strip("'")
 
         if target not in uninvestigated:
@@ -77,8 +82,6 @@ Who should you investigate? Return ONLY the name.
 
     def decide_revelation_strategy(self) -> Dict:
         """Decide whether and how to reveal investigation results"""
-        context = self.get_context_message()
-
         known_mafia = [
             p for p, result in self.investigations.items() if result == "mafia"
         ]
@@ -108,7 +111,7 @@ Consider:
 What strategy should you use? Return: WAIT, REVEAL_MAFIA, REVEAL_ROLE, or HINT
 """
 
-        strategy = self.make_decision(prompt)
+        strategy = self.make_decision(prompt, call_type="strategy")
         strategy = strategy.strip().upper()
 
         if strategy not in ["WAIT", "REVEAL_MAFIA", "REVEAL_ROLE", "HINT"]:
@@ -136,7 +139,7 @@ Make a compelling accusation that:
 Be persuasive but not too aggressive. Keep it under 100 words.
 """
 
-        accusation = self.make_decision(prompt)
+        accusation = self.make_decision(prompt, call_type="statement")
         self.send_message_to_game(accusation)
         self.add_memory(f"Publicly accused {target} of being mafia")
         return accusation
@@ -160,7 +163,7 @@ CONFIRMED CIVILIANS: {', '.join(known_civilians)}
 Announce your role and findings dramatically but clearly. Rally the civilians to vote for the confirmed mafia.
 """
 
-        revelation = self.make_decision(prompt)
+        revelation = self.make_decision(prompt, call_type="statement")
         self.revealed_role = True
         self.send_message_to_game(revelation)
         self.add_memory("Revealed my detective role to everyone")
@@ -183,14 +186,12 @@ Look for:
 Share your analysis without revealing you're the detective.
 """
 
-        analysis = self.make_decision(prompt)
+        analysis = self.make_decision(prompt, call_type="analysis")
         self.send_message_to_game(analysis)
         return analysis
 
-    def cast_vote(self, eligible_players: List[str]) -> str:
+    async def acast_vote(self, eligible_players: List[str]) -> str:
         """Cast vote based on investigation knowledge"""
-        context = self.get_context_message()
-
         # Prioritize known mafia
         known_mafia = [
             p for p in eligible_players if self.investigations.get(p) == "mafia"
@@ -212,7 +213,7 @@ Your investigations: {', '.join([f"{p}:{r}" for p, r in self.investigations.item
 Who should you vote for? Return ONLY the name.
 """
 
-        vote = self.make_decision(prompt, eligible_players)
+        vote = await self.amake_decision(prompt, eligible_players, call_type="vote")
         vote = vote.strip().strip('"').strip("'")
 
         if vote not in eligible_players:
@@ -222,29 +223,22 @@ Who should you vote for? Return ONLY the name.
         self.add_memory(f"Voted for {vote} based on detective knowledge")
         return vote
 
-    def participate_in_discussion(
+    async def adraft_discussion(
         self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
     ) -> str:
-        """Participate in discussion with detective perspective"""
-        context = self.get_context_message()
+        """Draft a discussion line with detective perspective"""
+        known_mafia = [
+            p for p, result in self.investigations.items() if result == "mafia"
+        ]
+        known_civilians = [
+            p for p, result in self.investigations.items() if result == "civilian"
+        ]
 
         msg_history = "\n".join(
             [f"{msg['sender']}: {msg['message']}" for msg in previous_messages[-8:]]
         )
 
         prompt = f"""
-{discussion_context}
-
-DISCUSSION: {topic}
-
-RECENT CONVERSATION:
-{msg_history}
-
-YOUR INVESTIGATION FINDINGS:
-- Known mafia: {', '.join(self.known_mafia)}
-- Known civilians: {', '.join(self.known_civilians)}
-- Investigation targets: {', '.join(self.investigation_targets[-3:])}
-
 As a detective, contribute strategically:
 1. Share relevant investigation findings (without revealing your role)
 2. Ask questions that might reveal inconsistencies
@@ -253,8 +247,16 @@ As a detective, contribute strategically:
 5. Protect players you know are innocent
 
 Be careful not to reveal your role. Act like a concerned civilian.
+
+DISCUSSION: {topic}
+{discussion_context}
+RECENT CONVERSATION:
+{msg_history}
+
+YOUR INVESTIGATION FINDINGS:
+- Known mafia: {', '.join(known_mafia)}
+- Known civilians: {', '.join(known_civilians)}
+- Investigation targets: {', '.join(list(self.investigations)[-3:])}
 """
 
-        response = self.make_decision(prompt)
-        self.send_message_to_game(response)
-        return response
+        return await self.amake_decision(prompt, call_type="discussion")
@@ -1,11 +1,11 @@
-from .base_agent import MafiaBaseAgent
+from .base_agent import MafiaBaseAgent, run_blocking
 from typing import List, Dict
 
 
 class DoctorAgent(MafiaBaseAgent):
     """Doctor agent with healing/protection abilities"""
 
-    def __init__(self, name: str, game_state, frontend_callback=None):
+    def __init__(self, name: str, game_state, frontend_callback=None, llm=None):
         personality = """You are protective and strategic, focused on saving innocent lives. 
         You're naturally helpful and caring, often showing concern for other players' safety. 
         You think carefully about who might be targeted by the mafia and try to stay hidden 
@@ -18,6 +18,7 @@ class DoctorAgent(MafiaBaseAgent):
             personality=personality,
             game_state=game_state,
             frontend_callback=frontend_callback,
+            llm=llm,
         )
 
         self.protection_history = []
@@ -27,8 +28,10 @@ class DoctorAgent(MafiaBaseAgent):
 
     def choose_protection_target(self, eligible_targets: List[str]) -> str:
         """Choose who to protect tonight"""
-        context = self.get_context_message()
+        return run_blocking(self.achoose_protection_target(eligible_targets))
 
+    async def achoose_protection_target(self, eligible_targets: List[str]) -> str:
+        """Async variant of choose_protection_target"""
         # Remove self from targets (can't protect yourself in most variants)
         targets = [t for t in eligible_targets if t != self.name]
 
@@ -48,13 +51,13 @@ PREVIOUS PROTECTIONS: {', '.join(self.protection_history[-3:])}
 SUSPECTED ROLES:
 {chr(10).join([f"- {player}: {role}" for player, role in self.suspected_roles.items()])}
 
-VALUABLE CIVILIANS: {', '.join(self.valuable_civilians)}
+VALUABLE CIVILIANS: {', '.join(sorted(self.valuable_civilians))}
 
 Who needs protection most? Consider who mafia might target.
 Return ONLY the name.
 """
 
-        target = self.make_decision(prompt, targets)
+        target = await self.amake_decision(prompt, targets, call_type="night_action")
         target = target.strip().strip('"').strip("'")
 
         if target not in targets:
@@ -86,14 +89,12 @@ LESS LIKELY TARGETS:
 Based on recent discussions and events, who do you think is most at risk?
 """
 
-        analysis = self.make_decision(prompt)
+        analysis = self.make_decision(prompt, call_type="analysis")
         self.add_memory(f"Threat analysis: {analysis}")
         return analysis
 
     def decide_role_revelation(self) -> Dict:
         """Decide whether to reveal doctor role"""
-        context = self.get_context_message()
-
         prompt = f"""
 DOCTOR REVELATION DECISION
 
@@ -111,7 +112,7 @@ Consider staying hidden if:
 Should you reveal your role? Return: REVEAL or STAY_HIDDEN
 """
 
-        decision = self.make_decision(prompt)
+        decision = self.make_decision(prompt, call_type="strategy")
         decision = decision.strip().upper()
 
         if decision not in ["REVEAL", "STAY_HIDDEN"]:
@@ -137,7 +138,7 @@ Announce your role convincingly:
 Be dramatic but credible. Keep under 150 words.
 """
 
-        revelation = self.make_decision(prompt)
+        revelation = self.make_decision(prompt, call_type="statement")
         self.revealed_role = True
         self.send_message_to_game(revelation)
         self.add_memory("Revealed my doctor role to everyone")
@@ -159,14 +160,12 @@ As the Doctor, you should:
 Support the detective without fully revealing yourself unless necessary.
 """
 
-        support = self.make_decision(prompt)
+        support = self.make_decision(prompt, call_type="statement")
         self.send_message_to_game(support)
         return support
 
-    def cast_vote(self, eligible_players: List[str]) -> str:
+    async def acast_vote(self, eligible_players: List[str]) -> str:
         """Cast vote to protect civilians and eliminate mafia"""
-        context = self.get_context_message()
-
         prompt = f"""
 DOCTOR VOTING DECISION
 
@@ -184,7 +183,7 @@ Your goal is protecting innocent lives. Who should be eliminated?
 Return ONLY the name.
 """
 
-        vote = self.make_decision(prompt, eligible_players)
+        vote = await self.amake_decision(prompt, eligible_players, call_type="vote")
         vote = vote.strip().strip('"').strip("'")
 
         if vote not in eligible_players:
@@ -193,28 +192,15 @@ Return ONLY the name.
         self.add_memory(f"Voted to eliminate {vote}")
         return vote
 
-    def participate_in_discussion(
+    async def adraft_discussion(
         self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
     ) -> str:
-        """Participate in discussion with doctor perspective"""
-        context = self.get_context_message()
-
+        """Draft a discussion line with doctor perspective"""
         msg_history = "\n".join(
             [f"{msg['sender']}: {msg['message']}" for msg in previous_messages[-8:]]
         )
 
         prompt = f"""
-{discussion_context}
-
-DISCUSSION: {topic}
-
-RECENT CONVERSATION:
-{msg_history}
-
-YOUR PROTECTION HISTORY:
-- Recently protected: {', '.join(self.recent_protections[-3:])}
-- Protection strategy: {self.protection_strategy}
-
 As a doctor, contribute to finding mafia:
 1. Share observations about suspicious behavior
 2. Ask questions to help identify threats
@@ -223,11 +209,18 @@ As a doctor, contribute to finding mafia:
 5. Help organize civilian strategy
 
 Be careful not to reveal your role. Act like a concerned civilian.
+
+DISCUSSION: {topic}
+{discussion_context}
+RECENT CONVERSATION:
+{msg_history}
+
+YOUR PROTECTION HISTORY:
+- Recently protected: {', '.join(self.protection_history[-3:])}
+- Valuable civilians: {', '.join(sorted(self.valuable_civilians))}
 """
 
-        response = self.make_decision(prompt)
-        self.send_message_to_game(response)
-        return response
+        return await self.amake_decision(prompt, call_type="discussion")
 
     def assess_player_role(self, player: str, behavior: str) -> str:
         """Assess what role another player might have"""
@@ -245,7 +238,7 @@ Based on their actions, voting, and discussion style, what role might they have?
 What role do you suspect {player} has? Return: DETECTIVE, DOCTOR, CIVILIAN, or MAFIA
 """
 
-        assessment = self.make_decision(prompt)
+        assessment = self.make_decision(prompt, call_type="analysis")
         assessment = assessment.strip().upper()
 
         if assessment in ["DETECTIVE", "DOCTOR", "CIVILIAN", "MAFIA"]:
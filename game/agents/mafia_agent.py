@@ -1,18 +1,22 @@
-from .base_agent import MafiaBaseAgent
+from .base_agent import MafiaBaseAgent, run_blocking
 from typing import List, Dict
+import re
+import zlib
 
 
 class MafiaAgent(MafiaBaseAgent):
     """Mafia agent with deception and coordination capabilities"""
 
-    def __init__(self, name: str, game_state, frontend_callback=None):
+    def __init__(self, name: str, game_state, frontend_callback=None, llm=None):
         personalities = [
             "Charming and persuasive, skilled at misdirection. You're confident and like to lead discussions.",
             "Quiet and analytical, you prefer to observe and plant seeds of doubt. You're subtle in your manipulation.",
             "Aggressive and accusatory, you deflect suspicion by being highly suspicious of others. You're bold and confrontational.",
         ]
 
-        personality = personalities[hash(name) % len(personalities)]
+        # crc32 rather than hash(), which is salted per process, so a name gets
+        # the same personality in every run (and in replays)
+        personality = personalities[zlib.crc32(name.encode()) % len(personalities)]
 
         super().__init__(
             name=name,
@@ -20,6 +24,7 @@ class MafiaAgent(MafiaBaseAgent):
             personality=personality,
             game_state=game_state,
             frontend_callback=frontend_callback,
+            llm=llm,
         )
 
         self.mafia_teammates = set()
@@ -36,14 +41,16 @@ class MafiaAgent(MafiaBaseAgent):
     def coordinate_with_mafia(self, message: str) -> str:
         """Send a private message to other mafia members"""
         self.send_message_to_game(
-            message=message, chat_type="mafia", targets=list(self.mafia_teammates)
+            message=message, chat_type="mafia", targets=sorted(self.mafia_teammates)
         )
         return message
 
     def choose_night_target(self, eligible_targets: List[str]) -> str:
         """Choose who to eliminate during the night"""
-        context = self.get_context_message()
+        return run_blocking(self.achoose_night_target(eligible_targets))
 
+    async def achoose_night_target(self, eligible_targets: List[str]) -> str:
+        """Async variant of choose_night_target"""
         # Remove mafia members from targets
         safe_targets = [t for t in eligible_targets if t not in self.mafia_teammates]
 
@@ -63,7 +70,9 @@ PAST TARGETS CONSIDERED: {', '.join(self.targets_considered[-3:])}
 Who poses the biggest threat to the mafia? Return ONLY the name of your target.
 """
 
-        target = self.make_decision(prompt, safe_targets)
+        target = await self.amake_decision(
+            prompt, safe_targets, call_type="night_action"
+        )
         target = target.strip().strip('"').strip("'")
 
         if target not in safe_targets:
@@ -74,13 +83,75 @@ Who poses the biggest threat to the mafia? Return ONLY the name of your target.
 
         return target
 
+    def choose_team_target(
+        self, eligible_targets: List[str], team: List["MafiaAgent"]
+    ) -> Dict:
+        """Choose the team's night target in a single decision"""
+        return run_blocking(self.achoose_team_target(eligible_targets, team))
+
+    async def achoose_team_target(
+        self, eligible_targets: List[str], team: List["MafiaAgent"]
+    ) -> Dict:
+        """Async variant of choose_team_target"""
+        safe_targets = [t for t in eligible_targets if t not in self.mafia_teammates]
+        team_names = [member.name for member in team]
+
+        team_notes = []
+        for member in team:
+            notes = member.memory[-3:] + [
+                f"Considered targeting {t}" for t in member.targets_considered[-2:]
+            ]
+            team_notes.append(f"{member.name}: {'; '.join(notes) or 'no notes'}")
+
+        prompt = f"""
+MAFIA TEAM DECISION
+You are speaking for the whole mafia team: {', '.join(team_names)}
+
+TEAM NOTES:
+{chr(10).join([f"- {note}" for note in team_notes])}
+
+STRATEGIC PRIORITIES:
+1. Eliminate threatening players (Detective, influential civilians)
+2. Remove players who are suspicious of any of the team
+3. Avoid patterns that could expose the mafia
+
+AVAILABLE TARGETS: {', '.join(safe_targets)}
+
+Agree on ONE target for the team tonight. Respond in exactly this format:
+TARGET: <name>
+RATIONALE: <one short sentence for your teammates>
+"""
+
+        response = await self.amake_decision(
+            prompt, safe_targets, call_type="night_action"
+        )
+
+        target_match = re.search(r"TARGET:\s*([^\n]+)", response)
+        rationale_match = re.search(r"RATIONALE:\s*([^\n]+)", response)
+        target = (target_match.group(1) if target_match else response).strip()
+        target = target.strip().strip('"').strip("'").strip("*").strip()
+        rationale = rationale_match.group(1).strip() if rationale_match else ""
+
+        if target not in safe_targets:
+            target = safe_targets[0] if safe_targets else ""
+
+        for member in team:
+            member.targets_considered.append(target)
+            member.add_memory(f"Team agreed to target {target} for elimination")
+
+        return {"target": target, "rationale": rationale}
+
     def discuss_mafia_strategy(self, current_situation: str) -> str:
         """Discuss strategy with other mafia members"""
+        return run_blocking(self.adiscuss_mafia_strategy(current_situation))
+
+    async def adiscuss_mafia_strategy(self, current_situation: str) -> str:
+        """Async variant of discuss_mafia_strategy"""
         prompt = f"""
 PRIVATE MAFIA DISCUSSION
 Current situation: {current_situation}
 
-Your teammates: {', '.join(self.mafia_teammates)}
+Your teammates: {', '.join(sorted(self.mafia_teammates))}
 
 Discuss strategy with your mafia team. Consider:
 - Who should we target tonight?
@@ -91,13 +162,11 @@ Discuss strategy with your mafia team. Consider:
 Keep it concise and strategic. This is PRIVATE communication only other mafia can see.
 """
 
-        strategy_message = self.make_decision(prompt)
+        strategy_message = await self.amake_decision(prompt, call_type="mafia_chat")
         return self.coordinate_with_mafia(strategy_message)
 
     def respond_to_accusation(self, accuser: str, accusation: str) -> str:
         """Respond when accused of being mafia"""
-        context = self.get_context_message()
-
         prompt = f"""
 {accuser} just accused you: "{accusation}"
 
@@ -111,15 +180,13 @@ You're mafia but must defend yourself convincingly. Strategies:
 Respond naturally and defensively as an innocent person would. Don't overreact.
 """
 
-        response = self.make_decision(prompt)
+        response = self.make_decision(prompt, call_type="statement")
         self.add_memory(f"Was accused by {accuser}, defended myself")
         self.send_message_to_game(response)
         return response
 
-    def cast_vote(self, eligible_players: List[str]) -> str:
+    async def acast_vote(self, eligible_players: List[str]) -> str:
         """Cast vote strategically as mafia"""
-        context = self.get_context_message()
-
         # Remove mafia members from consideration
         safe_votes = [
             p
@@ -138,13 +205,13 @@ PRIORITIES:
 4. Never vote for mafia teammates unless absolutely necessary
 
 ELIGIBLE PLAYERS: {', '.join(safe_votes)}
-YOUR TEAMMATES: {', '.join(self.mafia_teammates)}
+YOUR TEAMMATES: {', '.join(sorted(self.mafia_teammates))}
 
 Current vote counts and suspicions should guide your choice.
 Return ONLY the name of who you're voting for.
 """
 
-        vote = self.make_decision(prompt, safe_votes)
+        vote = await self.amake_decision(prompt, safe_votes, call_type="vote")
         vote = vote.strip().strip('"').strip("'")
 
         if vote not in safe_votes:
@@ -157,8 +224,6 @@ Return ONLY the name of who you're voting for.
         self, topic: str, previous_messages: List[Dict], discussion_context: str = ""
     ) -> str:
         """Participate in discussion while blending in as a civilian"""
-        context = self.get_context_message()
-
         msg_history = "\n".join(
             [f"{msg['sender']}: {msg['message']}" for msg in previous_messages[-8:]]
         )
@@ -181,6 +246,6 @@ You're mafia but must appear as a helpful civilian. Strategies:
 Act like a concerned civilian trying to find mafia. Be helpful but not too eager.
 """
 
-        response = self.make_decision(prompt)
+        response = self.make_decision(prompt, call_type="discussion")
         self.send_message_to_game(response)
         return response
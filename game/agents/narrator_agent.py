@@ -4,7 +4,7 @@ from typing import List, Dict, Optional
 class NarratorAgent(MafiaBaseAgent):
     """Narrator agent that facilitates the game and provides updates"""
     
-    def __init__(self, name: str, game_state, frontend_callback=None):
+    def __init__(self, name: str, game_state, frontend_callback=None, llm=None):
         personality = """You are the omniscient game narrator. You facilitate all phases of the game, 
         announce events dramatically, and provide clear instructions. You maintain the game's atmosphere 
         with engaging storytelling while keeping players informed of the current state and rules."""
@@ -14,7 +14,8 @@ class NarratorAgent(MafiaBaseAgent):
             role="narrator", 
             personality=personality,
             game_state=game_state,
-            frontend_callback=frontend_callback
+            frontend_callback=frontend_callback,
+            llm=llm
         )
     
     def announce_game_start(self, players: List[str]) -> str:
@@ -156,9 +157,24 @@ The truth is revealed... but is the village safer?
         self.send_message_to_game(message)
         return message
     
-    def announce_game_end(self, winner: str, final_stats: Dict) -> str:
-        """Announce the end of the game"""
-        if winner == "mafia":
+    def announce_game_end(self, winner: Optional[str], final_stats: Dict) -> str:
+        """Announce the end of the game (winner is None if it was called off)"""
+        if winner is None:
+            message = f"""
+⏱️ **NO WINNER** ⏱️
+
+The game has run out of days before either side prevailed.
+
+**STILL STANDING:** {', '.join(final_stats['alive_players'])}
+
+**GAME SUMMARY:**
+- Days survived: {final_stats['day_count']}
+- Total eliminations: {final_stats['eliminated_count']}
+- Final survivors: {final_stats['total_alive']}
+
+The village's fate remains a mystery... 🌫️
+"""
+        elif winner == "mafia":
             message = f"""
 🔴 **MAFIA VICTORY!** 🔴
 
@@ -222,14 +238,19 @@ The investigation continues...
         )
         
         if self.frontend_callback:
-            self.frontend_callback("new_message", chat_entry)
+            self.frontend_callback("new_message", chat_entry.to_dict())
     
-    def facilitate_discussion(self, topic: str, duration: int = 120) -> str:
+    def facilitate_discussion(self, topic: str, duration: Optional[int] = 120) -> str:
         """Facilitate a group discussion"""
+        time_limit = (
+            f"You have {duration} seconds to discuss."
+            if duration is not None
+            else "Speak in turn until the discussion closes."
+        )
         message = f"""
 💬 **DISCUSSION TIME: {topic}** 💬
 
-You have {duration} seconds to discuss.
+{time_limit}
 
 Share your thoughts, suspicions, and evidence.
 Listen carefully to others and watch for inconsistencies.
@@ -0,0 +1,299 @@
+"""
+Bounded chat storage for a game
+
+Messages are slotted ChatMessage records with interned sender, phase and
+channel strings and float timestamps. The newest `capacity` messages live in
+a fixed-size ring; older ones are appended to a JSONL spill file and read
+back lazily, so a game's memory stays flat however long it runs. The store
+behaves like the list it replaces: len() counts every message ever added, and
+indexing or slicing (including negative indexes) works across ring and file.
+
+Secondary indexes by sender, day, channel and recipient are kept on insert,
+so queries such as "last K public messages visible to X on day D" walk only
+the matching messages instead of the whole history. They cover the messages
+still in memory.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from collections import deque
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+# Channel every player can read; other channels reach only sender and targets
+PUBLIC_CHANNEL = "public"
+
+
+class ChatMessage:
+    """One chat message"""
+
+    __slots__ = (
+        "seq",
+        "sender",
+        "message",
+        "chat_type",
+        "targets",
+        "timestamp",
+        "phase",
+        "day",
+        "mentions",
+        "accusatory",
+    )
+
+    def __init__(
+        self,
+        seq: int,
+        sender: str,
+        message: str,
+        chat_type: str,
+        targets: Sequence[str],
+        timestamp: float,
+        phase: str,
+        day: int,
+        mentions: Sequence[str] = (),
+        accusatory: bool = False,
+    ):
+        self.seq = seq
+        self.sender = sys.intern(sender)
+        self.message = message
+        self.chat_type = sys.intern(chat_type)
+        self.targets = tuple(sys.intern(t) for t in targets)
+        self.timestamp = timestamp  # seconds since the epoch
+        self.phase = sys.intern(phase)
+        self.day = day
+        # Tagged once on insert: players named in the text, and whether it
+        # reads as an accusation
+        self.mentions = frozenset(mentions)
+        self.accusatory = accusatory
+
+    # Dict-style access, so messages read like the old chat entry dicts
+    def __getitem__(self, field: str):
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default=None):
+        return getattr(self, field, default) if field in self.__slots__ else default
+
+    def visible_to(self, viewer: str) -> bool:
+        """Check if a player may read this message"""
+        return (
+            self.chat_type == PUBLIC_CHANNEL
+            or self.sender == viewer
+            or viewer in self.targets
+        )
+
+    def to_dict(self) -> Dict:
+        """Serializable form sent to the frontend"""
+        return {
+            "sender": self.sender,
+            "message": self.message,
+            "chat_type": self.chat_type,
+            "targets": list(self.targets),
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "phase": self.phase,
+            "day": self.day,
+        }
+
+    def to_row(self) -> List:
+        """Compact form written to the spill file"""
+        return [
+            self.seq,
+            self.sender,
+            self.message,
+            self.chat_type,
+            list(self.targets),
+            self.timestamp,
+            self.phase,
+            self.day,
+            sorted(self.mentions),
+            self.accusatory,
+        ]
+
+    @classmethod
+    def from_row(cls, row: List) -> "ChatMessage":
+        return cls(*row)
+
+    def __repr__(self) -> str:
+        return f"ChatMessage({self.seq}, {self.sender}: {self.message[:40]!r})"
+
+
+class ChatStore:
+    """Ring buffer of recent messages with older ones spilled to disk"""
+
+    def __init__(self, capacity: int = 1000, spill_dir: Optional[str] = None):
+        self.capacity = capacity
+        self.spill_dir = spill_dir
+
+        self._ring: List[Optional[ChatMessage]] = [None] * capacity
+        self._count = 0  # messages ever added
+        self._spill_path: Optional[str] = None
+        self._spill_file = None
+
+        # Message indexes (ascending) per sender, day, channel, and per reader
+        # (sender or target) of a non-public message
+        self._by_sender: Dict[str, Deque[int]] = {}
+        self._by_day: Dict[int, Deque[int]] = {}
+        self._by_channel: Dict[str, Deque[int]] = {}
+        self._by_recipient: Dict[str, Deque[int]] = {}
+
+    @property
+    def first_in_memory(self) -> int:
+        """Index of the oldest message still in the ring"""
+        return max(0, self._count - self.capacity)
+
+    def append(self, message: ChatMessage) -> ChatMessage:
+        """Add a message, spilling the oldest one if the ring is full"""
+        slot = self._count % self.capacity
+        evicted = self._ring[slot]
+        if evicted is not None:
+            self._spill(evicted)
+        self._ring[slot] = message
+        index = self._count
+        self._count += 1
+
+        self._index(self._by_sender, message.sender, index)
+        self._index(self._by_day, message.day, index)
+        self._index(self._by_channel, message.chat_type, index)
+        if message.chat_type != PUBLIC_CHANNEL:
+            for reader in {message.sender, *message.targets}:
+                self._index(self._by_recipient, reader, index)
+        return message
+
+    def _index(self, index: Dict, key, position: int):
+        positions = index.get(key)
+        if positions is None:
+            # Entries older than the ring are never read, so keep at most
+            # as many as the ring holds
+            positions = index[key] = deque(maxlen=self.capacity)
+        positions.append(position)
+
+    def query(
+        self,
+        limit: Optional[int] = None,
+        viewer: Optional[str] = None,
+        day: Optional[int] = None,
+        phase: Optional[str] = None,
+        channel: Optional[str] = None,
+        sender: Optional[str] = None,
+    ) -> List[ChatMessage]:
+        """Get the last `limit` in-memory messages matching every filter
+
+        `viewer` keeps only the messages that player may read. Messages come
+        back oldest first, like a slice of the history.
+        """
+        # Walk the most selective index from the newest message backwards
+        if sender is not None:
+            candidates = reversed(self._by_sender.get(sender, ()))
+        elif day is not None:
+            candidates = reversed(self._by_day.get(day, ()))
+        elif channel is not None:
+            candidates = reversed(self._by_channel.get(channel, ()))
+        elif viewer is not None:
+            candidates = merge(
+                reversed(self._by_channel.get(PUBLIC_CHANNEL, ())),
+                reversed(self._by_recipient.get(viewer, ())),
+                reverse=True,
+            )
+        else:
+            candidates = reversed(range(self._count))
+
+        boundary = self.first_in_memory
+        found: List[ChatMessage] = []
+        for index in candidates:
+            if index < boundary or (limit is not None and len(found) >= limit):
+                break
+            message = self._from_ring(index)
+            if (
+                (day is None or message.day == day)
+                and (phase is None or message.phase == phase)
+                and (channel is None or message.chat_type == channel)
+                and (sender is None or message.sender == sender)
+                and (viewer is None or message.visible_to(viewer))
+            ):
+                found.append(message)
+        found.reverse()
+        return found
+
+    def _spill(self, message: ChatMessage):
+        if self._spill_file is None:
+            fd, self._spill_path = tempfile.mkstemp(
+                prefix="mafia-chat-", suffix=".jsonl", dir=self.spill_dir
+            )
+            self._spill_file = os.fdopen(fd, "a+", encoding="utf-8")
+        self._spill_file.write(json.dumps(message.to_row()) + "\n")
+
+    def iter_spilled(self, start: int = 0) -> Iterator[ChatMessage]:
+        """Lazily read spilled messages from index `start` on"""
+        if start >= self.first_in_memory:
+            return
+        if self._spill_path is None:
+            raise IndexError("spilled chat messages were deleted by close()")
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        with open(self._spill_path, encoding="utf-8") as spill:
+            for line in islice(spill, start, self.first_in_memory):
+                yield ChatMessage.from_row(json.loads(line))
+
+    def _from_ring(self, index: int) -> ChatMessage:
+        return self._ring[index % self.capacity]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        yield from self.iter_spilled()
+        for index in range(self.first_in_memory, self._count):
+            yield self._from_ring(index)
+
+    def __getitem__(
+        self, key: Union[int, slice]
+    ) -> Union[ChatMessage, List[ChatMessage]]:
+        if isinstance(key, slice):
+            positions = range(*key.indices(self._count))
+            if not positions:
+                return []
+            if positions.step == 1:
+                return self._range(positions.start, positions.stop)
+            # Read the covering window once, then step through it
+            first, last = min(positions), max(positions)
+            window = self._range(first, last + 1)
+            return window[positions[0] - first :: positions.step]
+
+        index = key + self._count if key < 0 else key
+        if not 0 <= index < self._count:
+            raise IndexError("chat index out of range")
+        if index >= self.first_in_memory:
+            return self._from_ring(index)
+        return next(self.iter_spilled(index))
+
+    def _range(self, start: int, stop: int) -> List[ChatMessage]:
+        if start >= stop:
+            return []
+        boundary = self.first_in_memory
+        messages = []
+        if start < boundary:
+            messages.extend(
+                islice(self.iter_spilled(start), min(stop, boundary) - start)
+            )
+        messages.extend(
+            self._from_ring(index) for index in range(max(start, boundary), stop)
+        )
+        return messages
+
+    def close(self, delete: bool = True):
+        """Close the spill file, removing it unless asked to keep it
+
+        Messages in the ring stay readable. Once the file is removed, reading
+        a spilled message raises IndexError.
+        """
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+            if delete:
+                os.remove(self._spill_path)
+                self._spill_path = None
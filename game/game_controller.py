@@ -1,35 +1,102 @@
 import asyncio
 import random
 import time
-from typing import Dict, List, Optional, Callable
-from concurrent.futures import ThreadPoolExecutor
+import uuid
+from typing import Dict, List, Optional, Callable, Set, Tuple
 import threading
 
+from . import metrics, tracing
 from .game_state import GameState, GamePhase
 from .agents.narrator_agent import NarratorAgent
 from .agents.mafia_agent import MafiaAgent
 from .agents.detective_agent import DetectiveAgent
 from .agents.doctor_agent import DoctorAgent
 from .agents.civilian_agent import CivilianAgent
-from config import GAME_CONFIG
+from .llm_client import get_llm_pool
+from .transcript import (
+    REPLAY_RESPONSE_TIMEOUT,
+    TranscriptRecorder,
+    TranscriptReplay,
+)
+from config import GAME_CONFIG, PACING_PROFILES
 
 
 class MafiaGameController:
     """Main controller for the Mafia game"""
 
-    def __init__(self, frontend_callback: Optional[Callable] = None):
-        self.game_state = GameState()
+    def __init__(
+        self,
+        frontend_callback: Optional[Callable] = None,
+        pacing: Optional[str] = None,
+        max_days: Optional[int] = None,
+        seed: Optional[int] = None,
+        replay: Optional[str] = None,
+    ):
+        self.game_id = uuid.uuid4().hex[:8]
+        self.game_state = GameState(
+            GAME_CONFIG["chat_ring_size"], GAME_CONFIG["chat_spill_dir"]
+        )
         self.frontend_callback = frontend_callback
         self.agents: Dict[str, any] = {}
         self.agent_threads: Dict[str, threading.Thread] = {}
         self.game_running = False
-        self.executor = ThreadPoolExecutor(max_workers=15)
+        self.sent_version: Optional[int] = None  # last state version pushed
+        # Held while pushing state, which joining clients do from other threads
+        self.update_lock = threading.Lock()
+
+        # All agents of this game share one lease on the process-wide client
+        self.llm = get_llm_pool().lease(self.game_id)
+
+        # Span timeline of the game, written when a trace directory is set
+        self.tracer = tracing.Tracer.for_game(self.game_id, GAME_CONFIG["trace_dir"])
+
+        # Replaying a recorded game instead of calling the LLM
+        self.replay = TranscriptReplay(replay) if replay else None
+        if self.replay is not None:
+            pacing = pacing or self.replay.header["pacing"]
 
         # Game timing
-        self.discussion_time = GAME_CONFIG["discussion_time"]
-        self.voting_time = GAME_CONFIG["voting_time"]
+        self.pacing = pacing or GAME_CONFIG["pacing"]
+        if self.pacing not in PACING_PROFILES:
+            raise ValueError(
+                f"Unknown pacing profile '{self.pacing}'. "
+                f"Choose from: {', '.join(PACING_PROFILES)}"
+            )
+        self.timing = PACING_PROFILES[self.pacing]
+        self.discussion_time = self.timing["discussion_time"]
+        self.voting_time = self.timing["voting_time"]
         self.max_discussion_rounds = GAME_CONFIG["max_discussion_rounds"]
+        self.max_days = max_days  # stop undecided games after this many days
         self.response_timeout = GAME_CONFIG["response_timeout"]
+        self.mafia_team_decision = GAME_CONFIG["mafia_team_decision"]
+        self.speculative_speakers = GAME_CONFIG["speculative_speakers"]
+
+        # Every random choice the controller makes comes from this seed, so a
+        # game is reproducible from its seed and its LLM replies
+        if self.replay is not None:
+            seed = self.replay.seed
+            self.max_days = self.max_days or self.replay.header.get("max_days")
+            # Replies are instant; only requests that timed out when recorded
+            # are left waiting
+            self.response_timeout = REPLAY_RESPONSE_TIMEOUT
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+
+        # Transcript of this game's LLM requests, when a directory is set
+        self.recorder = None
+        if self.replay is None:
+            self.recorder = TranscriptRecorder.for_game(
+                self.game_id,
+                GAME_CONFIG["transcript_dir"],
+                {
+                    "game_id": self.game_id,
+                    "seed": self.seed,
+                    "pacing": self.pacing,
+                    "max_days": self.max_days,
+                },
+            )
+        self.llm.recorder = self.recorder
+        self.llm.replay = self.replay
 
         # Phase management
         self.phase_lock = threading.Lock()
@@ -40,7 +107,7 @@ class MafiaGameController:
         """Create all agents for the game"""
         # Create narrator
         self.agents["Narrator"] = NarratorAgent(
-            "Narrator", self.game_state, self.frontend_callback
+            "Narrator", self.game_state, self.frontend_callback, llm=self.llm
         )
 
         # Create player names
@@ -60,7 +127,7 @@ class MafiaGameController:
             "Maya",
         ]
 
-        random.shuffle(player_names)
+        self.rng.shuffle(player_names)
 
         # Assign roles
         roles = (
@@ -70,7 +137,7 @@ class MafiaGameController:
             + ["civilian"] * GAME_CONFIG["civilian_count"]
         )
 
-        random.shuffle(roles)
+        self.rng.shuffle(roles)
 
         # Create agents
         for i, name in enumerate(
@@ -79,13 +146,21 @@ class MafiaGameController:
             role = roles[i]
 
             if role == "mafia":
-                agent = MafiaAgent(name, self.game_state, self.frontend_callback)
+                agent = MafiaAgent(
+                    name, self.game_state, self.frontend_callback, llm=self.llm
+                )
             elif role == "detective":
-                agent = DetectiveAgent(name, self.game_state, self.frontend_callback)
+                agent = DetectiveAgent(
+                    name, self.game_state, self.frontend_callback, llm=self.llm
+                )
             elif role == "doctor":
-                agent = DoctorAgent(name, self.game_state, self.frontend_callback)
+                agent = DoctorAgent(
+                    name, self.game_state, self.frontend_callback, llm=self.llm
+                )
             else:  # civilian
-                agent = CivilianAgent(name, self.game_state, self.frontend_callback)
+                agent = CivilianAgent(
+                    name, self.game_state, self.frontend_callback, llm=self.llm
+                )
 
             self.agents[name] = agent
             self.game_state.add_player(name, role, agent)
@@ -106,38 +181,127 @@ class MafiaGameController:
         if self.frontend_callback:
             self.frontend_callback(event_type, data)
 
+    def send_state_update(self):
+        """Send the frontend what changed since the last state update"""
+        if not self.frontend_callback:
+            return
+
+        with self.update_lock:
+            patch = None
+            if self.sent_version is not None:
+                patch = self.game_state.diff_since(self.sent_version)
+
+            if patch is None:
+                state = self.game_state.to_dict()
+                self.send_update_to_frontend("game_state", state)
+                self.sent_version = state["version"]
+            elif patch["version"] != patch["from_version"]:
+                self.send_update_to_frontend("state_patch", patch)
+                self.sent_version = patch["version"]
+
+    def snapshot(self) -> Dict:
+        """Full state for a client joining or resyncing
+
+        Pending changes are pushed first and the snapshot is taken at exactly
+        the pushed version, so the next patch starts where the snapshot ends.
+        """
+        if not self.frontend_callback:
+            return self.game_state.to_dict()
+
+        while True:
+            self.send_state_update()
+            with self.update_lock:
+                state = self.game_state.to_dict()
+                if state["version"] == self.sent_version:
+                    return state
+
     async def start_game(self):
         """Start the game"""
-        print("🎮 Starting Mafia Game...")
-
-        self.create_agents()
-        self.game_running = True
-
-        # Announce game start
-        player_names = [name for name in self.agents.keys() if name != "Narrator"]
-        self.agents["Narrator"].announce_game_start(player_names)
-
-        # Send initial game state
-        self.send_update_to_frontend("game_state", self.game_state.to_dict())
-
-        # Start with first night
-        await self.run_first_night()
-
-        # Main game loop
-        while self.game_running:
-            winner = self.game_state.check_win_condition()
-            if winner:
-                await self.end_game(winner)
-                break
+        with tracing.activate(self.tracer), tracing.span(
+            "game", game_id=self.game_id, pacing=self.pacing
+        ):
+            await self.play_game()
 
-            await self.run_day_phase()
+    async def play_game(self):
+        """Play the game from the first night until it is won or stopped"""
+        print("🎮 Starting Mafia Game...")
 
-            winner = self.game_state.check_win_condition()
-            if winner:
-                await self.end_game(winner)
-                break
+        metrics.GAMES_RUNNING.inc()
+        try:
+            self.create_agents()
+            self.game_running = True
+
+            # Announce game start
+            player_names = [name for name in self.agents.keys() if name != "Narrator"]
+            self.agents["Narrator"].announce_game_start(player_names)
+
+            # Send initial game state
+            self.send_state_update()
+
+            # Start with first night
+            await self.timed_phase("first_night", self.run_first_night())
+
+            # Main game loop
+            while self.game_running:
+                winner = self.game_state.check_win_condition()
+                if winner:
+                    await self.end_game(winner)
+                    break
+
+                if self.max_days and self.game_state.day_count > self.max_days:
+                    await self.end_game(None)
+                    break
+
+                await self.timed_phase("day", self.run_day_phase())
+
+                winner = self.game_state.check_win_condition()
+                if winner:
+                    await self.end_game(winner)
+                    break
+
+                await self.timed_phase("night", self.run_night_phase())
+        finally:
+            self.game_state.chat_history.close()
+            metrics.GAMES_RUNNING.dec()
+            self.record_game_metrics()
+            if self.recorder is not None:
+                self.recorder.record_result(self.get_result())
+                self.recorder.close()
+            self.llm.release()
+
+    def get_result(self) -> Dict:
+        """Outcome of the game, compared when a transcript is replayed"""
+        return {
+            "winner": self.game_state.check_win_condition(),
+            "days": self.game_state.day_count,
+            "eliminated": list(self.game_state.eliminated_players),
+            "chat_messages": len(self.game_state.chat_history),
+        }
 
-            await self.run_night_phase()
+    async def timed_phase(self, phase: str, run):
+        """Await a phase coroutine and record how long it took"""
+        started = time.perf_counter()
+        try:
+            with tracing.span(phase, day=self.game_state.day_count):
+                return await run
+        finally:
+            metrics.PHASE_SECONDS.observe(time.perf_counter() - started, phase=phase)
+
+    def record_game_metrics(self):
+        """Record the outcome and token spend of a finished game"""
+        usage = self.llm.get_stats()
+        winner = self.game_state.check_win_condition() or "none"
+        metrics.GAMES_FINISHED.inc(winner=winner)
+        metrics.GAME_TOKENS.observe(usage["prompt_tokens"] + usage["completion_tokens"])
+
+    def record_timeout(self, agent_name: str, call_type: str):
+        """Count an agent call abandoned after response_timeout"""
+        metrics.LLM_CALLS.inc(
+            agent=agent_name,
+            role=self.agents[agent_name].role,
+            call_type=call_type,
+            outcome="timeout",
+        )
 
     async def run_first_night(self):
         """Run the special first night phase"""
@@ -148,11 +312,14 @@ class MafiaGameController:
         mafia_members = list(self.game_state.mafia_members)
         if len(mafia_members) > 1:
             # Let mafia introduce themselves
-            await self.facilitate_mafia_meeting(
-                "Learn your teammates and discuss initial strategy"
+            await tracing.traced(
+                self.facilitate_mafia_meeting(
+                    "Learn your teammates and discuss initial strategy"
+                ),
+                "mafia_meeting",
             )
 
-        await asyncio.sleep(2)  # Brief pause
+        await self.pause("first_night_pause")  # Brief pause
 
         # Transition to first day
         self.game_state.day_count = 1
@@ -161,17 +328,20 @@ class MafiaGameController:
             "day", self.game_state.day_count
         )
 
-        self.send_update_to_frontend("game_state", self.game_state.to_dict())
+        self.send_state_update()
 
     async def run_day_phase(self):
         """Run a day phase with discussion and voting"""
         print(f"☀️ Day {self.game_state.day_count} Phase")
 
         # Discussion period
-        await self.run_discussion("Who do you suspect and why?", self.discussion_time)
+        await self.timed_phase(
+            "discussion",
+            self.run_discussion("Who do you suspect and why?", self.discussion_time),
+        )
 
         # Voting phase
-        await self.run_voting()
+        await self.timed_phase("voting", self.run_voting())
 
         # Check for elimination
         eliminated = self.game_state.get_majority_vote_target()
@@ -181,7 +351,7 @@ class MafiaGameController:
             self.game_state.eliminate_player(eliminated)
 
         self.game_state.clear_votes()
-        self.send_update_to_frontend("game_state", self.game_state.to_dict())
+        self.send_state_update()
 
     async def run_night_phase(self):
         """Run a night phase with actions"""
@@ -221,17 +391,29 @@ class MafiaGameController:
         self.game_state.day_count += 1
         self.game_state.phase = GamePhase.DAY
 
-        self.send_update_to_frontend("game_state", self.game_state.to_dict())
+        self.send_state_update()
+
+    async def pause(self, kind: str):
+        """Sleep for a cosmetic pause from the pacing profile"""
+        delay = self.timing[kind]
+        if delay and self.replay is None:  # replays run at CPU speed
+            with tracing.span("pause", kind=kind, delay=delay):
+                await asyncio.sleep(delay)
 
-    async def run_discussion(self, topic: str, duration: int):
+    @staticmethod
+    def get_remaining_time(duration: Optional[int], start_time: float) -> float:
+        """Seconds left in a phase; unlimited when it has no duration"""
+        if duration is None:
+            return float("inf")
+        return duration - (time.time() - start_time)
+
+    async def run_discussion(self, topic: str, duration: Optional[int]):
         """Run a discussion period"""
         print(f"💬 Discussion: {topic}")
         self.agents["Narrator"].facilitate_discussion(topic, duration)
 
         # Get alive players
-        alive_players = [
-            name for name in self.game_state.alive_players if name != "Narrator"
-        ]
+        alive_players = self.game_state.get_alive_players()
 
         # Track who has spoken to ensure fairness
         players_spoken = set()
@@ -239,36 +421,26 @@ class MafiaGameController:
         # Run discussion for specified duration
         start_time = time.time()
         discussion_rounds = 0
+        max_rounds = self.max_discussion_rounds
+        if self.replay is not None:
+            # Replays outrun the clock; stop where the recorded discussion did
+            max_rounds = self.replay.discussion_rounds(max_rounds)
+            duration = None
 
         # Phase 1: Ensure every player gets to speak at least once
         print("🔄 Phase 1: Initial statements from all players")
-        for speaker in alive_players:
-            if speaker in self.agents:
-                try:
-                    # Add timeout to prevent hanging
-                    await asyncio.wait_for(
-                        self.run_agent_discussion(speaker, topic),
-                        timeout=self.response_timeout,
-                    )
-                    players_spoken.add(speaker)
-                    await asyncio.sleep(1)  # Brief pause between speakers
-                except asyncio.TimeoutError:
-                    print(f"Timeout in discussion for {speaker}")
-                except Exception as e:
-                    print(f"Error in discussion for {speaker}: {e}")
+        players_spoken |= await self.run_speaking_turns(alive_players, topic)
 
         # Phase 2: Follow-up discussions and responses
         print("🔄 Phase 2: Follow-up discussions and responses")
-        remaining_time = duration - (time.time() - start_time)
+        remaining_time = self.get_remaining_time(duration, start_time)
 
-        while remaining_time > 0 and discussion_rounds < self.max_discussion_rounds:
+        while remaining_time > 0 and discussion_rounds < max_rounds:
             # Check for agents who should respond to accusations
-            recent_messages = self.game_state.chat_history[-10:]
-            priority_speakers = []
-
-            for player in alive_players:
-                if self.should_agent_respond(player, recent_messages):
-                    priority_speakers.append(player)
+            accused = self.get_accused_players(
+                self.game_state.recent_messages(3, channel="public")
+            )
+            priority_speakers = [p for p in alive_players if p in accused]
 
             # Select players who haven't spoken recently for follow-up
             available_speakers = [p for p in alive_players if p not in players_spoken]
@@ -284,106 +456,219 @@ class MafiaGameController:
             else:
                 # Select 2-3 players for this round
                 num_speakers = min(3, len(available_speakers))
-                speakers = random.sample(available_speakers, num_speakers)
-
-            # Run discussions sequentially to avoid conflicts
-            for speaker in speakers:
-                if speaker in self.agents:
-                    try:
-                        # Add timeout to prevent hanging
-                        await asyncio.wait_for(
-                            self.run_agent_discussion(speaker, topic),
-                            timeout=self.response_timeout,
-                        )
-                        players_spoken.add(speaker)
-                        await asyncio.sleep(1)  # Brief pause between speakers
-                    except asyncio.TimeoutError:
-                        print(f"Timeout in discussion for {speaker}")
-                    except Exception as e:
-                        print(f"Error in discussion for {speaker}: {e}")
+                speakers = self.rng.sample(available_speakers, num_speakers)
+
+            players_spoken |= await self.run_speaking_turns(speakers, topic)
 
             discussion_rounds += 1
-            await asyncio.sleep(3)  # Longer pause between rounds
-            remaining_time = duration - (time.time() - start_time)
+            await self.pause("round_pause")  # Longer pause between rounds
+            remaining_time = self.get_remaining_time(duration, start_time)
+
+        if self.recorder is not None:
+            self.recorder.record_discussion(discussion_rounds)
+
+    async def run_speaking_turns(self, speakers: List[str], topic: str) -> Set[str]:
+        """Let each speaker talk once, in order; return who spoke"""
+        speakers = [s for s in speakers if s in self.agents]
+        if self.speculative_speakers > 0:
+            return await self.run_speculative_turns(speakers, topic)
+
+        # Run discussions sequentially to avoid conflicts
+        spoken = set()
+        for speaker in speakers:
+            try:
+                # Add timeout to prevent hanging
+                await tracing.traced(
+                    asyncio.wait_for(
+                        self.run_agent_discussion(speaker, topic),
+                        timeout=self.response_timeout,
+                    ),
+                    "agent_discussion",
+                    agent=speaker,
+                )
+                spoken.add(speaker)
+                await self.pause("speaker_pause")  # Brief pause between speakers
+            except asyncio.TimeoutError:
+                print(f"Timeout in discussion for {speaker}")
+                self.record_timeout(speaker, "discussion")
+            except Exception as e:
+                print(f"Error in discussion for {speaker}: {e}")
+        return spoken
+
+    async def run_speculative_turns(self, speakers: List[str], topic: str) -> Set[str]:
+        """Draft upcoming speakers' lines concurrently and release them in order
+
+        Up to `speculative_speakers` lines are generated ahead against the chat
+        as it stood when each draft started. A draft is thrown away and
+        regenerated only if a message released since then mentions its speaker.
+        """
+        spoken = set()
+        drafts: Dict[str, asyncio.Task] = {}
+        drafted_at: Dict[str, int] = {}  # chat length when each draft started
+
+        def start_draft(speaker: str):
+            # Read the chat now rather than when the task first runs, so the
+            # draft sees exactly the messages drafted_at covers
+            drafted_at[speaker] = len(self.game_state.chat_history)
+            recent_messages, discussion_context = self.get_discussion_inputs(
+                speaker, topic
+            )
+            drafts[speaker] = asyncio.create_task(
+                self.draft_agent_discussion(
+                    speaker, topic, recent_messages, discussion_context
+                )
+            )
 
-    async def run_agent_discussion(self, agent_name: str, topic: str):
-        """Run discussion for a single agent"""
         try:
-            agent = self.agents[agent_name]
-            recent_messages = self.game_state.chat_history[-10:]
+            for i, speaker in enumerate(speakers):
+                for upcoming in speakers[i : i + self.speculative_speakers]:
+                    if upcoming not in drafts:
+                        start_draft(upcoming)
+                # Let new drafts issue their requests before any is cancelled:
+                # a draft cancelled before it ran would leave no transcript
+                # entry, but its replay (timed differently) would still ask
+                await asyncio.sleep(0)
+
+                if self.was_mentioned_since(speaker, drafted_at[speaker]):
+                    drafts.pop(speaker).cancel()
+                    start_draft(speaker)
 
-            # Get discussion stats to provide context
-            discussion_stats = self.get_discussion_stats()
+                try:
+                    response = await drafts.pop(speaker)
+                    self.agents[speaker].publish_discussion(response)
+                    self.send_state_update()
+                    spoken.add(speaker)
+                    await self.pause("speaker_pause")  # Brief pause between speakers
+                except asyncio.TimeoutError:
+                    print(f"Timeout in discussion for {speaker}")
+                    self.record_timeout(speaker, "discussion")
+                except Exception as e:
+                    print(f"Error in discussion for {speaker}: {e}")
+        finally:
+            for task in drafts.values():
+                task.cancel()
+
+        return spoken
 
-            # Add discussion context to help agents understand participation
-            discussion_context = f"""
+    def get_discussion_inputs(
+        self, agent_name: str, topic: str
+    ) -> Tuple[List[Dict], str]:
+        """Get the messages a speaker can see and their discussion context"""
+        recent_messages = self.game_state.recent_messages(10, viewer=agent_name)
+
+        # Get discussion stats to provide context
+        discussion_stats = self.get_discussion_stats()
+
+        # Add discussion context to help agents understand participation
+        discussion_context = f"""
 DISCUSSION CONTEXT:
 - Topic: {topic}
 - Total players: {discussion_stats['total_players']}
 - Most active speaker: {discussion_stats['most_active']}
 - Recent messages: {len(recent_messages)}
 """
+        return recent_messages, discussion_context
 
-            # Run in thread to avoid blocking
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                self.executor,
-                agent.participate_in_discussion,
-                topic,
-                recent_messages,
-                discussion_context,
+    async def run_agent_discussion(self, agent_name: str, topic: str):
+        """Run discussion for a single agent"""
+        try:
+            agent = self.agents[agent_name]
+            recent_messages, discussion_context = self.get_discussion_inputs(
+                agent_name, topic
+            )
+
+            # Awaited on the event loop; the LLM call does not hold a thread
+            response = await agent.aparticipate_in_discussion(
+                topic, recent_messages, discussion_context
             )
 
-            self.send_update_to_frontend("game_state", self.game_state.to_dict())
+            self.send_state_update()
 
         except Exception as e:
             print(f"Error in discussion for {agent_name}: {e}")
+            tracing.set_outcome("error", error=str(e))
+
+    async def draft_agent_discussion(
+        self,
+        agent_name: str,
+        topic: str,
+        recent_messages: List[Dict],
+        discussion_context: str,
+    ) -> str:
+        """Generate a single agent's discussion line without sending it"""
+        agent = self.agents[agent_name]
+
+        # Traced here rather than at create_task, so a draft cancelled before
+        # it starts leaves no coroutine unawaited
+        with tracing.span("draft_discussion", agent=agent_name):
+            try:
+                return await asyncio.wait_for(
+                    agent.adraft_discussion(topic, recent_messages, discussion_context),
+                    timeout=self.response_timeout,
+                )
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                print(f"Error in discussion for {agent_name}: {e}")
+                tracing.set_outcome("fallback", error=str(e))
+                return agent.DISCUSSION_FALLBACK
+
+    def was_mentioned_since(self, agent_name: str, start: int) -> bool:
+        """Check if messages from index `start` the agent can read mention it"""
+        return any(
+            msg["sender"] != agent_name
+            and agent_name in msg["mentions"]
+            and msg.visible_to(agent_name)
+            for msg in self.game_state.chat_history[start:]
+        )
 
     async def run_voting(self):
         """Run the voting phase"""
         print("🗳️ Voting Phase")
-        eligible_players = [p for p in self.game_state.alive_players if p != "Narrator"]
+        eligible_players = self.game_state.get_alive_players()
         self.agents["Narrator"].announce_voting_phase(eligible_players)
 
         # Collect votes from all alive players
         self.votes_submitted.clear()
 
-        # Collect votes sequentially with small delays to make them visible
-        for voter in eligible_players:
-            if voter in self.agents:
-                await self.collect_vote(voter, eligible_players)
-                # Send update after each vote to show individual votes
-                self.send_update_to_frontend("game_state", self.game_state.to_dict())
-                # Small delay to make votes visible
-                await asyncio.sleep(1.5)
-
-        self.send_update_to_frontend("game_state", self.game_state.to_dict())
+        # Ask every voter at once; the phase takes as long as the slowest call
+        voters = [p for p in eligible_players if p in self.agents]
+        votes = await asyncio.gather(
+            *(
+                tracing.traced(
+                    self.collect_vote(voter, eligible_players),
+                    "collect_vote",
+                    agent=voter,
+                )
+                for voter in voters
+            )
+        )
 
-    async def collect_vote(self, voter: str, eligible_players: List[str]):
-        """Collect vote from a single player"""
+        # Reveal the buffered votes one at a time, in voter order
+        for voter, vote in zip(voters, votes):
+            if vote is None:
+                continue
+            self.reveal_vote(voter, vote)
+            if self.frontend_callback:
+                # Small delay to make votes visible; headless games skip it
+                await self.pause("vote_reveal_delay")
+
+    async def collect_vote(
+        self, voter: str, eligible_players: List[str]
+    ) -> Optional[str]:
+        """Get a single player's vote without recording it"""
         try:
             agent = self.agents[voter]
-
-            # Run in thread
-            loop = asyncio.get_event_loop()
-            vote = await loop.run_in_executor(
-                self.executor,
-                agent.cast_vote,
-                [p for p in eligible_players if p != voter],
+            return await agent.acast_vote(
+                self.game_state.get_alive_players(exclude=voter)
             )
 
-            self.game_state.add_vote(voter, vote)
-            self.votes_submitted[voter] = vote
-
-            # Announce vote
-            vote_msg = f"{voter} votes for {vote}"
-            self.game_state.add_chat_message("Narrator", vote_msg, "public")
-
         except Exception as e:
             print(f"Error collecting vote from {voter}: {e}")
+            tracing.set_outcome("fallback", error=str(e))
             # Default vote
             if eligible_players:
-                default_vote = (
+                return (
                     eligible_players[0]
                     if eligible_players[0] != voter
                     else (
@@ -392,27 +677,64 @@ DISCUSSION CONTEXT:
                         else eligible_players[0]
                     )
                 )
-                self.game_state.add_vote(voter, default_vote)
+            return None
+
+    def reveal_vote(self, voter: str, vote: str):
+        """Record a vote, announce it and push it to the frontend"""
+        self.game_state.add_vote(voter, vote)
+        self.votes_submitted[voter] = vote
+
+        # Announce vote
+        vote_msg = f"{voter} votes for {vote}"
+        self.game_state.add_chat_message("Narrator", vote_msg, "public")
+
+        # Send update after each vote to show individual votes
+        self.send_state_update()
 
     async def collect_night_actions(self):
         """Collect night actions from all players"""
         self.night_actions_submitted.clear()
 
-        alive_players = [p for p in self.game_state.alive_players if p != "Narrator"]
+        alive_players = self.game_state.get_alive_players()
         tasks = []
 
-        for player in alive_players:
-            agent = self.agents[player]
+        alive_mafia = self.game_state.get_alive_with_role("mafia")
+        if self.mafia_team_decision and alive_mafia:
+            # One request decides for the whole team
+            tasks.append(
+                tracing.traced(
+                    self.collect_mafia_team_action(alive_mafia, alive_players),
+                    "collect_mafia_team_action",
+                    agents=alive_mafia,
+                )
+            )
+        else:
+            for player in alive_mafia:
+                tasks.append(
+                    tracing.traced(
+                        self.collect_mafia_action(player, alive_players),
+                        "collect_mafia_action",
+                        agent=player,
+                    )
+                )
 
-            if agent.role == "mafia":
-                task = self.collect_mafia_action(player, alive_players)
-                tasks.append(task)
-            elif agent.role == "detective":
-                task = self.collect_detective_action(player, alive_players)
-                tasks.append(task)
-            elif agent.role == "doctor":
-                task = self.collect_doctor_action(player, alive_players)
-                tasks.append(task)
+        for player in self.game_state.get_alive_with_role("detective"):
+            tasks.append(
+                tracing.traced(
+                    self.collect_detective_action(player, alive_players),
+                    "collect_detective_action",
+                    agent=player,
+                )
+            )
+
+        for player in self.game_state.get_alive_with_role("doctor"):
+            tasks.append(
+                tracing.traced(
+                    self.collect_doctor_action(player, alive_players),
+                    "collect_doctor_action",
+                    agent=player,
+                )
+            )
 
         await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -420,19 +742,41 @@ DISCUSSION CONTEXT:
         """Collect action from mafia member"""
         try:
             agent = self.agents[mafia_name]
-            targets = [
-                p for p in alive_players if p not in self.game_state.mafia_members
-            ]
+            targets = self.game_state.get_alive_non_mafia()
 
-            loop = asyncio.get_event_loop()
-            target = await loop.run_in_executor(
-                self.executor, agent.choose_night_target, targets
-            )
+            target = await agent.achoose_night_target(targets)
 
             self.game_state.add_night_action(mafia_name, "eliminate", target)
 
         except Exception as e:
             print(f"Error collecting mafia action from {mafia_name}: {e}")
+            tracing.set_outcome("error", error=str(e))
+
+    async def collect_mafia_team_action(
+        self, mafia_members: List[str], alive_players: List[str]
+    ):
+        """Collect a single consensus night action for the whole mafia team"""
+        try:
+            spokesperson = self.agents[self.rng.choice(mafia_members)]
+            team = [self.agents[m] for m in mafia_members]
+            targets = self.game_state.get_alive_non_mafia()
+
+            decision = await spokesperson.achoose_team_target(targets, team)
+
+            # Same per-member format resolve_night_actions expects
+            for member in mafia_members:
+                self.game_state.add_night_action(
+                    member, "eliminate", decision["target"]
+                )
+
+            if decision["rationale"]:
+                spokesperson.coordinate_with_mafia(
+                    f"Tonight we take out {decision['target']}. {decision['rationale']}"
+                )
+
+        except Exception as e:
+            print(f"Error collecting mafia team action: {e}")
+            tracing.set_outcome("error", error=str(e))
 
     async def collect_detective_action(
         self, detective_name: str, alive_players: List[str]
@@ -440,32 +784,28 @@ DISCUSSION CONTEXT:
         """Collect action from detective"""
         try:
             agent = self.agents[detective_name]
-            targets = [p for p in alive_players if p != detective_name]
+            targets = self.game_state.get_alive_players(exclude=detective_name)
 
-            loop = asyncio.get_event_loop()
-            target = await loop.run_in_executor(
-                self.executor, agent.choose_investigation_target, targets
-            )
+            target = await agent.achoose_investigation_target(targets)
 
             self.game_state.add_night_action(detective_name, "investigate", target)
 
         except Exception as e:
             print(f"Error collecting detective action from {detective_name}: {e}")
+            tracing.set_outcome("error", error=str(e))
 
     async def collect_doctor_action(self, doctor_name: str, alive_players: List[str]):
         """Collect action from doctor"""
         try:
             agent = self.agents[doctor_name]
 
-            loop = asyncio.get_event_loop()
-            target = await loop.run_in_executor(
-                self.executor, agent.choose_protection_target, alive_players
-            )
+            target = await agent.achoose_protection_target(alive_players)
 
             self.game_state.add_night_action(doctor_name, "protect", target)
 
         except Exception as e:
             print(f"Error collecting doctor action from {doctor_name}: {e}")
+            tracing.set_outcome("error", error=str(e))
 
     def resolve_night_actions(self) -> Dict:
         """Resolve all night actions and return results"""
@@ -509,20 +849,20 @@ DISCUSSION CONTEXT:
 
         if len(mafia_members) > 1:
             # Random mafia member starts discussion
-            speaker = random.choice(mafia_members)
+            speaker = self.rng.choice(mafia_members)
             agent = self.agents[speaker]
 
             try:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    self.executor, agent.discuss_mafia_strategy, topic
-                )
+                await agent.adiscuss_mafia_strategy(topic)
             except Exception as e:
                 print(f"Error in mafia meeting: {e}")
 
-    async def end_game(self, winner: str):
-        """End the game and announce winner"""
-        print(f"🏁 Game Over - {winner} wins!")
+    async def end_game(self, winner: Optional[str]):
+        """End the game and announce the winner, or None at the day limit"""
+        if winner:
+            print(f"🏁 Game Over - {winner} wins!")
+        else:
+            print(f"⏱️ Day limit of {self.max_days} reached - no winner")
 
         self.game_state.phase = GamePhase.GAME_OVER
         self.game_running = False
@@ -534,50 +874,31 @@ DISCUSSION CONTEXT:
             "game_over", {"winner": winner, "stats": final_stats}
         )
 
-        # Cleanup
-        self.executor.shutdown(wait=False)
-
     def should_agent_respond(
         self, agent_name: str, recent_messages: List[Dict]
     ) -> bool:
         """Check if an agent should respond based on recent messages"""
-        if not recent_messages:
-            return False
-
-        # Check if agent was mentioned or accused in recent messages
-        for msg in recent_messages[-3:]:  # Check last 3 messages
-            message_text = msg["message"].lower()
-            if agent_name.lower() in message_text:
-                # Check for accusation patterns
-                accusation_words = [
-                    "accuse",
-                    "suspicious",
-                    "mafia",
-                    "lying",
-                    "defend",
-                    "explain",
-                ]
-                if any(word in message_text for word in accusation_words):
-                    return True
-
-        return False
+        return agent_name in self.get_accused_players(recent_messages)
+
+    @staticmethod
+    def get_accused_players(recent_messages: List[Dict]) -> Set[str]:
+        """Get the players named in an accusation among the last 3 messages"""
+        return {
+            name
+            for msg in recent_messages[-3:]
+            if msg["accusatory"]
+            for name in msg["mentions"]
+        }
 
     def get_discussion_stats(self) -> Dict:
         """Get statistics about discussion participation"""
-        alive_players = [
-            name for name in self.game_state.alive_players if name != "Narrator"
-        ]
-
-        # Count messages per player in recent chat history
-        player_message_counts = {}
-        for player in alive_players:
-            player_message_counts[player] = 0
+        alive_players = self.game_state.get_alive_players()
 
-        # Count recent messages (last 20 messages)
-        recent_messages = self.game_state.chat_history[-20:]
-        for msg in recent_messages:
-            if msg["sender"] in player_message_counts:
-                player_message_counts[msg["sender"]] += 1
+        # Messages per player among the last 20, kept by the game state
+        recent_counts = self.game_state.recent_message_counts
+        player_message_counts = {
+            player: recent_counts.get(player, 0) for player in alive_players
+        }
 
         return {
             "total_players": len(alive_players),
@@ -0,0 +1,173 @@
+"""
+One long-lived event loop hosting many games
+
+GameHost runs a single asyncio loop on a background thread and plays every
+submitted game on it as a task, so a game costs a coroutine rather than a
+thread and a loop of its own. At most `max_concurrent_games` play at once;
+games submitted beyond that wait for a free slot. Callers on other threads
+(such as Socket.IO handlers) get start/stop/wait through thread-safe futures.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from .game_controller import MafiaGameController
+from .llm_client import get_llm_pool
+
+
+class GameHost:
+    """Runs MafiaGameController games as tasks on one shared event loop"""
+
+    def __init__(self, max_concurrent_games: int = 20):
+        self.max_concurrent_games = max_concurrent_games
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._games: Dict[str, Future] = {}
+        self._controllers: Dict[str, MafiaGameController] = {}
+
+        # Counters
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.queued = 0  # submitted games waiting for a slot
+        self.running = 0
+
+    def start(self):
+        """Start the loop thread (done automatically on first submit)"""
+        with self._lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+
+            def run_loop():
+                self._loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self._loop)
+                self._slots = asyncio.Semaphore(self.max_concurrent_games)
+                ready.set()
+                self._loop.run_forever()
+                self._loop.run_until_complete(get_llm_pool().aclose())
+                self._loop.close()
+
+            self._thread = threading.Thread(
+                target=run_loop, name="game-host", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def submit(
+        self,
+        controller: MafiaGameController,
+        on_done: Optional[Callable[[str, Optional[BaseException]], None]] = None,
+    ) -> Future:
+        """Schedule a game; on_done(game_id, error) runs when it ends"""
+        self.start()
+        game_id = controller.game_id
+
+        with self._lock:
+            future = asyncio.run_coroutine_threadsafe(
+                self._play(controller), self._loop
+            )
+            self._games[game_id] = future
+            self._controllers[game_id] = controller
+            self.queued += 1
+
+        def finished(done: Future):
+            with self._lock:
+                self._games.pop(game_id, None)
+                self._controllers.pop(game_id, None)
+            error = None
+            if done.cancelled():
+                error = asyncio.CancelledError()
+            elif done.exception() is not None:
+                error = done.exception()
+            if on_done:
+                on_done(game_id, error)
+
+        future.add_done_callback(finished)
+        return future
+
+    async def _play(self, controller: MafiaGameController):
+        """Wait for a slot, then play the game to the end"""
+        admitted = False
+        try:
+            async with self._slots:
+                admitted = True
+                with self._lock:
+                    self.queued -= 1
+                    self.running += 1
+                    self.started += 1
+                try:
+                    await controller.start_game()
+                except Exception as e:
+                    print(f"Error in game {controller.game_id}: {e}")
+                    with self._lock:
+                        self.failed += 1
+                    raise
+                finally:
+                    with self._lock:
+                        self.running -= 1
+                        self.finished += 1
+        finally:
+            if not admitted:
+                # Cancelled while waiting for a slot; play_game never ran to
+                # give the lease back
+                with self._lock:
+                    self.queued -= 1
+                controller.llm.release()
+            controller.game_running = False
+
+    def stop(self, game_id: str, cancel: bool = False):
+        """Stop a game after its current phase, or right away with cancel"""
+        with self._lock:
+            controller = self._controllers.get(game_id)
+            future = self._games.get(game_id)
+        if controller:
+            controller.game_running = False
+        if cancel and future:
+            future.cancel()
+
+    def wait(self, game_id: str, timeout: Optional[float] = None):
+        """Block until a game ends (returns at once if it is unknown)"""
+        with self._lock:
+            future = self._games.get(game_id)
+        if future:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass  # Errors are reported through on_done
+
+    def is_active(self, game_id: str) -> bool:
+        """Check if a game is queued or playing"""
+        with self._lock:
+            return game_id in self._games
+
+    def shutdown(self, timeout: float = 5.0):
+        """Cancel every game and stop the loop thread"""
+        with self._lock:
+            futures = list(self._games.values())
+            loop, thread = self._loop, self._thread
+        for future in futures:
+            future.cancel()
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            with self._lock:
+                self._loop = None
+                self._thread = None
+
+    def get_stats(self) -> Dict:
+        """Get game counters"""
+        with self._lock:
+            return {
+                "max_concurrent_games": self.max_concurrent_games,
+                "running": self.running,
+                "queued": self.queued,
+                "started": self.started,
+                "finished": self.finished,
+                "failed": self.failed,
+            }
@@ -1,8 +1,26 @@
-from typing import Dict, List, Optional, Set
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple
 import json
+import re
+from collections import Counter, deque
+from collections.abc import Set as AbstractSet
+import time
 from datetime import datetime
 from enum import Enum
 
+from .chat_store import ChatMessage, ChatStore
+
+# How many changes are kept for building patches; older clients resync
+CHANGE_JOURNAL_SIZE = 2048
+
+# Sliding window of recent chat messages counted per sender
+RECENT_MESSAGE_WINDOW = 20
+
+# Changes that alter the public context every agent sees
+PUBLIC_CHANGES = ("phase", "day_count", "event")
+
+# Words that make a message mentioning a player read as an accusation
+ACCUSATION_WORDS = ("accuse", "suspicious", "mafia", "lying", "defend", "explain")
+
 class GamePhase(Enum):
     SETUP = "setup"
     FIRST_NIGHT = "first_night"
@@ -15,63 +33,263 @@ class PlayerStatus(Enum):
     ELIMINATED = "eliminated"
     PROTECTED = "protected"
 
+def popcount(mask: int) -> int:
+    """Number of set bits in a player mask"""
+    return bin(mask).count("1")
+
+class PlayerRecord:
+    """One player's row in the player table"""
+
+    __slots__ = ("id", "name", "role", "status", "agent", "votes_received", "nights_survived")
+
+    def __init__(self, player_id: int, name: str, role: str, agent):
+        self.id = player_id
+        self.name = name
+        self.role = role
+        self.status = PlayerStatus.ALIVE
+        self.agent = agent
+        self.votes_received = 0
+        self.nights_survived = 0
+
+    # Dict-style access, so records read like the old per-player dicts
+    def __getitem__(self, field: str):
+        return getattr(self, field)
+
+    def __setitem__(self, field: str, value):
+        setattr(self, field, value)
+
+class PlayerSet(AbstractSet):
+    """Read-only view of the players in one of GameState's bitmasks"""
+
+    __slots__ = ("_state", "_mask_name")
+
+    def __init__(self, state: "GameState", mask_name: str):
+        self._state = state
+        self._mask_name = mask_name
+
+    @property
+    def mask(self) -> int:
+        return getattr(self._state, self._mask_name)
+
+    def __contains__(self, name) -> bool:
+        player_id = self._state.player_ids.get(name)
+        return player_id is not None and bool(self.mask >> player_id & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._state.names_in(self.mask))
+
+    def __len__(self) -> int:
+        return popcount(self.mask)
+
+    @classmethod
+    def _from_iterable(cls, names):
+        # Results of &, |, - are plain sets
+        return set(names)
+
+    def __repr__(self) -> str:
+        return f"PlayerSet({list(self)})"
+
 class GameState:
-    def __init__(self):
-        self.phase = GamePhase.SETUP
-        self.day_count = 0
-        self.players: Dict[str, Dict] = {}
-        self.mafia_members: Set[str] = set()
-        self.alive_players: Set[str] = set()
-        self.eliminated_players: Set[str] = set()
+    def __init__(self, chat_ring_size: int = 1000, chat_spill_dir: Optional[str] = None):
+        # Every change bumps the version and is journaled for diff_since()
+        self.version = 0
+        self._changes: Deque[Tuple[int, str, Any]] = deque(maxlen=CHANGE_JOURNAL_SIZE)
+
+        # Bumped only when the public context changes; keys its cached text
+        self.public_version = 0
+        self._public_context: Tuple[int, str] = (-1, "")
+
+        self._phase = GamePhase.SETUP
+        self._day_count = 0
+
+        # Player table: dense integer IDs, with membership kept as bitmasks
+        # (bit i set = player i is in the group)
+        self.players: Dict[str, PlayerRecord] = {}
+        self.player_names: List[str] = []  # id -> name
+        self.player_ids: Dict[str, int] = {}  # name -> id
+        self.alive_mask = 0
+        self.eliminated_mask = 0
+        self.mafia_mask = 0
+        self.role_masks: Dict[str, int] = {}
+
+        # Read-only name views over the masks
+        self.alive_players = PlayerSet(self, "alive_mask")
+        self.eliminated_players = PlayerSet(self, "eliminated_mask")
+        self.mafia_members = PlayerSet(self, "mafia_mask")
         self.votes: Dict[str, str] = {}  # voter -> target
+
+        # Tallies kept up to date on every change, so reads are O(1)
+        self.alive_mafia_count = 0
+        self.alive_town_count = 0
+        self.vote_counts: Dict[str, int] = {}  # target -> votes
+        self.top_vote_target: Optional[str] = None
+        self.top_vote_count = 0
+        self._recent_senders: Deque[str] = deque(maxlen=RECENT_MESSAGE_WINDOW)
+        self.recent_message_counts: Counter = Counter()  # sender -> messages
+        self._tag_pattern: Optional[re.Pattern] = None  # built from the roster
+        self._names_by_key: Dict[str, str] = {}  # lowercase name -> name
         self.night_actions: Dict[str, Dict] = {}
-        self.chat_history: List[Dict] = []
+        # Recent messages in memory, older ones spilled to disk
+        self.chat_history = ChatStore(chat_ring_size, chat_spill_dir)
         self.game_log: List[Dict] = []
         self.last_elimination: Optional[str] = None
         self.last_investigation: Optional[Dict] = None
         self.protected_player: Optional[str] = None
+
+    @property
+    def phase(self) -> GamePhase:
+        return self._phase
+
+    @phase.setter
+    def phase(self, value: GamePhase):
+        self._phase = value
+        self._record("phase", value.value)
+
+    @property
+    def day_count(self) -> int:
+        return self._day_count
+
+    @day_count.setter
+    def day_count(self, value: int):
+        self._day_count = value
+        self._record("day_count", value)
+
+    def _record(self, kind: str, payload: Any = None):
+        """Bump the version and journal a change"""
+        self.version += 1
+        self._changes.append((self.version, kind, payload))
+        if kind in PUBLIC_CHANGES:
+            self.public_version += 1
+
+    def _record_player(self, name: str, *fields: str):
+        """Journal changed fields of a player"""
+        info = self.players[name]
+        if "status" in fields:
+            self.public_version += 1
+        self._record("player", (name, {
+            field: info[field].value if field == "status" else info[field]
+            for field in fields
+        }))
         
     def add_player(self, name: str, role: str, agent_instance):
         """Add a player to the game"""
-        self.players[name] = {
-            "role": role,
-            "status": PlayerStatus.ALIVE,
-            "agent": agent_instance,
-            "votes_received": 0,
-            "nights_survived": 0
-        }
-        self.alive_players.add(name)
-        
+        player_id = len(self.player_names)
+        bit = 1 << player_id
+        self.players[name] = PlayerRecord(player_id, name, role, agent_instance)
+        self.player_names.append(name)
+        self.player_ids[name] = player_id
+        self._names_by_key[name.lower()] = name
+
+        self.alive_mask |= bit
+        self.role_masks[role] = self.role_masks.get(role, 0) | bit
         if role == "mafia":
-            self.mafia_members.add(name)
+            self.mafia_mask |= bit
+            self.alive_mafia_count += 1
+        else:
+            self.alive_town_count += 1
+
+        self._record_player(name, "role", "status", "votes_received", "nights_survived")
+        self._tag_pattern = None
     
     def eliminate_player(self, player_name: str):
         """Eliminate a player from the game"""
         if player_name in self.alive_players:
-            self.alive_players.remove(player_name)
-            self.eliminated_players.add(player_name)
-            self.players[player_name]["status"] = PlayerStatus.ELIMINATED
+            bit = 1 << self.player_ids[player_name]
+            self.alive_mask &= ~bit
+            self.eliminated_mask |= bit
+            if self.mafia_mask & bit:
+                self.alive_mafia_count -= 1
+            else:
+                self.alive_town_count -= 1
+            self.players[player_name].status = PlayerStatus.ELIMINATED
             self.last_elimination = player_name
+            self._record_player(player_name, "status")
             
             self.log_event({
                 "type": "elimination",
                 "player": player_name,
-                "role": self.players[player_name]["role"],
+                "role": self.players[player_name].role,
                 "phase": self.phase.value,
                 "day": self.day_count
             })
+
+    def names_in(self, mask: int) -> List[str]:
+        """Names of the players whose bits are set, in ID order"""
+        names = []
+        while mask:
+            lowest = mask & -mask
+            names.append(self.player_names[lowest.bit_length() - 1])
+            mask ^= lowest
+        return names
+
+    def mask_of(self, names) -> int:
+        """Bitmask for a collection of player names"""
+        mask = 0
+        for name in names:
+            mask |= 1 << self.player_ids[name]
+        return mask
+
+    def get_alive_players(self, exclude: Optional[str] = None) -> List[str]:
+        """Alive players, optionally without one of them (e.g. the voter)"""
+        mask = self.alive_mask
+        if exclude in self.player_ids:
+            mask &= ~(1 << self.player_ids[exclude])
+        return self.names_in(mask)
+
+    def get_alive_with_role(self, role: str) -> List[str]:
+        """Alive players holding a role"""
+        return self.names_in(self.alive_mask & self.role_masks.get(role, 0))
+
+    def get_alive_non_mafia(self) -> List[str]:
+        """Alive players outside the mafia (the mafia's eligible targets)"""
+        return self.names_in(self.alive_mask & ~self.mafia_mask)
+
+    def count_alive_mafia(self) -> int:
+        return self.alive_mafia_count
+
+    def count_alive_town(self) -> int:
+        return self.alive_town_count
+
+    def count_alive(self) -> int:
+        return self.alive_mafia_count + self.alive_town_count
     
     def add_vote(self, voter: str, target: str):
         """Record a vote"""
+        previous = self.votes.get(voter)
         self.votes[voter] = target
+        self._record("vote", (voter, target))
+
+        # Keep the histogram and its leader current
+        if previous is not None:
+            self.vote_counts[previous] -= 1
+            if not self.vote_counts[previous]:
+                del self.vote_counts[previous]
+            if previous == self.top_vote_target:
+                self._find_top_vote()
+        count = self.vote_counts.get(target, 0) + 1
+        self.vote_counts[target] = count
+        if count > self.top_vote_count:
+            self.top_vote_target, self.top_vote_count = target, count
+
         if target in self.players:
-            self.players[target]["votes_received"] += 1
+            self.players[target].votes_received += 1
+            self._record_player(target, "votes_received")
+    
+    def _find_top_vote(self):
+        """Recompute the vote leader after a changed vote"""
+        self.top_vote_target, self.top_vote_count = None, 0
+        for target, count in self.vote_counts.items():
+            if count > self.top_vote_count:
+                self.top_vote_target, self.top_vote_count = target, count
     
     def clear_votes(self):
         """Clear all votes"""
         self.votes.clear()
-        for player in self.players:
-            self.players[player]["votes_received"] = 0
+        self.vote_counts.clear()
+        self.top_vote_target, self.top_vote_count = None, 0
+        for record in self.players.values():
+            record.votes_received = 0
+        self._record("votes_cleared")
     
     def add_night_action(self, player: str, action_type: str, target: Optional[str] = None):
         """Record a night action"""
@@ -88,50 +306,86 @@ class GameState:
     
     def add_chat_message(self, sender: str, message: str, chat_type: str = "public", targets: List[str] = None):
         """Add a chat message to history"""
-        chat_entry = {
-            "sender": sender,
-            "message": message,
-            "chat_type": chat_type,
-            "targets": targets or [],
-            "timestamp": datetime.now().isoformat(),
-            "phase": self.phase.value,
-            "day": self.day_count
-        }
+        mentions, accusatory = self.tag_message(message)
+        chat_entry = ChatMessage(
+            len(self.chat_history),
+            sender,
+            message,
+            chat_type,
+            targets or (),
+            time.time(),
+            self.phase.value,
+            self.day_count,
+            mentions,
+            accusatory
+        )
         self.chat_history.append(chat_entry)
+        self._record("message", chat_entry)
+
+        # Slide the per-sender window forward by one message
+        if len(self._recent_senders) == RECENT_MESSAGE_WINDOW:
+            oldest = self._recent_senders[0]
+            self.recent_message_counts[oldest] -= 1
+            if not self.recent_message_counts[oldest]:
+                del self.recent_message_counts[oldest]
+        self._recent_senders.append(sender)
+        self.recent_message_counts[sender] += 1
         return chat_entry
+
+    def tag_message(self, message: str) -> Tuple[Set[str], bool]:
+        """Find the players a message names and whether it is accusatory
+
+        One pass of a single pattern matching every player name and
+        accusation word replaces a scan per player and word.
+        """
+        if self._tag_pattern is None:
+            names = "|".join(map(re.escape, sorted(self.player_names, key=len, reverse=True)))
+            words = "|".join(map(re.escape, ACCUSATION_WORDS))
+            self._tag_pattern = re.compile(rf"\b(?:({names or '(?!)'})\b|({words}))", re.IGNORECASE)
+
+        mentions: Set[str] = set()
+        accusatory = False
+        for match in self._tag_pattern.finditer(message):
+            name, word = match.groups()
+            if name:
+                mentions.add(self._names_by_key[name.lower()])
+            elif word:
+                accusatory = True
+        return mentions, accusatory
+
+    def recent_messages(self, limit: Optional[int] = None, viewer: Optional[str] = None,
+                        day: Optional[int] = None, phase: Optional[str] = None,
+                        channel: Optional[str] = None, sender: Optional[str] = None) -> List[ChatMessage]:
+        """Get the last `limit` messages matching the filters, oldest first
+
+        `viewer` keeps only what that player may read: public messages plus
+        mafia and private messages they sent or received.
+        """
+        return self.chat_history.query(limit, viewer, day, phase, channel, sender)
     
     def log_event(self, event: Dict):
         """Log a game event"""
         event["timestamp"] = datetime.now().isoformat()
         self.game_log.append(event)
+        self._record("event", event)
     
     def get_vote_counts(self) -> Dict[str, int]:
         """Get current vote counts"""
-        vote_counts = {}
-        for target in self.votes.values():
-            vote_counts[target] = vote_counts.get(target, 0) + 1
-        return vote_counts
+        return dict(self.vote_counts)
     
     def get_majority_vote_target(self) -> Optional[str]:
         """Get the player with majority votes"""
-        vote_counts = self.get_vote_counts()
-        if not vote_counts:
-            return None
+        majority_threshold = self.count_alive() // 2 + 1
         
-        max_votes = max(vote_counts.values())
-        majority_threshold = len(self.alive_players) // 2 + 1
-        
-        if max_votes >= majority_threshold:
-            # Find player with max votes
-            for player, votes in vote_counts.items():
-                if votes == max_votes:
-                    return player
+        # At most one player can reach a majority, so the leader is enough
+        if self.top_vote_count >= majority_threshold:
+            return self.top_vote_target
         return None
     
     def check_win_condition(self) -> Optional[str]:
         """Check if the game has ended"""
-        alive_mafia = len([p for p in self.alive_players if p in self.mafia_members])
-        alive_civilians = len(self.alive_players) - alive_mafia
+        alive_mafia = self.count_alive_mafia()
+        alive_civilians = self.count_alive_town()
         
         if alive_mafia == 0:
             return "civilians"
@@ -142,16 +396,13 @@ class GameState:
     
     def get_game_stats(self) -> Dict:
         """Get current game statistics"""
-        alive_mafia = [p for p in self.alive_players if p in self.mafia_members]
-        alive_civilians = [p for p in self.alive_players if p not in self.mafia_members]
-        
         return {
             "phase": self.phase.value,
             "day_count": self.day_count,
-            "total_alive": len(self.alive_players),
-            "alive_mafia": len(alive_mafia),
-            "alive_civilians": len(alive_civilians),
-            "eliminated_count": len(self.eliminated_players),
+            "total_alive": self.count_alive(),
+            "alive_mafia": self.count_alive_mafia(),
+            "alive_civilians": self.count_alive_town(),
+            "eliminated_count": len(self.players) - self.count_alive(),
             "mafia_members": list(self.mafia_members),
             "alive_players": list(self.alive_players),
             "eliminated_players": list(self.eliminated_players),
@@ -160,22 +411,147 @@ class GameState:
             "winner": self.check_win_condition()
         }
     
+    def get_public_context(self) -> str:
+        """Game state text shared by every agent's prompt, rebuilt on change"""
+        version, context = self._public_context
+        if version == self.public_version:
+            return context
+
+        alive = list(self.alive_players)
+        eliminated = list(self.eliminated_players)
+        # Wall-clock timestamps mean nothing to the agents and would make
+        # every prompt unique to its run
+        events = [{k: v for k, v in event.items() if k != 'timestamp'} for event in self.game_log[-3:]]
+        context = f"""
+CURRENT GAME STATE:
+- Phase: {self.phase.value}
+- Day: {self.day_count}
+- Players alive: {len(alive)}
+- Players eliminated: {len(self.players) - len(alive)}
+
+ALIVE PLAYERS: {', '.join(alive)}
+ELIMINATED PLAYERS: {', '.join(eliminated)}
+
+RECENT EVENTS:
+{chr(10).join([f"- {event.get('type', 'event')}: {event}" for event in events])}
+"""
+        self._public_context = (self.public_version, context)
+        return context
+
+    def diff_since(self, version: int) -> Optional[Dict]:
+        """Get a patch from `version` to the current version
+
+        Returns None when the journal no longer reaches back that far, in
+        which case the caller should send a full to_dict() snapshot.
+        """
+        if version > self.version:
+            return None
+        if version < self.version and (
+            not self._changes or self._changes[0][0] > version + 1
+        ):
+            return None
+
+        patch = {"from_version": version, "version": self.version}
+        players: Dict[str, Dict] = {}
+        votes: Dict[str, str] = {}
+        messages: List[ChatMessage] = []
+        events: List[Dict] = []
+
+        # Walk back to the first change the client has not seen
+        pending = []
+        for change in reversed(self._changes):
+            if change[0] <= version:
+                break
+            pending.append(change)
+
+        for _, kind, payload in reversed(pending):
+            if kind in ("phase", "day_count"):
+                patch[kind] = payload
+            elif kind == "player":
+                name, fields = payload
+                players.setdefault(name, {}).update(fields)
+            elif kind == "vote":
+                votes[payload[0]] = payload[1]
+            elif kind == "votes_cleared":
+                # The client resets every tally; earlier ones are moot
+                patch["votes_cleared"] = True
+                votes.clear()
+                for fields in players.values():
+                    fields.pop("votes_received", None)
+            elif kind == "message":
+                messages.append(payload)
+            elif kind == "event":
+                events.append(payload)
+
+        if players:
+            patch["players"] = players
+        if votes:
+            patch["votes"] = votes
+        if messages:
+            patch["messages"] = [m.to_dict() for m in messages[-50:]]
+        if events:
+            patch["events"] = events[-10:]
+        return patch
+
     def to_dict(self) -> Dict:
         """Convert game state to dictionary for serialization"""
         return {
+            "version": self.version,
             "phase": self.phase.value,
             "day_count": self.day_count,
             "players": {name: {
-                "role": info["role"],
-                "status": info["status"].value,
-                "votes_received": info["votes_received"],
-                "nights_survived": info["nights_survived"]
+                "role": info.role,
+                "status": info.status.value,
+                "votes_received": info.votes_received,
+                "nights_survived": info.nights_survived
             } for name, info in self.players.items()},
             "mafia_members": list(self.mafia_members),
             "alive_players": list(self.alive_players),
             "eliminated_players": list(self.eliminated_players),
-            "votes": self.votes,
+            "votes": dict(self.votes),
             "stats": self.get_game_stats(),
-            "chat_history": self.chat_history[-50:],  # Last 50 messages
+            "chat_history": [m.to_dict() for m in self.chat_history[-50:]],  # Last 50 messages
             "recent_events": self.game_log[-10:]  # Last 10 events
-        }
\ No newline at end of file
+        }
+
+
+def merge_patches(first: Dict, second: Dict) -> Optional[Dict]:
+    """Combine two consecutive diff_since() patches into one
+
+    Returns None if `second` does not start where `first` ends.
+    """
+    if second["from_version"] != first["version"]:
+        return None
+
+    merged = {"from_version": first["from_version"], "version": second["version"]}
+    for key in ("phase", "day_count", "votes_cleared"):
+        if key in first:
+            merged[key] = first[key]
+
+    players = {name: dict(fields) for name, fields in first.get("players", {}).items()}
+    votes = dict(first.get("votes", {}))
+    if second.get("votes_cleared"):
+        merged["votes_cleared"] = True
+        votes.clear()
+        for fields in players.values():
+            fields.pop("votes_received", None)
+
+    for key in ("phase", "day_count"):
+        if key in second:
+            merged[key] = second[key]
+    for name, fields in second.get("players", {}).items():
+        players.setdefault(name, {}).update(fields)
+    votes.update(second.get("votes", {}))
+
+    messages = (first.get("messages", []) + second.get("messages", []))[-50:]
+    events = (first.get("events", []) + second.get("events", []))[-10:]
+
+    if players:
+        merged["players"] = players
+    if votes:
+        merged["votes"] = votes
+    if messages:
+        merged["messages"] = messages
+    if events:
+        merged["events"] = events
+    return merged
@@ -0,0 +1,275 @@
+"""
+Prompt/response cache for LLM calls
+
+Responses are keyed on (model, system message, normalized prompt, temperature)
+and kept in a bounded in-memory LRU, optionally backed by a SQLite file so they
+survive restarts. Identical requests that arrive while one is already in flight
+wait for that call instead of sending their own.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Where a cached reply came from
+SOURCE_MEMORY = "memory"
+SOURCE_DISK = "disk"
+SOURCE_COALESCED = "coalesced"
+SOURCE_UPSTREAM = "upstream"
+
+
+class LLMCache:
+    """Bounded LRU response cache with an optional SQLite tier"""
+
+    def __init__(self, max_entries: int = 2048, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # key -> (future, owner thread, owner is a coroutine)
+        self._inflight: Dict[str, Tuple[Future, int, bool]] = {}
+
+        # SQLite has its own lock so disk I/O never holds up memory hits
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, reply TEXT NOT NULL, "
+                "latency REAL NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        # Counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0  # upstream latency avoided by hits
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float) -> str:
+        """Build the cache key for a chat request"""
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        prompt = "\n".join(m["content"] for m in messages if m["role"] != "system")
+        normalized = " ".join(prompt.split())
+        raw = json.dumps([model, system, normalized, round(temperature, 3)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a reply, promoting disk hits into memory"""
+        with self._lock:
+            found = self._from_memory(key)
+        if found is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+                found = entry[0], SOURCE_DISK
+        return found[0] if found else None
+
+    def put(self, key: str, reply: str, latency: float = 0.0):
+        """Store a reply and the upstream latency it cost"""
+        self._remember(key, (reply, latency))
+        self._write_disk(key, (reply, latency))
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> Tuple[str, str]:
+        """Return (reply, source), calling compute only on a miss"""
+        with self._lock:
+            found = self._from_memory(key)
+            if found is not None:
+                return found
+            future, owner = self._claim(key)
+
+        if future is None:
+            # The call in flight belongs to a coroutine on this thread, which
+            # can't finish while we block on it: send our own
+            entry = self._call(compute)
+            self._remember(key, entry)
+            return entry[0], SOURCE_UPSTREAM
+        if not owner:
+            reply, latency = future.result()
+            self._count_coalesced(latency)
+            return reply, SOURCE_COALESCED
+
+        try:
+            entry, source = self._read_disk(key), SOURCE_DISK
+            if entry is None:
+                entry, source = self._call(compute), SOURCE_UPSTREAM
+                self._write_disk(key, entry)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, entry)
+        return entry[0], source
+
+    async def aget_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[str]]
+    ) -> Tuple[str, str]:
+        """Async variant of get_or_compute
+
+        The SQLite tier is read and written on a worker thread, so a slow disk
+        never stalls the event loop.
+        """
+        with self._lock:
+            found = self._from_memory(key)
+            if found is not None:
+                return found
+            future, owner = self._claim(key, asynchronous=True)
+
+        if not owner:
+            reply, latency = await asyncio.wrap_future(future)
+            self._count_coalesced(latency)
+            return reply, SOURCE_COALESCED
+
+        try:
+            entry, source = None, SOURCE_DISK
+            if self._db is not None:
+                entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is None:
+                with self._lock:
+                    self.misses += 1
+                started = time.perf_counter()
+                reply = await compute()
+                entry = (reply, time.perf_counter() - started)
+                source = SOURCE_UPSTREAM
+                if self._db is not None:
+                    await asyncio.to_thread(self._write_disk, key, entry)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._finish(key, future, entry)
+        return entry[0], source
+
+    def _from_memory(self, key: str) -> Optional[Tuple[str, str]]:
+        """Find (reply, source) in memory (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_seconds += entry[1]
+        return entry[0], SOURCE_MEMORY
+
+    def _claim(
+        self, key: str, asynchronous: bool = False
+    ) -> Tuple[Optional[Future], bool]:
+        """Join or start the in-flight call for `key` (caller holds the lock)
+
+        Returns its future and whether the caller now owns it. A blocking
+        caller gets no future when a coroutine on its own thread owns the call.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            future, owner_thread, owner_is_async = inflight
+            if (
+                not asynchronous
+                and owner_is_async
+                and owner_thread == threading.get_ident()
+            ):
+                return None, False
+            return future, False
+
+        future = Future()
+        self._inflight[key] = (future, threading.get_ident(), asynchronous)
+        return future, True
+
+    def _call(self, compute: Callable[[], str]) -> Tuple[str, float]:
+        """Call upstream and return (reply, latency)"""
+        with self._lock:
+            self.misses += 1
+        started = time.perf_counter()
+        reply = compute()
+        return reply, time.perf_counter() - started
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, float]]:
+        """Find (reply, latency) in the SQLite tier"""
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT reply, latency FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self.saved_seconds += row[1]
+        return row[0], row[1]
+
+    def _write_disk(self, key: str, entry: Tuple[str, float]):
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, entry[0], entry[1], time.time()),
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, entry: Tuple[str, float]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _finish(self, key: str, future: Future, entry: Tuple[str, float]):
+        self._remember(key, entry)
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(entry)
+
+    def _fail(self, key: str, future: Future, error: BaseException):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if not isinstance(error, Exception):
+            # The owner was cancelled; waiters get an ordinary error to handle
+            error = RuntimeError("Coalesced LLM request was abandoned by its owner")
+        future.set_exception(error)
+
+    def _count_coalesced(self, latency: float):
+        with self._lock:
+            self.coalesced += 1
+            self.saved_seconds += latency
+
+    def get_stats(self) -> Dict:
+        """Get hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.coalesced + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (
+                    (self.hits + self.disk_hits + self.coalesced) / lookups
+                    if lookups
+                    else 0.0
+                ),
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+    def clear(self):
+        """Drop all in-memory entries (the SQLite tier is kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def close(self):
+        """Close the SQLite tier"""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,599 @@
+"""
+Shared LLM client layer for the Mafia game
+
+A single connection-pooled client is created per process and shared by every
+agent of every game. Games take a lease on the pool, which caps how many calls
+a single game may have in flight and keeps per-game usage counters. All calls
+pass through one shared rate limiter, and retries (including Retry-After
+backoff on 429s) are handled here rather than inside the OpenAI client.
+Usage is also broken down by call type, including the prompt tokens the
+provider served from its prefix cache. Each call is traced as an llm_request
+span when the game has a tracer, and can be recorded to a transcript or
+answered from one (see transcript.py).
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import openai
+
+from config import (
+    DEEPSEEK_API_KEY,
+    DEEPSEEK_BASE_URL,
+    DEEPSEEK_MODEL,
+    LLM_BACKEND,
+    LLM_CONFIG,
+    LOCAL_LLM_CONFIG,
+    RATE_LIMIT_CONFIG,
+)
+from . import metrics, tracing
+from .llm_cache import SOURCE_UPSTREAM, LLMCache
+from .local_llm import LocalLLM, LocalLLMError
+from .rate_limiter import RateLimiter
+from .transcript import (
+    RecordedTimeout,
+    TranscriptRecorder,
+    TranscriptReplay,
+    request_key,
+)
+
+
+class LLMClientPool:
+    """Process-wide LLM client with keep-alive connection pooling"""
+
+    def __init__(
+        self,
+        pool_size: int = LLM_CONFIG["pool_size"],
+        keepalive_connections: int = LLM_CONFIG["keepalive_connections"],
+        keepalive_expiry: float = LLM_CONFIG["keepalive_expiry"],
+        max_inflight_per_game: int = LLM_CONFIG["max_inflight_per_game"],
+        backend: str = LLM_BACKEND,
+        cache: Optional[LLMCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = RATE_LIMIT_CONFIG["max_retries"],
+    ):
+        self.backend = backend
+        self.model = DEEPSEEK_MODEL
+        self.cache = cache
+        self.limiter = limiter or RateLimiter(0, 0)  # unlimited by default
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.keepalive_connections = min(keepalive_connections, pool_size)
+        self.keepalive_expiry = keepalive_expiry
+        self.max_inflight_per_game = max_inflight_per_game
+
+        self._lock = threading.Lock()
+        self._client: Optional[openai.OpenAI] = None
+        self._local: Optional[LocalLLM] = None
+        # Async clients are bound to the event loop that created them
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.leases: Dict[str, "LLMLease"] = {}
+
+    @property
+    def client(self) -> openai.OpenAI:
+        """Get the shared client, creating it on first use"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = openai.OpenAI(
+                        api_key=DEEPSEEK_API_KEY,
+                        base_url=DEEPSEEK_BASE_URL,
+                        max_retries=0,  # retries go through the rate limiter
+                        http_client=openai.DefaultHttpxClient(limits=self._limits()),
+                    )
+        return self._client
+
+    @property
+    def local(self) -> LocalLLM:
+        """Get the offline stand-in used by the local backend"""
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    self._local = LocalLLM(**LOCAL_LLM_CONFIG)
+        return self._local
+
+    @property
+    def async_client(self) -> openai.AsyncOpenAI:
+        """Get the shared async client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = openai.AsyncOpenAI(
+                api_key=DEEPSEEK_API_KEY,
+                base_url=DEEPSEEK_BASE_URL,
+                max_retries=0,
+                http_client=openai.DefaultAsyncHttpxClient(limits=self._limits()),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def lease(self, game_id: str, max_inflight: Optional[int] = None) -> "LLMLease":
+        """Lease a share of the pool for one game"""
+        with self._lock:
+            lease = self.leases.get(game_id)
+            if lease is None:
+                lease = LLMLease(
+                    self, game_id, max_inflight or self.max_inflight_per_game
+                )
+                self.leases[game_id] = lease
+            return lease
+
+    def release(self, game_id: str):
+        """Return a game's lease to the pool"""
+        with self._lock:
+            self.leases.pop(game_id, None)
+
+    def complete(
+        self,
+        messages: List[Dict],
+        temperature: float = LLM_CONFIG["temperature"],
+        max_tokens: int = LLM_CONFIG["max_tokens"],
+    ):
+        """Send a chat completion request over the shared client"""
+        if self.backend == "local":
+            return self.local.create(messages, temperature, max_tokens)
+
+        return self.client.chat.completions.create(
+            model=DEEPSEEK_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=LLM_CONFIG["request_timeout"],
+        )
+
+    async def acomplete(
+        self,
+        messages: List[Dict],
+        temperature: float = LLM_CONFIG["temperature"],
+        max_tokens: int = LLM_CONFIG["max_tokens"],
+    ):
+        """Send a chat completion request without blocking the event loop"""
+        if self.backend == "local":
+            return await self.local.acreate(messages, temperature, max_tokens)
+
+        return await self.async_client.chat.completions.create(
+            model=DEEPSEEK_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=LLM_CONFIG["request_timeout"],
+        )
+
+    async def aclose(self):
+        """Close the async client bound to the running event loop"""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            if self.cache is not None:
+                self.cache.close()
+            self.leases.clear()
+
+
+class LLMLease:
+    """One game's share of the LLM client pool"""
+
+    def __init__(self, pool: LLMClientPool, game_id: str, max_inflight: int):
+        self.pool = pool
+        self.game_id = game_id
+        self.max_inflight = max_inflight
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        # An asyncio.Semaphore is bound to the loop that first waits on it, so
+        # a lease used from several loops keeps one per loop
+        self._async_slots: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._stats_lock = threading.Lock()
+
+        # Usage counters for this game
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.cached_tokens = 0  # prompt tokens served from the provider cache
+        self.call_types: Dict[str, Dict[str, int]] = {}
+
+        # Set by the controller to record this game's requests, or to answer
+        # them from a recorded transcript instead of the pool
+        self.recorder: Optional[TranscriptRecorder] = None
+        self.replay: Optional[TranscriptReplay] = None
+
+    def complete(
+        self,
+        messages: List[Dict],
+        temperature: float = LLM_CONFIG["temperature"],
+        max_tokens: int = LLM_CONFIG["max_tokens"],
+        call_type: str = "other",
+        role: str = "",
+    ) -> str:
+        """Run a chat completion and return the stripped reply text
+
+        call_type and role label the call in usage stats and metrics.
+        """
+        with tracing.span("llm_request", call_type=call_type, role=role):
+            if self.replay is not None:
+                return self._replay(messages, temperature)
+
+            try:
+                reply = self._cached_request(
+                    messages, temperature, max_tokens, call_type, role
+                )
+            except BaseException as e:
+                self._record_call(messages, temperature, call_type, role, error=e)
+                raise
+            self._record_call(messages, temperature, call_type, role, reply=reply)
+            return reply
+
+    async def acomplete(
+        self,
+        messages: List[Dict],
+        temperature: float = LLM_CONFIG["temperature"],
+        max_tokens: int = LLM_CONFIG["max_tokens"],
+        call_type: str = "other",
+        role: str = "",
+    ) -> str:
+        """Async variant of complete"""
+        with tracing.span("llm_request", call_type=call_type, role=role):
+            if self.replay is not None:
+                # Yield once, as a real request would, so concurrent callers
+                # build their prompts before any reply lands
+                await asyncio.sleep(0)
+                try:
+                    return self._replay(messages, temperature)
+                except RecordedTimeout:
+                    # Never returned when recorded; wait to be cancelled
+                    await asyncio.get_running_loop().create_future()
+
+            try:
+                reply = await self._acached_request(
+                    messages, temperature, max_tokens, call_type, role
+                )
+            except BaseException as e:
+                self._record_call(messages, temperature, call_type, role, error=e)
+                raise
+            self._record_call(messages, temperature, call_type, role, reply=reply)
+            return reply
+
+    def _cached_request(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        call_type: str,
+        role: str,
+    ) -> str:
+        cache = self.pool.cache
+        if cache is None:
+            return self._request(messages, temperature, max_tokens, call_type, role)
+
+        key = cache.make_key(self.pool.model, messages, temperature)
+        reply, source = cache.get_or_compute(
+            key,
+            lambda: self._request(messages, temperature, max_tokens, call_type, role),
+        )
+        self._record_cache(source)
+        return reply
+
+    async def _acached_request(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        call_type: str,
+        role: str,
+    ) -> str:
+        cache = self.pool.cache
+        if cache is None:
+            return await self._arequest(
+                messages, temperature, max_tokens, call_type, role
+            )
+
+        key = cache.make_key(self.pool.model, messages, temperature)
+        reply, source = await cache.aget_or_compute(
+            key,
+            lambda: self._arequest(messages, temperature, max_tokens, call_type, role),
+        )
+        self._record_cache(source)
+        return reply
+
+    def _record_call(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        call_type: str,
+        role: str,
+        reply: Optional[str] = None,
+        error: Optional[BaseException] = None,
+    ):
+        if self.recorder is not None:
+            key = request_key(messages, temperature)
+            self.recorder.record_call(key, messages, call_type, role, reply, error)
+
+    def _replay(self, messages: List[Dict], temperature: float) -> str:
+        with self._stats_lock:
+            self.calls += 1
+        tracing.annotate(source="replay")
+        return self.replay.reply(request_key(messages, temperature))
+
+    def _request(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        call_type: str = "other",
+        role: str = "",
+    ) -> str:
+        """Send the request upstream, retrying through the shared rate limiter"""
+        limiter = self.pool.limiter
+        estimate = _estimate_tokens(messages, max_tokens)
+        attempt = 0
+        queued_seconds = 0.0
+        while True:
+            metrics.LLM_QUEUED.inc()
+            queued = True  # until a slot is free, including rate-limit waits
+            wait_started = time.perf_counter()
+            try:
+                limiter.acquire(self.pool.model, estimate)
+                try:
+                    with self._slots:
+                        metrics.LLM_QUEUED.dec()
+                        queued = False
+                        queued_seconds += time.perf_counter() - wait_started
+                        metrics.LLM_INFLIGHT.inc()
+                        try:
+                            response = self.pool.complete(
+                                messages, temperature, max_tokens
+                            )
+                        finally:
+                            metrics.LLM_INFLIGHT.dec()
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+            finally:
+                if queued:
+                    metrics.LLM_QUEUED.dec()
+            time.sleep(delay)
+            attempt += 1
+
+        tracing.annotate(attempts=attempt + 1, queued_seconds=queued_seconds)
+        return self._finish(response, estimate, call_type, role)
+
+    async def _arequest(
+        self,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        call_type: str = "other",
+        role: str = "",
+    ) -> str:
+        """Async variant of _request"""
+        loop = asyncio.get_running_loop()
+        with self._stats_lock:
+            slots = self._async_slots.get(loop)
+            if slots is None:
+                slots = self._async_slots[loop] = asyncio.Semaphore(self.max_inflight)
+
+        limiter = self.pool.limiter
+        estimate = _estimate_tokens(messages, max_tokens)
+        attempt = 0
+        queued_seconds = 0.0
+        while True:
+            metrics.LLM_QUEUED.inc()
+            queued = True  # until a slot is free, including rate-limit waits
+            wait_started = time.perf_counter()
+            try:
+                await limiter.aacquire(self.pool.model, estimate)
+                try:
+                    async with slots:
+                        metrics.LLM_QUEUED.dec()
+                        queued = False
+                        queued_seconds += time.perf_counter() - wait_started
+                        metrics.LLM_INFLIGHT.inc()
+                        try:
+                            response = await self.pool.acomplete(
+                                messages, temperature, max_tokens
+                            )
+                        finally:
+                            metrics.LLM_INFLIGHT.dec()
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+            finally:
+                if queued:
+                    metrics.LLM_QUEUED.dec()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        tracing.annotate(attempts=attempt + 1, queued_seconds=queued_seconds)
+        return self._finish(response, estimate, call_type, role)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying, or re-raise if the call failed"""
+        rate_limited, retryable, retry_after = classify_error(error)
+        if rate_limited:
+            self.pool.limiter.penalize(self.pool.model, retry_after)
+            with self._stats_lock:
+                self.rate_limited += 1
+
+        if not retryable or attempt >= self.pool.max_retries:
+            with self._stats_lock:
+                self.calls += 1
+                self.errors += 1
+            raise error
+
+        with self._stats_lock:
+            self.retries += 1
+        if rate_limited and retry_after:
+            return 0.0  # the limiter holds every caller back until Retry-After
+        return self.pool.limiter.backoff_delay(attempt)
+
+    def _finish(self, response, estimate: int, call_type: str, role: str) -> str:
+        usage = getattr(response, "usage", None)
+        if usage is not None and usage.total_tokens:
+            self.pool.limiter.settle(self.pool.model, estimate, usage.total_tokens)
+        self._record_usage(response, call_type, role)
+        return response.choices[0].message.content.strip()
+
+    def _record_cache(self, source: str):
+        tracing.annotate(source=source)
+        if source != SOURCE_UPSTREAM:
+            with self._stats_lock:
+                self.cache_hits += 1
+
+    def _record_usage(self, response, call_type: str, role: str):
+        usage = getattr(response, "usage", None)
+        prompt_tokens = (usage.prompt_tokens or 0) if usage is not None else 0
+        cached_tokens = cached_prompt_tokens(usage)
+        with self._stats_lock:
+            self.calls += 1
+            if usage is not None:
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += usage.completion_tokens or 0
+                self.cached_tokens += cached_tokens
+
+            counters = self.call_types.get(call_type)
+            if counters is None:
+                counters = self.call_types[call_type] = {
+                    "calls": 0,
+                    "prompt_tokens": 0,
+                    "cached_tokens": 0,
+                }
+            counters["calls"] += 1
+            counters["prompt_tokens"] += prompt_tokens
+            counters["cached_tokens"] += cached_tokens
+
+        if usage is not None:
+            labels = {"role": role, "call_type": call_type}
+            metrics.LLM_TOKENS.inc(prompt_tokens, kind="prompt", **labels)
+            metrics.LLM_TOKENS.inc(
+                usage.completion_tokens or 0, kind="completion", **labels
+            )
+            metrics.LLM_TOKENS.inc(cached_tokens, kind="cached", **labels)
+
+    def get_stats(self) -> Dict:
+        """Get usage counters for this game"""
+        with self._stats_lock:
+            return {
+                "game_id": self.game_id,
+                "calls": self.calls,
+                "errors": self.errors,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cache_hits": self.cache_hits,
+                "cached_tokens": self.cached_tokens,
+                "prompt_cache_hit_rate": _hit_rate(
+                    self.cached_tokens, self.prompt_tokens
+                ),
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "call_types": {
+                    name: dict(
+                        counters,
+                        hit_rate=_hit_rate(
+                            counters["cached_tokens"], counters["prompt_tokens"]
+                        ),
+                    )
+                    for name, counters in self.call_types.items()
+                },
+            }
+
+    def release(self):
+        """Give the lease back to the pool"""
+        self.pool.release(self.game_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+_pool: Optional[LLMClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_llm_pool() -> LLMClientPool:
+    """Get the process-wide LLM client pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                cache = None
+                if LLM_CONFIG["cache_enabled"]:
+                    cache = LLMCache(LLM_CONFIG["cache_size"], LLM_CONFIG["cache_path"])
+                limiter = RateLimiter(
+                    RATE_LIMIT_CONFIG["requests_per_second"],
+                    RATE_LIMIT_CONFIG["tokens_per_minute"],
+                    RATE_LIMIT_CONFIG["backoff_base"],
+                    RATE_LIMIT_CONFIG["backoff_max"],
+                )
+                _pool = LLMClientPool(cache=cache, limiter=limiter)
+    return _pool
+
+
+def classify_error(error: Exception) -> Tuple[bool, bool, Optional[float]]:
+    """Classify an API error as (rate_limited, retryable, retry_after)"""
+    if isinstance(error, LocalLLMError):
+        if error.status_code == 429:
+            return True, True, error.retry_after
+        return False, error.status_code >= 500, None
+
+    if isinstance(error, openai.RateLimitError):
+        return True, True, _parse_retry_after(error.response.headers)
+    if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+        return False, True, None
+    return False, False, None
+
+
+def cached_prompt_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prefix cache
+
+    DeepSeek reports prompt_cache_hit_tokens; OpenAI-style APIs report
+    prompt_tokens_details.cached_tokens.
+    """
+    if usage is None:
+        return 0
+    hit = getattr(usage, "prompt_cache_hit_tokens", None)
+    if hit is not None:
+        return hit
+    details = getattr(usage, "prompt_tokens_details", None)
+    return (getattr(details, "cached_tokens", None) or 0) if details else 0
+
+
+def _hit_rate(cached_tokens: int, prompt_tokens: int) -> float:
+    return round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    """Read Retry-After (or retry-after-ms) as seconds"""
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass  # HTTP-date form; fall back to exponential backoff
+    return None
+
+
+def _estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Upper-bound token cost used to reserve rate-limit capacity"""
+    return sum(len(m["content"]) for m in messages) // 4 + max_tokens
@@ -0,0 +1,389 @@
+"""
+Offline stand-in for the DeepSeek chat-completions API
+
+LocalLLM answers chat-completion requests with plausible, role-aware replies
+(valid names from AVAILABLE OPTIONS, suspicion scores, one-line discussion
+remarks) and can inject latency, server errors and 429 rate limiting. Like
+DeepSeek, it reports how many prompt tokens hit a prefix cache (matched in
+64-token blocks against recent prompts). It is
+used in-process when MAFIA_LLM_BACKEND=local, or served over HTTP so the real
+client can be pointed at it:
+
+    python -m game.local_llm --port 8008 --latency lognormal --latency-median 0.8
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8008/v1 DEEPSEEK_API_KEY=local python main.py
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+LATENCY_DISTRIBUTIONS = ("none", "fixed", "uniform", "exponential", "lognormal")
+
+# Prompt prefixes are cached in blocks of this many tokens (as DeepSeek does)
+PREFIX_BLOCK_TOKENS = 64
+
+
+class LocalLLMError(Exception):
+    """Injected API failure carrying an HTTP status code"""
+
+    def __init__(self, status_code: int, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class LocalLLM:
+    """Role-aware fake LLM with configurable latency and fault injection"""
+
+    DISCUSSION_LINES = {
+        "mafia": [
+            "I've been watching {a}, and their story keeps shifting. We should look closer.",
+            "Let's not rush this. {a} raised a fair point, but {b} has been very quiet.",
+            "Honestly, {a} seems too eager to push votes around. That feels off to me.",
+        ],
+        "detective": [
+            "{a}'s answers don't line up with how they voted. Can you explain that, {a}?",
+            "I've noticed a pattern: {a} and {b} keep defending each other.",
+            "Everyone should share who they suspect. {a}, you first.",
+        ],
+        "doctor": [
+            "We need to protect the people who are actually helping. {a} has been useful.",
+            "I'm worried about who gets targeted next. {a} is drawing a lot of attention.",
+            "Let's keep calm and look at the facts. {b} deflected every question so far.",
+        ],
+        "civilian": [
+            "I think {a} is suspicious. They keep changing the subject.",
+            "Why did {a} accuse {b} without any evidence? That's odd.",
+            "I trust {b} for now, but {a} needs to explain themselves.",
+        ],
+        "narrator": [
+            "The village grows restless as the shadows lengthen.",
+        ],
+    }
+
+    MAFIA_LINES = [
+        "Let's target {a} tonight; they're asking too many questions. Stay quiet about each other today.",
+        "{a} is getting close. We split our votes so it doesn't look coordinated.",
+    ]
+
+    def __init__(
+        self,
+        latency: str = "lognormal",
+        latency_median: float = 0.8,
+        latency_sigma: float = 0.5,
+        latency_max: float = 10.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None,
+        prefix_cache_blocks: int = 8192,
+    ):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{latency}'. "
+                f"Choose from: {', '.join(LATENCY_DISTRIBUTIONS)}"
+            )
+
+        self.latency = latency
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.latency_max = latency_max
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+        # LRU of hashed prompt prefixes, one entry per cached block
+        self.prefix_cache_blocks = prefix_cache_blocks
+        self._prefixes: OrderedDict = OrderedDict()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def sample_latency(self) -> float:
+        """Draw a response latency in seconds from the configured distribution"""
+        with self._lock:
+            if self.latency == "none":
+                delay = 0.0
+            elif self.latency == "fixed":
+                delay = self.latency_median
+            elif self.latency == "uniform":
+                delay = self.rng.uniform(0, 2 * self.latency_median)
+            elif self.latency == "exponential":
+                delay = self.rng.expovariate(math.log(2) / self.latency_median)
+            else:  # lognormal
+                delay = self.rng.lognormvariate(
+                    math.log(self.latency_median), self.latency_sigma
+                )
+        return min(delay, self.latency_max)
+
+    def check_faults(self):
+        """Raise an injected failure according to the configured rates"""
+        with self._lock:
+            self.requests += 1
+            roll = self.rng.random()
+            if roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                raise LocalLLMError(
+                    429, "Rate limit reached (injected)", self.retry_after
+                )
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                raise LocalLLMError(500, "Internal server error (injected)")
+
+    def create(
+        self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 150
+    ):
+        """Blocking chat completion"""
+        time.sleep(self.sample_latency())
+        self.check_faults()
+        return _to_namespace(self.respond(messages, max_tokens))
+
+    async def acreate(
+        self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 150
+    ):
+        """Non-blocking chat completion"""
+        await asyncio.sleep(self.sample_latency())
+        self.check_faults()
+        return _to_namespace(self.respond(messages, max_tokens))
+
+    def respond(self, messages: List[Dict], max_tokens: int = 150) -> Dict:
+        """Build a chat-completions payload answering the given messages"""
+        system = "\n".join(m["content"] for m in messages if m["role"] == "system")
+        prompt = "\n".join(m["content"] for m in messages if m["role"] != "system")
+
+        content = self.generate_reply(system, prompt)
+        words = content.split()
+        if len(words) > max_tokens:
+            content = " ".join(words[:max_tokens])
+
+        prompt_tokens = _count_tokens(system) + _count_tokens(prompt)
+        completion_tokens = _count_tokens(content)
+        cached_tokens = min(self.match_prefix(messages), prompt_tokens)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "local-stand-in",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_cache_hit_tokens": cached_tokens,
+                "prompt_cache_miss_tokens": prompt_tokens - cached_tokens,
+            },
+        }
+
+    def match_prefix(self, messages: List[Dict]) -> int:
+        """Count prompt tokens served from the prefix cache, then cache them
+
+        A block is a hit only if every block before it was too, so only a
+        shared leading prefix counts, as with provider-side caching.
+        """
+        text = "".join(f"{m['role']}\n{m['content']}\n" for m in messages)
+        block_chars = PREFIX_BLOCK_TOKENS * 4
+        digest = hashlib.sha1()
+        cached = 0
+        hit = True
+        with self._lock:
+            for start in range(0, len(text) - block_chars + 1, block_chars):
+                digest.update(text[start : start + block_chars].encode("utf-8"))
+                key = digest.digest()
+                if hit and key in self._prefixes:
+                    self._prefixes.move_to_end(key)
+                    cached += PREFIX_BLOCK_TOKENS
+                else:
+                    hit = False
+                    self._prefixes[key] = None
+            while len(self._prefixes) > self.prefix_cache_blocks:
+                self._prefixes.popitem(last=False)
+        return cached
+
+    def generate_reply(self, system: str, prompt: str) -> str:
+        """Produce a plausible answer for the prompt"""
+        role_match = re.search(r"playing the Mafia game as a (\w+)", system)
+        role = role_match.group(1) if role_match else "civilian"
+
+        options = _parse_list(prompt, r"AVAILABLE OPTIONS: (.+)")
+        if options and "TARGET: <name>" in prompt:
+            target = self._choice(options)
+            return f"TARGET: {target}\nRATIONALE: {target} is the biggest threat to us."
+        if options:
+            return self._choice(options)
+
+        if re.search(r"Rate 1-10|Return ONLY the number", prompt):
+            with self._lock:
+                return str(self.rng.randint(1, 10))
+
+        choices = re.search(r"Return: ([A-Z_, ]+(?: or [A-Z_]+)?)\s*$", prompt, re.M)
+        if choices:
+            return self._choice(re.split(r",\s*(?:or\s+)?|\s+or\s+", choices.group(1)))
+
+        alive = _parse_list(prompt, r"ALIVE PLAYERS: (.+)")
+        name_match = re.search(r"You are (\w+), playing", system)
+        me = name_match.group(1) if name_match else None
+        others = [p for p in alive if p != me] or ["everyone"]
+
+        if "PRIVATE MAFIA DISCUSSION" in prompt:
+            lines = self.MAFIA_LINES
+        else:
+            lines = self.DISCUSSION_LINES.get(role, self.DISCUSSION_LINES["civilian"])
+
+        line = self._choice(lines)
+        return line.format(a=self._choice(others), b=self._choice(others))
+
+    def _choice(self, items: List[str]) -> str:
+        with self._lock:
+            return self.rng.choice(items)
+
+    def get_stats(self) -> Dict:
+        """Get counters of requests served and faults injected"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+            }
+
+
+def _parse_list(text: str, pattern: str) -> List[str]:
+    """Parse the last comma-separated list matching pattern"""
+    matches = re.findall(pattern, text)
+    if not matches:
+        return []
+    return [item.strip() for item in matches[-1].split(",") if item.strip()]
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def _to_namespace(value):
+    """Convert a JSON-style payload into attribute-access objects"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def make_handler(llm: LocalLLM):
+    """Create an HTTP handler class serving chat completions from llm"""
+
+    class ChatCompletionsHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            time.sleep(llm.sample_latency())
+            try:
+                llm.check_faults()
+            except LocalLLMError as e:
+                headers = {}
+                if e.retry_after is not None:
+                    headers["Retry-After"] = f"{e.retry_after:g}"
+                self._send_json(
+                    e.status_code,
+                    {"error": {"message": str(e), "type": "injected_fault"}},
+                    headers,
+                )
+                return
+
+            payload = llm.respond(body.get("messages", []), body.get("max_tokens", 150))
+            self._send_json(200, payload)
+
+        def _send_json(self, status: int, payload: Dict, headers: Dict = None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # Keep load tests quiet
+
+    return ChatCompletionsHandler
+
+
+def serve(
+    llm: LocalLLM, host: str = "127.0.0.1", port: int = 8008
+) -> ThreadingHTTPServer:
+    """Create an HTTP server speaking the chat-completions API"""
+    server = ThreadingHTTPServer((host, port), make_handler(llm))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the LLM API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=0.8)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--latency-max", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--prefix-cache-blocks", type=int, default=8192)
+    args = parser.parse_args()
+
+    llm = LocalLLM(
+        latency=args.latency,
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        latency_max=args.latency_max,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        prefix_cache_blocks=args.prefix_cache_blocks,
+    )
+    server = serve(llm, args.host, args.port)
+    print(f"🧪 Local LLM stand-in listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Local LLM stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
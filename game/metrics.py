@@ -0,0 +1,249 @@
+"""
+Process-wide metrics in the Prometheus text format
+
+Counters, gauges and histograms with labels, kept in memory and rendered by
+render() for the Flask app's /metrics route. They cover every LLM call (agent,
+role, call type, outcome, latency and tokens), how many calls are queued or
+in flight, phase durations and tokens spent per game. There is no dependency
+on prometheus_client; the exposition format is simple enough to write here.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds; LLM calls range from cache hits to slow retries
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30, 60)
+PHASE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600)
+GAME_TOKEN_BUCKETS = (10_000, 50_000, 100_000, 200_000, 500_000, 1_000_000)
+
+
+class Metric:
+    """A named metric with one series per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing total"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that goes up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with sum and count"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                index = len(self.buckets)
+            series[index] += 1
+            series[-1] += value
+
+    def _render_series(self, key: Tuple[str, ...], series) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+            cumulative += count
+            le = 'le="' + ("+Inf" if bound == math.inf else _format_value(bound)) + '"'
+            lines.append(
+                f"{self.name}_bucket{self._format_labels(key, le)} {cumulative}"
+            )
+        lines.append(
+            f"{self.name}_sum{self._format_labels(key)} {_format_value(series[-1])}"
+        )
+        lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# Metrics shared by every game in the process
+REGISTRY = MetricsRegistry()
+
+LLM_CALLS = REGISTRY.counter(
+    "mafia_llm_calls_total",
+    "Agent LLM decisions by outcome (ok, fallback or timeout)",
+    ("agent", "role", "call_type", "outcome"),
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "mafia_llm_call_seconds",
+    "Agent LLM decision latency, including queueing and retries",
+    ("role", "call_type"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "mafia_llm_tokens_total",
+    "Tokens used by upstream LLM calls (kind: prompt, completion or cached)",
+    ("role", "call_type", "kind"),
+)
+LLM_QUEUED = REGISTRY.gauge(
+    "mafia_llm_queued_calls",
+    "LLM calls waiting for the rate limiter or a free per-game slot",
+)
+LLM_INFLIGHT = REGISTRY.gauge(
+    "mafia_llm_inflight_calls",
+    "LLM calls currently sent upstream",
+)
+PHASE_SECONDS = REGISTRY.histogram(
+    "mafia_phase_seconds",
+    "Wall time of each game phase",
+    ("phase",),
+    PHASE_BUCKETS,
+)
+GAMES_FINISHED = REGISTRY.counter(
+    "mafia_games_finished_total",
+    "Games that ended, by winner (none when stopped early)",
+    ("winner",),
+)
+GAME_TOKENS = REGISTRY.histogram(
+    "mafia_game_tokens",
+    "Prompt plus completion tokens spent per finished game",
+    (),
+    GAME_TOKEN_BUCKETS,
+)
+GAMES_RUNNING = REGISTRY.gauge(
+    "mafia_games_running",
+    "Games currently playing",
+)
+
+for _gauge in (LLM_QUEUED, LLM_INFLIGHT, GAMES_RUNNING):
+    _gauge.set(0)
+
+
+def render() -> str:
+    """Render the process-wide metrics"""
+    return REGISTRY.render()
@@ -0,0 +1,157 @@
+"""
+Token-bucket rate limiting for LLM calls
+
+One RateLimiter is shared by every game in the process. Each key (normally the
+model name) has a requests/sec bucket and a tokens/min bucket. Callers reserve
+capacity up front and are told how long to wait, so waiting works the same
+from a thread (time.sleep) or a coroutine (asyncio.sleep) without polling.
+A 429 with Retry-After pauses the whole key until the provider allows traffic
+again.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    """Bucket refilled at `rate` units per second, holding at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take `amount` units and return the seconds until they are covered
+
+        The level may go negative: later callers queue behind earlier
+        reservations, which keeps waiting first-come, first-served.
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float):
+        """Return (or, if negative, take) units after the real cost is known"""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Shared requests/sec and tokens/min limiter with per-key buckets"""
+
+    def __init__(
+        self,
+        requests_per_second: float,
+        tokens_per_minute: float,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        overrides: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.overrides = overrides or {}  # key -> (requests/sec, tokens/min)
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._blocked_until: Dict[str, float] = {}
+
+        # Counters
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rate_limited = 0
+
+    def _get_buckets(self, key: str) -> Tuple[TokenBucket, TokenBucket]:
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            rps, tpm = self.overrides.get(
+                key, (self.requests_per_second, self.tokens_per_minute)
+            )
+            buckets = (
+                TokenBucket(rps, max(1.0, rps)),
+                TokenBucket(tpm / 60.0, tpm),
+            )
+            self._buckets[key] = buckets
+        return buckets
+
+    def reserve(self, key: str = "default", tokens: int = 0) -> float:
+        """Reserve one request and `tokens` tokens; return the seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            requests, token_bucket = self._get_buckets(key)
+            delay = max(
+                requests.reserve(1, now),
+                token_bucket.reserve(tokens, now),
+                self._blocked_until.get(key, 0.0) - now,
+            )
+
+            self.acquired += 1
+            if delay > 0:
+                self.waits += 1
+                self.wait_seconds += delay
+            return max(0.0, delay)
+
+    def acquire(self, key: str = "default", tokens: int = 0):
+        """Block the calling thread until the request may be sent"""
+        delay = self.reserve(key, tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, key: str = "default", tokens: int = 0):
+        """Wait on the event loop until the request may be sent"""
+        delay = self.reserve(key, tokens)
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Abandoned before sending (e.g. by a response timeout)
+                self.release(key, tokens)
+                raise
+
+    def release(self, key: str = "default", tokens: int = 0):
+        """Give back a reservation whose request was never sent"""
+        with self._lock:
+            requests, token_bucket = self._get_buckets(key)
+            requests.refund(1)
+            token_bucket.refund(tokens)
+
+    def settle(self, key: str, estimated: int, actual: int):
+        """Correct the token bucket once the real usage is known"""
+        with self._lock:
+            self._get_buckets(key)[1].refund(estimated - actual)
+
+    def penalize(self, key: str, retry_after: Optional[float]):
+        """Record a 429 and hold back the key for `retry_after` seconds"""
+        with self._lock:
+            self.rate_limited += 1
+            if retry_after:
+                until = time.monotonic() + retry_after
+                self._blocked_until[key] = max(self._blocked_until.get(key, 0), until)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        if retry_after:
+            return retry_after
+        delay = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return delay * random.uniform(0.5, 1.0)  # jitter avoids retry stampedes
+
+    def get_stats(self) -> Dict:
+        """Get limiter counters"""
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "rate_limited": self.rate_limited,
+                "keys": len(self._buckets),
+            }
@@ -0,0 +1,236 @@
+"""
+Span tracing of a game's phases, agent turns and LLM requests
+
+A Tracer writes one JSON line per finished span to a per-game trace file.
+Each span has a name, start and end times, the thread and asyncio task it ran
+on, its parent span, an outcome (ok, error, timeout, cancelled or a value set
+by the code, such as fallback) and free-form attributes. The current tracer
+and span live in context variables, so spans opened in tasks created by
+asyncio.gather or create_task nest under the span that created them, and
+code far from the controller (the LLM client) can add spans without being
+handed the tracer. With no active tracer, span() does nothing.
+
+Convert a trace for chrome://tracing or https://ui.perfetto.dev with:
+
+    python -m game.tracing traces/<game id>.jsonl -o trace.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+_tracer: contextvars.ContextVar = contextvars.ContextVar("tracer", default=None)
+_current: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+
+class Span:
+    """One timed operation"""
+
+    __slots__ = ("span_id", "parent_id", "name", "start", "end", "outcome", "attrs")
+
+    def __init__(self, span_id: int, parent_id: Optional[int], name: str, attrs: Dict):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.outcome = "ok"
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Add attributes to the span"""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Writes the spans of one game to a JSONL file"""
+
+    def __init__(self, game_id: str, path: str):
+        self.game_id = game_id
+        self.path = path
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def for_game(cls, game_id: str, trace_dir: Optional[str]) -> Optional["Tracer"]:
+        """Tracer writing to trace_dir/<game id>.jsonl, or None when disabled"""
+        if not trace_dir:
+            return None
+        return cls(game_id, os.path.join(trace_dir, f"{game_id}.jsonl"))
+
+    def start(self, name: str, attrs: Dict) -> Span:
+        parent = _current.get()
+        return Span(next(self._ids), parent.span_id if parent else None, name, attrs)
+
+    def finish(self, span: Span):
+        span.end = time.time()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        record = {
+            "game_id": self.game_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "start": span.start,
+            "end": span.end,
+            "duration": span.end - span.start,
+            "thread": threading.current_thread().name,
+            "task": task.get_name() if task else None,
+            "outcome": span.outcome,
+            "attrs": span.attrs,
+        }
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """Make `tracer` the current tracer for this context"""
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+        if tracer is not None:
+            tracer.close()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span"""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield None
+        return
+
+    current = tracer.start(name, attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except asyncio.TimeoutError:
+        current.outcome = "timeout"
+        raise
+    except asyncio.CancelledError:
+        current.outcome = "cancelled"
+        raise
+    except BaseException as e:
+        current.outcome = "error"
+        current.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        tracer.finish(current)
+
+
+async def traced(coro, name: str, **attrs):
+    """Await a coroutine inside a span"""
+    with span(name, **attrs):
+        return await coro
+
+
+def annotate(**attrs):
+    """Add attributes to the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def set_outcome(outcome: str, **attrs):
+    """Set the outcome (and attributes) of the current span, if any"""
+    current = _current.get()
+    if current is not None:
+        current.outcome = outcome
+        current.attrs.update(attrs)
+
+
+def read_trace(path: str) -> List[Dict]:
+    """Load the spans of a JSONL trace"""
+    with open(path, encoding="utf-8") as trace:
+        return [json.loads(line) for line in trace if line.strip()]
+
+
+def to_chrome_trace(spans: List[Dict]) -> Dict:
+    """Convert spans to the Chrome trace-event format
+
+    Each game becomes a process and each asyncio task (or thread, outside a
+    loop) a track, so concurrent agent turns show side by side.
+    """
+    events = []
+    pids: Dict[str, int] = {}
+    tids: Dict[tuple, int] = {}
+
+    for record in sorted(spans, key=lambda r: r["start"]):
+        pid = pids.setdefault(record["game_id"], len(pids) + 1)
+        track = record["task"] or record["thread"]
+        if (pid, track) not in tids:
+            tids[(pid, track)] = len(tids) + 1
+            events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": pid,
+                    "tid": tids[(pid, track)],
+                    "args": {"name": f"{track} ({record['thread']})"},
+                }
+            )
+        events.append(
+            {
+                "ph": "X",
+                "name": record["name"],
+                "cat": record["outcome"],
+                "ts": record["start"] * 1e6,
+                "dur": record["duration"] * 1e6,
+                "pid": pid,
+                "tid": tids[(pid, track)],
+                "args": dict(
+                    record["attrs"],
+                    outcome=record["outcome"],
+                    span_id=record["span_id"],
+                    parent_id=record["parent_id"],
+                ),
+            }
+        )
+
+    for game_id, pid in pids.items():
+        events.append(
+            {"ph": "M", "name": "process_name", "pid": pid, "args": {"name": game_id}}
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert game traces to the Chrome trace-event format"
+    )
+    parser.add_argument("traces", nargs="+", help="JSONL trace files")
+    parser.add_argument("-o", "--output", default="trace.json")
+    args = parser.parse_args()
+
+    spans = [record for path in args.traces for record in read_trace(path)]
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(to_chrome_trace(spans), output)
+    print(f"📈 Wrote {len(spans)} spans to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
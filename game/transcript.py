@@ -0,0 +1,170 @@
+"""
+Recorded LLM transcripts for deterministic game replays
+
+A TranscriptRecorder writes one JSONL file per game: a header with the seed
+of the controller's RNG (player order, roles, speakers, spokespeople), then
+every LLM request an agent made with its reply, or the error or timeout it
+ended in, plus how many rounds each discussion ran. A TranscriptReplay feeds
+those replies back by request, so a replayed game makes no network calls and
+runs at CPU speed while taking the same path as the recorded one.
+
+Replies are looked up by a hash of the request rather than by position, as
+concurrent calls (votes, night actions, drafted lines) finish in any order.
+The key leaves out the model, so a transcript replays under any backend.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from .llm_cache import LLMCache
+
+
+class ReplayMismatch(Exception):
+    """A replayed game made a request the transcript has no reply for"""
+
+
+class RecordedTimeout(Exception):
+    """The recorded request was abandoned before it returned"""
+
+
+# response_timeout during replays: replies come back at once, so only requests
+# recorded as timed out (which never return) wait this long
+REPLAY_RESPONSE_TIMEOUT = 0.5
+
+
+def request_key(messages: List[Dict], temperature: float) -> str:
+    """Key identifying a request across recording and replay"""
+    return LLMCache.make_key("", messages, temperature)
+
+
+class TranscriptRecorder:
+    """Appends a game's LLM requests and replies to a JSONL file"""
+
+    def __init__(self, path: str, header: Dict):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8")
+        self._write(dict(header, type="game"))
+
+    @classmethod
+    def for_game(
+        cls, game_id: str, transcript_dir: Optional[str], header: Dict
+    ) -> Optional["TranscriptRecorder"]:
+        """Recorder writing to transcript_dir/<game id>.jsonl, or None when off"""
+        if not transcript_dir:
+            return None
+        return cls(os.path.join(transcript_dir, f"{game_id}.jsonl"), header)
+
+    def _write(self, entry: Dict):
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+
+    def record_call(
+        self,
+        key: str,
+        messages: List[Dict],
+        call_type: str,
+        role: str,
+        reply: Optional[str] = None,
+        error: Optional[BaseException] = None,
+    ):
+        """Log one request with its reply, or how it failed"""
+        entry = {
+            "type": "llm",
+            "key": key,
+            "call_type": call_type,
+            "role": role,
+            "messages": messages,
+        }
+        if error is None:
+            entry["reply"] = reply
+        elif isinstance(error, Exception):
+            entry["error"] = f"{type(error).__name__}: {error}"
+        else:
+            entry["timeout"] = True  # cancelled, e.g. by response_timeout
+        self._write(entry)
+
+    def record_discussion(self, rounds: int):
+        """Log how many follow-up rounds a discussion ran"""
+        self._write({"type": "discussion", "rounds": rounds})
+
+    def record_result(self, result: Dict):
+        """Log how the game ended"""
+        self._write(dict(result, type="result"))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TranscriptReplay:
+    """Serves the replies of a recorded game"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.header: Dict = {}
+        self.result: Optional[Dict] = None
+        self._calls: Dict[str, Deque[Dict]] = {}
+        self._discussions: Deque[int] = deque()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.replayed = 0
+        self.misses = 0
+
+        with open(path, encoding="utf-8") as transcript:
+            for line in transcript:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                kind = entry.pop("type")
+                if kind == "game":
+                    self.header = entry
+                elif kind == "llm":
+                    self._calls.setdefault(entry["key"], deque()).append(entry)
+                elif kind == "discussion":
+                    self._discussions.append(entry["rounds"])
+                elif kind == "result":
+                    self.result = entry
+
+    @property
+    def seed(self) -> int:
+        return self.header["seed"]
+
+    def reply(self, key: str) -> str:
+        """The recorded reply to a request, raising what the request raised"""
+        with self._lock:
+            recorded = self._calls.get(key)
+            if not recorded:
+                self.misses += 1
+                raise ReplayMismatch(f"No recorded reply for request {key[:12]}")
+            entry = recorded.popleft()
+            self.replayed += 1
+
+        if entry.get("timeout"):
+            raise RecordedTimeout(f"Request {key[:12]} timed out when recorded")
+        if "error" in entry:
+            raise RuntimeError(f"Recorded error: {entry['error']}")
+        return entry["reply"]
+
+    def discussion_rounds(self, default: int) -> int:
+        """Rounds the next recorded discussion ran"""
+        with self._lock:
+            return self._discussions.popleft() if self._discussions else default
+
+    def get_stats(self) -> Dict:
+        """Get replay counters"""
+        with self._lock:
+            return {
+                "replayed": self.replayed,
+                "misses": self.misses,
+                "unused": sum(len(calls) for calls in self._calls.values()),
+            }
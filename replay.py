@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Replay recorded Mafia games without calling the LLM
+
+Games played with MAFIA_TRANSCRIPT_DIR set write a transcript of every LLM
+reply and the seed behind the controller's random choices. This script plays
+those games again from their transcripts, with no network calls and no
+pauses, and checks that each replay ends exactly as the recording did.
+
+    MAFIA_TRANSCRIPT_DIR=transcripts python simulate.py --games 10
+    python replay.py transcripts/*.jsonl
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+# Replays never reach an LLM; don't require an API key
+os.environ.setdefault("MAFIA_LLM_BACKEND", "local")
+
+# Add the current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+
+async def replay_game(path: str) -> Dict:
+    """Replay one transcript and compare the outcome with the recording"""
+    from game.game_controller import MafiaGameController
+
+    controller = MafiaGameController(replay=path)
+    started = time.perf_counter()
+    try:
+        await controller.start_game()
+    finally:
+        controller.game_running = False
+
+    recorded = controller.replay.result
+    result = controller.get_result()
+    return {
+        "path": path,
+        "seed": controller.seed,
+        "result": result,
+        "matches": recorded is None
+        or all(result[field] == recorded.get(field) for field in result),
+        "replay": controller.replay.get_stats(),
+        "wall_time": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded Mafia games")
+    parser.add_argument("transcripts", nargs="+", help="transcript JSONL files")
+    parser.add_argument(
+        "--verbose", action="store_true", help="show game narration while replaying"
+    )
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.transcripts:
+        stdout = sys.stdout
+        if not args.verbose:
+            sys.stdout = open(os.devnull, "w")
+        try:
+            outcome = asyncio.run(replay_game(path))
+        finally:
+            if sys.stdout is not stdout:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+        stats = outcome["replay"]
+        ok = outcome["matches"] and not stats["misses"]
+        failed += not ok
+        print(
+            f"{'✅' if ok else '❌'} {path}: {outcome['result']['winner'] or 'no winner'} "
+            f"after {outcome['result']['days']} days, "
+            f"{stats['replayed']} replies replayed, {stats['misses']} missing, "
+            f"{outcome['wall_time']:.2f}s"
+        )
+
+    if failed:
+        print(f"❌ {failed} of {len(args.transcripts)} replays diverged")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
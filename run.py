@@ -45,8 +45,8 @@ def check_environment():
     """Check if environment is properly configured"""
     issues = []
 
-    # Check for DeepSeek API key
-    if not os.getenv("DEEPSEEK_API_KEY"):
+    # Check for DeepSeek API key (not needed with the offline stand-in)
+    if not os.getenv("DEEPSEEK_API_KEY") and os.getenv("MAFIA_LLM_BACKEND") != "local":
         issues.append("DEEPSEEK_API_KEY environment variable not set")
 
     # Check if config file exists
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Headless batch simulation for the Mafia Multi-Agent Game
+
+Runs many games with no frontend, spread across a pool of worker processes.
+Each worker plays several games at once on its own event loop. Per-game
+results are streamed to a JSONL file as they finish, and aggregate win rates
+and throughput are printed at the end.
+
+    MAFIA_LLM_BACKEND=local python simulate.py --games 1000 --workers 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add the current directory to Python path
+current_dir = Path(__file__).parent
+sys.path.insert(0, str(current_dir))
+
+
+def init_worker(workers: int, use_cache: bool, verbose: bool):
+    """Prepare a worker process before its first game"""
+    from config import LLM_CONFIG, RATE_LIMIT_CONFIG
+
+    # Each process has its own limiter; split the account-wide budget
+    RATE_LIMIT_CONFIG["requests_per_second"] /= workers
+    RATE_LIMIT_CONFIG["tokens_per_minute"] /= workers
+    LLM_CONFIG["cache_enabled"] = use_cache
+
+    if not verbose:
+        # Games narrate every step to stdout; keep batch runs quiet
+        sys.stdout = open(os.devnull, "w")
+
+
+async def play_game(index: int, pacing: str, max_days: Optional[int]) -> Dict:
+    """Play one headless game and summarize it"""
+    from game.game_controller import MafiaGameController
+
+    controller = MafiaGameController(pacing=pacing, max_days=max_days)
+    result = {"index": index, "game_id": controller.game_id, "error": None}
+
+    started = time.perf_counter()
+    try:
+        await controller.start_game()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        controller.game_running = False
+    wall_time = time.perf_counter() - started
+
+    state = controller.game_state
+    usage = controller.llm.get_stats()
+    result.update(
+        {
+            "winner": state.check_win_condition(),
+            "days": state.day_count,
+            "eliminations": [
+                {
+                    "player": event["player"],
+                    "role": event["role"],
+                    "phase": event["phase"],
+                    "day": event["day"],
+                }
+                for event in state.game_log
+                if event["type"] == "elimination"
+            ],
+            "llm_calls": usage["calls"],
+            "llm_errors": usage["errors"],
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "cache_hits": usage["cache_hits"],
+            "cached_tokens": usage["cached_tokens"],
+            "retries": usage["retries"],
+            "wall_time": round(wall_time, 3),
+        }
+    )
+    return result
+
+
+def run_worker(
+    indexes: List[int],
+    concurrency: int,
+    pacing: str,
+    max_days: Optional[int],
+    results,
+) -> int:
+    """Play a share of the batch, at most `concurrency` games at a time"""
+
+    async def run_all():
+        from game.llm_client import get_llm_pool
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_one(index: int):
+            async with semaphore:
+                results.put(await play_game(index, pacing, max_days))
+
+        try:
+            await asyncio.gather(*(run_one(index) for index in indexes))
+        finally:
+            await get_llm_pool().aclose()
+
+    asyncio.run(run_all())
+    return len(indexes)
+
+
+def summarize(results: List[Dict], elapsed: float) -> Dict:
+    """Aggregate win rates and throughput over finished games"""
+    games = len(results)
+    winners = Counter(r["winner"] or "undecided" for r in results)
+    calls = sum(r["llm_calls"] for r in results)
+    tokens = sum(r["prompt_tokens"] + r["completion_tokens"] for r in results)
+    prompt_tokens = sum(r["prompt_tokens"] for r in results)
+    cached_tokens = sum(r["cached_tokens"] for r in results)
+    decided = [r for r in results if r["winner"]]
+
+    return {
+        "games": games,
+        "errors": sum(1 for r in results if r["error"]),
+        "win_rates": {
+            winner: round(count / games, 4) for winner, count in winners.items()
+        },
+        "mean_days": (
+            round(sum(r["days"] for r in decided) / len(decided), 2) if decided else 0.0
+        ),
+        "llm_calls": calls,
+        "tokens": tokens,
+        "prompt_cache_hit_rate": (
+            round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0
+        ),
+        "mean_game_seconds": (
+            round(sum(r["wall_time"] for r in results) / games, 2) if games else 0.0
+        ),
+        "elapsed_seconds": round(elapsed, 2),
+        "games_per_minute": round(games / elapsed * 60, 2) if elapsed else 0.0,
+        "calls_per_second": round(calls / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def print_summary(summary: Dict):
+    """Print the aggregate results"""
+    print("=" * 50)
+    print(f"🎲 Games: {summary['games']} ({summary['errors']} errors)")
+    for winner, rate in sorted(summary["win_rates"].items()):
+        print(f"🏆 {winner}: {rate:.1%}")
+    print(f"📅 Mean days (decided games): {summary['mean_days']}")
+    print(f"🤖 LLM calls: {summary['llm_calls']} ({summary['tokens']} tokens)")
+    print(f"🧊 Prompt cache hit rate: {summary['prompt_cache_hit_rate']:.1%}")
+    print(
+        f"⚡ {summary['games_per_minute']} games/min, "
+        f"{summary['calls_per_second']} calls/s "
+        f"over {summary['elapsed_seconds']}s"
+    )
+    print("=" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless Mafia games in batch")
+    parser.add_argument("--games", type=int, default=100, help="games to play")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="worker processes"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="games at once per worker"
+    )
+    parser.add_argument("--output", default="simulation_results.jsonl")
+    parser.add_argument(
+        "--pacing", default="turbo", help="pacing profile from config.py"
+    )
+    parser.add_argument(
+        "--max-days", type=int, default=20, help="stop undecided games (0 = never)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="disable the LLM response cache so every game samples fresh replies",
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="show game narration from workers"
+    )
+    args = parser.parse_args()
+
+    workers = max(1, min(args.workers, args.games))
+    shares = [list(range(i, args.games, workers)) for i in range(workers)]
+
+    print(f"🎭 Simulating {args.games} games on {workers} workers")
+    print(f"📝 Writing results to {args.output}")
+
+    finished: List[Dict] = []
+    started = time.perf_counter()
+
+    with Manager() as manager, open(args.output, "w") as output:
+        results = manager.Queue()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initargs=(workers, not args.no_cache, args.verbose),
+            initializer=init_worker,
+        ) as executor:
+            futures = [
+                executor.submit(
+                    run_worker,
+                    share,
+                    args.concurrency,
+                    args.pacing,
+                    args.max_days or None,
+                    results,
+                )
+                for share in shares
+            ]
+
+            # Stream results as games finish
+            while len(finished) < args.games:
+                try:
+                    result = results.get(timeout=1)
+                except queue.Empty:
+                    failed = [f for f in futures if f.done() and f.exception()]
+                    if failed:
+                        raise failed[0].exception()
+                    continue
+
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                finished.append(result)
+
+                if len(finished) % max(1, args.games // 20) == 0:
+                    print(f"   {len(finished)}/{args.games} games done")
+
+    print_summary(summarize(finished, time.perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main()
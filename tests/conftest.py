@@ -0,0 +1,7 @@
+"""Shared setup: run every test against the offline LLM stand-in"""
+
+import os
+
+# Set before config is imported, so no API key is needed and nothing waits
+os.environ["MAFIA_LLM_BACKEND"] = "local"
+os.environ["MAFIA_LOCAL_LATENCY"] = "none"
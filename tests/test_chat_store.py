@@ -0,0 +1,122 @@
+import pytest
+
+from game.chat_store import ChatMessage, ChatStore
+
+
+def make_message(seq, sender="Alice", chat_type="public", targets=(), day=1):
+    return ChatMessage(
+        seq, sender, f"message {seq}", chat_type, targets, 1000.0 + seq, "day", day
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ChatStore(capacity=4, spill_dir=str(tmp_path))
+    yield store
+    store.close()
+
+
+def fill(store, count):
+    for seq in range(count):
+        store.append(make_message(seq))
+
+
+def test_ring_keeps_newest_and_spills_the_rest(store, tmp_path):
+    fill(store, 10)
+
+    assert len(store) == 10
+    assert store.first_in_memory == 6
+    assert len(list(tmp_path.iterdir())) == 1
+    assert [m.seq for m in store] == list(range(10))
+    # Spilled messages come back from the file with every field intact
+    spilled = store[2]
+    assert (spilled.seq, spilled.message, spilled.timestamp) == (2, "message 2", 1002.0)
+
+
+def test_indexing_across_ring_and_spill(store):
+    fill(store, 10)
+
+    assert store[0].seq == 0
+    assert store[9].seq == 9
+    assert store[-1].seq == 9
+    assert store[-10].seq == 0
+    with pytest.raises(IndexError):
+        store[10]
+    with pytest.raises(IndexError):
+        store[-11]
+
+
+@pytest.mark.parametrize(
+    "key",
+    [
+        slice(None),
+        slice(-3, None),
+        slice(3, 8),
+        slice(-8, -2),
+        slice(None, None, 2),
+        slice(1, 9, 3),
+        slice(None, None, -1),
+        slice(8, 2, -2),
+        slice(-1, -20, -3),
+        slice(5, 5),
+    ],
+)
+def test_slices_match_a_list(store, key):
+    fill(store, 10)
+    expected = list(range(10))[key]
+    assert [m.seq for m in store[key]] == expected
+
+
+def test_query_filters_in_memory_messages(tmp_path):
+    store = ChatStore(capacity=8, spill_dir=str(tmp_path))
+    store.append(make_message(0, "Alice", day=1))
+    store.append(make_message(1, "Bob", day=1))
+    store.append(make_message(2, "Alice", day=2))
+    store.append(make_message(3, "Bob", day=2))
+
+    assert [m.seq for m in store.query(sender="Alice")] == [0, 2]
+    assert [m.seq for m in store.query(day=2)] == [2, 3]
+    assert [m.seq for m in store.query(limit=1, sender="Bob")] == [3]
+    assert [m.seq for m in store.query(day=1, sender="Bob")] == [1]
+
+
+def test_query_viewer_merges_public_and_recipient_messages(tmp_path):
+    store = ChatStore(capacity=8, spill_dir=str(tmp_path))
+    store.append(make_message(0, "Narrator"))
+    store.append(make_message(1, "Alice", "mafia", ["Bob"]))
+    store.append(make_message(2, "Carol", "private", ["Dave"]))
+    store.append(make_message(3, "Narrator", "private", ["Bob"]))
+    store.append(make_message(4, "Eve"))
+
+    assert [m.seq for m in store.query(viewer="Bob")] == [0, 1, 3, 4]
+    assert [m.seq for m in store.query(viewer="Alice")] == [0, 1, 4]
+    assert [m.seq for m in store.query(viewer="Dave")] == [0, 2, 4]
+    assert [m.seq for m in store.query(limit=2, viewer="Bob")] == [3, 4]
+
+
+def test_query_skips_spilled_messages(store):
+    fill(store, 10)
+    assert [m.seq for m in store.query()] == [6, 7, 8, 9]
+    assert [m.seq for m in store.query(sender="Alice")] == [6, 7, 8, 9]
+
+
+def test_reads_after_close(store, tmp_path):
+    fill(store, 10)
+    store.close()
+
+    assert list(tmp_path.iterdir()) == []
+    assert store[-1].seq == 9
+    assert [m.seq for m in store[6:]] == [6, 7, 8, 9]
+    with pytest.raises(IndexError):
+        store[0]
+    with pytest.raises(IndexError):
+        store[:]
+
+
+def test_close_can_keep_the_spill_file(tmp_path):
+    store = ChatStore(capacity=2, spill_dir=str(tmp_path))
+    fill(store, 5)
+    store.close(delete=False)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    assert [m.seq for m in store] == list(range(5))
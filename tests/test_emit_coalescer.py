@@ -0,0 +1,145 @@
+import asyncio
+import threading
+
+from frontend.emit_coalescer import EmitCoalescer, coalesce
+
+
+def patch(start, end, **fields):
+    return {
+        "type": "state_patch",
+        "data": dict(fields, from_version=start, version=end),
+    }
+
+
+def snapshot(version):
+    return {"type": "game_state", "data": {"version": version}}
+
+
+def message(text):
+    return {"type": "new_message", "data": {"message": text}}
+
+
+class Recorder:
+    def __init__(self):
+        self.frames = []
+        self.sent = threading.Event()
+
+    def __call__(self, event, payload):
+        self.frames.append((event, payload))
+        self.sent.set()
+
+
+def test_zero_window_sends_each_update_at_once():
+    emit = Recorder()
+    emitter = EmitCoalescer(emit, window=0)
+
+    emitter.push("new_message", {"message": "hi"})
+    emitter.push("new_message", {"message": "there"})
+
+    assert [event for event, _ in emit.frames] == ["game_update", "game_update"]
+    assert emitter.get_stats()["frames"] == 2
+
+
+def test_updates_in_a_window_share_one_frame():
+    emit = Recorder()
+    emitter = EmitCoalescer(emit, window=60)
+
+    emitter.push("new_message", {"message": "hi"})
+    emitter.push("player_action", {"player": "Alice"})
+    assert emit.frames == []
+    emitter.flush()
+
+    assert emit.frames == [
+        (
+            "game_batch",
+            {
+                "updates": [
+                    message("hi"),
+                    {"type": "player_action", "data": {"player": "Alice"}},
+                ]
+            },
+        )
+    ]
+    assert emitter.get_stats() == {
+        "updates": 2,
+        "frames": 1,
+        "collapsed": 0,
+        "pending": 0,
+    }
+
+
+def test_single_update_is_sent_unwrapped():
+    emit = Recorder()
+    emitter = EmitCoalescer(emit, window=60)
+    emitter.push("new_message", {"message": "hi"})
+    emitter.flush()
+    emitter.flush()  # nothing left to send
+
+    assert emit.frames == [("game_update", message("hi"))]
+
+
+def test_window_flushes_from_a_thread():
+    emit = Recorder()
+    emitter = EmitCoalescer(emit, window=0.01)
+    emitter.push("new_message", {"message": "hi"})
+
+    assert emit.sent.wait(5)
+    assert emit.frames == [("game_update", message("hi"))]
+
+
+def test_window_flushes_on_the_event_loop():
+    emit = Recorder()
+    emitter = EmitCoalescer(emit, window=0.01)
+
+    async def push_and_wait():
+        emitter.push("new_message", {"message": "hi"})
+        await asyncio.sleep(0.05)
+
+    asyncio.run(push_and_wait())
+    assert emit.frames == [("game_update", message("hi"))]
+
+
+def test_consecutive_patches_merge_around_messages():
+    updates = [
+        patch(1, 2, phase="day"),
+        message("a"),
+        patch(2, 4, votes={"Alice": "Bob"}),
+        message("b"),
+    ]
+
+    assert coalesce(updates) == [
+        patch(1, 4, phase="day", votes={"Alice": "Bob"}),
+        message("a"),
+        message("b"),
+    ]
+
+
+def test_other_events_are_barriers():
+    action = {"type": "player_action", "data": {}}
+    updates = [patch(1, 2), action, patch(2, 3)]
+
+    assert coalesce(updates) == updates
+
+
+def test_patches_with_a_gap_are_kept_apart():
+    updates = [patch(1, 2), patch(5, 6)]
+    assert coalesce(updates) == updates
+
+
+def test_snapshot_drops_queued_state():
+    updates = [patch(1, 2), message("a"), snapshot(5), patch(3, 4), patch(5, 6)]
+
+    # The stale patch after the snapshot is covered by it; the next one follows
+    assert coalesce(updates) == [snapshot(5), message("a"), patch(5, 6)]
+
+
+def test_collapsed_updates_are_counted():
+    emit = Recorder()
+    emitter = EmitCoalescer(emit, window=60)
+    emitter.push("state_patch", patch(1, 2)["data"])
+    emitter.push("state_patch", patch(2, 3)["data"])
+    emitter.push("game_state", snapshot(3)["data"])
+    emitter.flush()
+
+    assert emit.frames == [("game_update", snapshot(3))]
+    assert emitter.get_stats()["collapsed"] == 2
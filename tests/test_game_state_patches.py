@@ -0,0 +1,143 @@
+import copy
+
+import pytest
+
+from game.game_state import GamePhase, GameState, merge_patches
+
+FIELDS = (
+    "version",
+    "phase",
+    "day_count",
+    "players",
+    "votes",
+    "chat_history",
+    "recent_events",
+)
+
+
+def apply_patch(snapshot, patch):
+    """Apply a patch the way the browser does (applyStatePatch in game.js)"""
+    assert patch["from_version"] == snapshot["version"]
+    state = copy.deepcopy(snapshot)
+    for key in ("phase", "day_count"):
+        if key in patch:
+            state[key] = patch[key]
+    if patch.get("votes_cleared"):
+        state["votes"] = {}
+        for info in state["players"].values():
+            info["votes_received"] = 0
+    for name, fields in patch.get("players", {}).items():
+        state["players"].setdefault(name, {}).update(fields)
+    state["votes"].update(patch.get("votes", {}))
+    state["chat_history"] = (state["chat_history"] + patch.get("messages", []))[-50:]
+    state["recent_events"] = (state["recent_events"] + patch.get("events", []))[-10:]
+    state["version"] = patch["version"]
+    return state
+
+
+def view(state):
+    return {field: state[field] for field in FIELDS}
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = GameState(chat_spill_dir=str(tmp_path))
+    for name, role in [("Alice", "mafia"), ("Bob", "detective"), ("Carol", "civilian")]:
+        state.add_player(name, role, None)
+    yield state
+    state.chat_history.close()
+
+
+# Changes of a day and the night after it, one call each
+STEPS = [
+    lambda s: setattr(s, "phase", GamePhase.DAY),
+    lambda s: setattr(s, "day_count", 1),
+    lambda s: s.add_chat_message("Alice", "Carol is suspicious"),
+    lambda s: s.add_vote("Alice", "Carol"),
+    lambda s: s.add_vote("Bob", "Alice"),
+    lambda s: s.add_vote("Bob", "Carol"),  # changed vote
+    lambda s: s.eliminate_player("Carol"),
+    lambda s: s.clear_votes(),
+    lambda s: s.add_vote("Alice", "Bob"),
+    lambda s: s.add_chat_message("Narrator", "Night falls", "private", ["Alice"]),
+    lambda s: setattr(s, "phase", GamePhase.NIGHT),
+]
+
+
+def play(state, steps=STEPS):
+    for step in steps:
+        step(state)
+
+
+def test_empty_patch_at_current_version(state):
+    assert state.diff_since(state.version) == {
+        "from_version": state.version,
+        "version": state.version,
+    }
+
+
+def test_patch_rebuilds_the_snapshot(state):
+    snapshot = state.to_dict()
+    play(state)
+
+    patch = state.diff_since(snapshot["version"])
+
+    assert patch["votes_cleared"] is True
+    assert patch["votes"] == {"Alice": "Bob"}
+    assert patch["phase"] == "night"
+    assert len(patch["messages"]) == 2
+    assert view(apply_patch(snapshot, patch)) == view(state.to_dict())
+
+
+def test_patch_only_carries_what_changed(state):
+    play(state, STEPS[:6])
+    version = state.version
+    state.add_vote("Carol", "Alice")
+
+    patch = state.diff_since(version)
+
+    assert patch == {
+        "from_version": version,
+        "version": state.version,
+        "players": {"Alice": {"votes_received": 2}},
+        "votes": {"Carol": "Alice"},
+    }
+
+
+def test_unknown_versions_need_a_snapshot(state, monkeypatch):
+    assert state.diff_since(state.version + 1) is None
+
+    # Journal no longer reaching back to version 0
+    monkeypatch.setattr("game.game_state.CHANGE_JOURNAL_SIZE", 4)
+    small = GameState()
+    for day in range(1, 8):
+        small.day_count = day
+    assert small.diff_since(0) is None
+    assert small.diff_since(small.version - 4) == {
+        "from_version": small.version - 4,
+        "version": small.version,
+        "day_count": 7,
+    }
+
+
+@pytest.mark.parametrize("split", range(len(STEPS) + 1))
+def test_merged_patches_equal_one_diff(state, split):
+    start = state.to_dict()
+    play(state, STEPS[:split])
+    first = state.diff_since(start["version"])
+    play(state, STEPS[split:])
+    second = state.diff_since(first["version"])
+
+    merged = merge_patches(first, second)
+
+    assert view(apply_patch(start, merged)) == view(state.to_dict())
+    assert merged == state.diff_since(start["version"])
+
+
+def test_merge_rejects_a_gap(state):
+    play(state, STEPS[:6])
+    first = state.diff_since(0)
+    play(state, STEPS[6:])
+    later = state.diff_since(first["version"] + 1)
+
+    assert merge_patches(first, later) is None
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from game.llm_cache import (
+    SOURCE_COALESCED,
+    SOURCE_DISK,
+    SOURCE_MEMORY,
+    SOURCE_UPSTREAM,
+    LLMCache,
+)
+
+
+def test_key_ignores_whitespace_but_not_temperature():
+    messages = [
+        {"role": "system", "content": "You are Alice"},
+        {"role": "user", "content": "Who  is\nsuspicious?"},
+    ]
+    spaced = [messages[0], {"role": "user", "content": " Who is suspicious? "}]
+
+    key = LLMCache.make_key("model", messages, 0.7)
+    assert LLMCache.make_key("model", spaced, 0.7) == key
+    assert LLMCache.make_key("model", messages, 0.2) != key
+    assert LLMCache.make_key("other", messages, 0.7) != key
+
+
+def test_miss_then_memory_hit():
+    cache = LLMCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "reply"
+
+    assert cache.get_or_compute("k", compute) == ("reply", SOURCE_UPSTREAM)
+    assert cache.get_or_compute("k", compute) == ("reply", SOURCE_MEMORY)
+    assert len(calls) == 1
+    stats = cache.get_stats()
+    assert (stats["misses"], stats["hits"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_lru_evicts_the_oldest_entry():
+    cache = LLMCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")  # now the newest
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == ("1", "3")
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_threads_share_one_call():
+    cache = LLMCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "reply"
+
+    with ThreadPoolExecutor(5) as pool:
+        owner = pool.submit(cache.get_or_compute, "k", compute)
+        assert started.wait(5)
+        waiters = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(4)]
+        release.set()
+        results = [owner.result(5)] + [w.result(5) for w in waiters]
+
+    assert len(calls) == 1
+    assert results[0] == ("reply", SOURCE_UPSTREAM)
+    # Waiters either joined the call or arrived after it was stored
+    assert {source for _, source in results[1:]} <= {SOURCE_COALESCED, SOURCE_MEMORY}
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_coroutines_share_one_call():
+    cache = LLMCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "reply"
+
+    async def ask_five():
+        return await asyncio.gather(
+            *(cache.aget_or_compute("k", compute) for _ in range(5))
+        )
+
+    results = asyncio.run(ask_five())
+
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == [SOURCE_COALESCED] * 4 + [
+        SOURCE_UPSTREAM
+    ]
+    assert cache.get_stats()["coalesced"] == 4
+
+
+def test_blocking_call_under_a_coroutine_on_its_thread_does_not_deadlock():
+    cache = LLMCache()
+
+    async def compute():
+        # The owner's thread asks for the same key synchronously while the
+        # coroutine is still in flight
+        return cache.get_or_compute("k", lambda: "inner")[0] + "-outer"
+
+    reply, source = asyncio.run(cache.aget_or_compute("k", compute))
+
+    assert (reply, source) == ("inner-outer", SOURCE_UPSTREAM)
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_failure_reaches_waiters_and_is_not_cached():
+    cache = LLMCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("upstream down")
+
+    with ThreadPoolExecutor(2) as pool:
+        owner = pool.submit(cache.get_or_compute, "k", failing)
+        assert started.wait(5)
+        waiter = pool.submit(cache.get_or_compute, "k", failing)
+        release.set()
+        for future in (owner, waiter):
+            with pytest.raises(ValueError):
+                future.result(5)
+
+    assert cache.get_or_compute("k", lambda: "later") == ("later", SOURCE_UPSTREAM)
+
+
+def test_cancelled_owner_fails_its_waiters():
+    cache = LLMCache()
+
+    async def run():
+        async def slow():
+            await asyncio.sleep(10)
+            return "never"
+
+        owner = asyncio.create_task(cache.aget_or_compute("k", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.aget_or_compute("k", slow))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        with pytest.raises(RuntimeError):
+            await waiter
+
+    asyncio.run(run())
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path=path)
+    cache.get_or_compute("k", lambda: "reply")
+    cache.close()
+
+    restarted = LLMCache(path=path)
+    assert restarted.get_or_compute("k", lambda: "fresh") == ("reply", SOURCE_DISK)
+    assert restarted.get_or_compute("k", lambda: "fresh") == ("reply", SOURCE_MEMORY)
+    assert restarted.get_stats()["disk_hits"] == 1
+
+    async def compute():
+        return "async reply"
+
+    async def ask():
+        return await restarted.aget_or_compute("other", compute)
+
+    assert asyncio.run(ask()) == ("async reply", SOURCE_UPSTREAM)
+    restarted.clear()
+    assert restarted.get("other") == "async reply"
+    restarted.close()
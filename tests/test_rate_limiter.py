@@ -0,0 +1,120 @@
+import asyncio
+import types
+
+import pytest
+
+from game import rate_limiter
+from game.rate_limiter import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Frozen monotonic clock the tests move by hand"""
+    clock = types.SimpleNamespace(now=100.0)
+    fake_time = types.SimpleNamespace(monotonic=lambda: clock.now)
+    monkeypatch.setattr(rate_limiter, "time", fake_time)
+    return clock
+
+
+def test_bucket_queues_reservations_in_order():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+
+    assert bucket.reserve(1, now) == 0
+    assert bucket.reserve(1, now) == 0
+    assert bucket.reserve(1, now) == pytest.approx(0.5)
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    # Refill after a second covers two of the queued units
+    assert bucket.reserve(1, now + 1) == pytest.approx(0.5)
+
+
+def test_zero_rate_is_unlimited(clock):
+    limiter = RateLimiter(0, 0)
+    assert all(limiter.reserve(tokens=10**6) == 0 for _ in range(100))
+
+
+def test_requests_per_second(clock):
+    limiter = RateLimiter(requests_per_second=2, tokens_per_minute=0)
+
+    delays = [limiter.reserve() for _ in range(4)]
+
+    assert delays == pytest.approx([0, 0, 0.5, 1.0])
+    stats = limiter.get_stats()
+    assert (stats["acquired"], stats["waits"]) == (4, 2)
+    assert stats["wait_seconds"] == pytest.approx(1.5)
+
+
+def test_tokens_per_minute_and_settle(clock):
+    limiter = RateLimiter(requests_per_second=0, tokens_per_minute=600)
+
+    assert limiter.reserve(tokens=600) == 0
+    assert limiter.reserve(tokens=100) == pytest.approx(10)
+    # The first call used only 300 of its estimate; the rest comes back
+    limiter.settle("default", 600, 300)
+    assert limiter.reserve(tokens=100) == pytest.approx(0)
+
+
+def test_keys_have_separate_buckets(clock):
+    limiter = RateLimiter(1, 0, overrides={"fast": (10, 0)})
+
+    limiter.reserve("slow")
+    assert limiter.reserve("slow") == pytest.approx(1)
+    assert [limiter.reserve("fast") for _ in range(10)] == [0] * 10
+    assert limiter.get_stats()["keys"] == 2
+
+
+def test_penalize_blocks_the_key_for_retry_after(clock):
+    limiter = RateLimiter(0, 0)
+
+    limiter.penalize("model", retry_after=3)
+    assert limiter.reserve("model") == pytest.approx(3)
+    assert limiter.reserve("other") == 0
+
+    # A shorter Retry-After never shortens an existing block
+    limiter.penalize("model", retry_after=1)
+    clock.now += 2
+    assert limiter.reserve("model") == pytest.approx(1)
+    clock.now += 1
+    assert limiter.reserve("model") == 0
+    assert limiter.get_stats()["rate_limited"] == 2
+
+
+def test_penalize_without_retry_after_only_counts(clock):
+    limiter = RateLimiter(0, 0)
+    limiter.penalize("model", None)
+    assert limiter.reserve("model") == 0
+    assert limiter.get_stats()["rate_limited"] == 1
+
+
+def test_release_refunds_a_reservation(clock):
+    limiter = RateLimiter(requests_per_second=1, tokens_per_minute=60)
+
+    limiter.reserve(tokens=60)
+    assert limiter.reserve(tokens=60) == pytest.approx(60)
+    limiter.release(tokens=60)
+    assert limiter.reserve(tokens=60) == pytest.approx(60)
+
+
+def test_cancelled_waiters_refund_their_reservations():
+    limiter = RateLimiter(requests_per_second=1, tokens_per_minute=0)
+    limiter.reserve()  # bucket now empty
+
+    async def cancel_waiters():
+        waiters = [asyncio.create_task(limiter.aacquire()) for _ in range(20)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(cancel_waiters())
+
+    # Only the first reservation is still queued
+    assert limiter.reserve() == pytest.approx(1, abs=0.1)
+
+
+def test_backoff_delay():
+    limiter = RateLimiter(0, 0, backoff_base=0.5, backoff_max=4)
+
+    assert limiter.backoff_delay(0, retry_after=7) == 7
+    assert 0.25 <= limiter.backoff_delay(0) <= 0.5
+    assert 2 <= limiter.backoff_delay(10) <= 4
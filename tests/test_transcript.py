@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from config import GAME_CONFIG
+from game import llm_client
+from game.game_controller import MafiaGameController
+from game.transcript import (
+    RecordedTimeout,
+    ReplayMismatch,
+    TranscriptRecorder,
+    TranscriptReplay,
+    request_key,
+)
+
+MESSAGES = [
+    {"role": "system", "content": "You are Alice"},
+    {"role": "user", "content": "Who do you vote for?"},
+]
+
+
+def test_recorded_calls_replay_by_request(tmp_path):
+    path = str(tmp_path / "game.jsonl")
+    key = request_key(MESSAGES, 0.7)
+    other = request_key(MESSAGES, 0.2)
+
+    recorder = TranscriptRecorder(path, {"seed": 42, "pacing": "turbo"})
+    recorder.record_call(key, MESSAGES, "vote", "civilian", reply="Bob")
+    recorder.record_call(other, MESSAGES, "vote", "civilian", error=ValueError("bad"))
+    recorder.record_discussion(3)
+    recorder.record_call(
+        key, MESSAGES, "vote", "civilian", error=asyncio.CancelledError()
+    )
+    recorder.record_result({"winner": "mafia", "days": 2})
+    recorder.close()
+    recorder.record_discussion(9)  # ignored once closed
+
+    replay = TranscriptReplay(path)
+
+    assert (replay.seed, replay.header["pacing"]) == (42, "turbo")
+    assert replay.result == {"winner": "mafia", "days": 2}
+    # Same request twice: replies come back in recorded order
+    assert replay.reply(key) == "Bob"
+    with pytest.raises(RecordedTimeout):
+        replay.reply(key)
+    with pytest.raises(RuntimeError, match="ValueError: bad"):
+        replay.reply(other)
+    with pytest.raises(ReplayMismatch):
+        replay.reply(key)
+    assert replay.discussion_rounds(default=5) == 3
+    assert replay.discussion_rounds(default=5) == 5
+    assert replay.get_stats() == {"replayed": 3, "misses": 1, "unused": 0}
+
+
+def test_request_key_ignores_the_model():
+    assert request_key(MESSAGES, 0.7) == request_key(list(MESSAGES), 0.7)
+    assert request_key(MESSAGES, 0.7) != request_key(MESSAGES[1:], 0.7)
+
+
+def test_recorder_is_off_without_a_directory(tmp_path):
+    assert TranscriptRecorder.for_game("abc", None, {}) is None
+    recorder = TranscriptRecorder.for_game("abc", str(tmp_path / "t"), {"seed": 1})
+    recorder.close()
+    assert (tmp_path / "t" / "abc.jsonl").exists()
+
+
+def test_seeded_game_replays_to_the_same_end(tmp_path, monkeypatch):
+    # A fresh, unthrottled pool without the reply cache, so every request is
+    # sent (and recorded) and nothing waits on the rate limiter
+    monkeypatch.setattr(llm_client, "_pool", llm_client.LLMClientPool())
+    monkeypatch.setitem(GAME_CONFIG, "transcript_dir", str(tmp_path))
+
+    recorded = MafiaGameController(pacing="turbo", seed=7)
+    asyncio.run(recorded.start_game())
+    path = recorded.recorder.path
+
+    monkeypatch.setitem(GAME_CONFIG, "transcript_dir", None)
+    replayed = MafiaGameController(replay=path)
+    asyncio.run(replayed.start_game())
+
+    assert replayed.seed == 7
+    assert replayed.get_result() == recorded.get_result()
+    assert replayed.get_result()["winner"] is not None
+    stats = replayed.replay.get_stats()
+    assert (stats["misses"], stats["unused"]) == (0, 0)
+    assert stats["replayed"] > 0